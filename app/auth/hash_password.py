@@ -1,17 +1,129 @@
 """
 Файл hash_password.py содержит класс HashPassword, который предоставляет методы для работы с хешированием паролей.
+Хеширование bcrypt выполняется в пуле потоков или процессов, чтобы не блокировать цикл событий.
 """
+import asyncio
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Literal, Optional
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from ..config import settings
 
-# Создание контекста для хеширования паролей с использованием алгоритма bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Стоимость (количество раундов) bcrypt для новых хешей
+HASH_ROUNDS: int = settings.hash_rounds
+# Тип пула для хеширования: "thread" (пул потоков) или "process" (пул процессов)
+HASH_EXECUTOR: Literal["thread", "process"] = settings.hash_executor
+# Количество потоков или процессов в пуле
+HASH_MAX_WORKERS: int = settings.hash_max_workers
+# Максимальное количество задач, ожидающих свободного потока; при превышении запрос отклоняется с кодом 503
+HASH_MAX_QUEUE: int = settings.hash_max_queue
+
+# Создание контекста для хеширования паролей с использованием алгоритма bcrypt.
+# Хеши с другой стоимостью считаются устаревшими и перехешируются при входе пользователя.
+@lru_cache
+def get_pwd_context(rounds: int = HASH_ROUNDS) -> CryptContext:
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+# Функции, выполняемые в пуле (объявлены на уровне модуля, чтобы их можно было передать в пул процессов)
+def _hash(password: str, rounds: int) -> str:
+    return get_pwd_context(rounds).hash(password)
+
+def _verify(plain_password: str, hashed_password: str, rounds: int) -> bool:
+    return get_pwd_context(rounds).verify(plain_password, hashed_password)
+
+def _verify_and_update(plain_password: str, hashed_password: str, rounds: int) -> tuple[bool, Optional[str]]:
+    return get_pwd_context(rounds).verify_and_update(plain_password, hashed_password)
 
 # Класс для работы с хешированием паролей
 class HashPassword:
-    # Метод для создания хеша из пароля
+    def __init__(
+        self,
+        rounds: int = HASH_ROUNDS,
+        executor: Literal["thread", "process"] = HASH_EXECUTOR,
+        max_workers: int = HASH_MAX_WORKERS,
+        max_queue: int = HASH_MAX_QUEUE
+    ):
+        self.rounds = rounds
+        self.executor = executor
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool: Optional[Executor] = None
+        # Количество задач, переданных в пул и еще не завершенных (уменьшается из потока пула, поэтому изменяется под блокировкой)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+    
+    # Количество задач, ожидающих свободного потока или процесса
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._pending - self.max_workers)
+    
+    # Количество задач, выполняемых в пуле в данный момент
+    @property
+    def in_flight(self) -> int:
+        return min(self._pending, self.max_workers)
+    
+    # Метод для создания хеша из пароля (синхронно, блокирует вызывающий поток)
     def create_hash(self, password: str) -> str:
-        return pwd_context.hash(password)
+        return _hash(password, self.rounds)
     
-    # Метод для проверки соответствия пароля и его хеша
+    # Метод для проверки соответствия пароля и его хеша (синхронно, блокирует вызывающий поток)
     def verify_hash(self, plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+        return _verify(plain_password, hashed_password, self.rounds)
+    
+    # Метод для проверки, нужно ли перехешировать пароль (хеш создан с другой стоимостью)
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return get_pwd_context(self.rounds).needs_update(hashed_password)
+    
+    # Асинхронный метод для создания хеша из пароля в пуле
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password, self.rounds)
+    
+    # Асинхронный метод для проверки соответствия пароля и его хеша в пуле
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(_verify, plain_password, hashed_password, self.rounds)
+    
+    # Асинхронный метод для проверки пароля, который дополнительно возвращает новый хеш, если старый создан с другой стоимостью
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        return await self._run(_verify_and_update, plain_password, hashed_password, self.rounds)
+    
+    # Метод для остановки пула (пул будет создан заново при следующем вызове)
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+    
+    # Уменьшение количества незавершенных задач по завершении задачи в пуле
+    def _release(self, future) -> None:
+        with self._pending_lock:
+            self._pending -= 1
+    
+    # Выполнение функции в пуле с ограничением очереди ожидающих задач. Задача считается незавершенной, пока она не выполнится
+    # в пуле, даже если ожидающий ее запрос отменен (например, клиент отключился), поэтому ограничение учитывает всю фактическую нагрузку
+    async def _run(self, func, *args):
+        with self._pending_lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Сервер перегружен, повторите попытку позже.",
+                    headers={"Retry-After": "1"}
+                )
+            self._pending += 1
+        
+        try:
+            if self._pool is None:
+                pool_class = ProcessPoolExecutor if self.executor == "process" else ThreadPoolExecutor
+                self._pool = pool_class(max_workers=self.max_workers)
+            future = self._pool.submit(func, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
@@ -2,50 +2,89 @@
 Файл jwt_handler содержит функции для создания и верификации JWT токенов.
 """
 import time
-from datetime import datetime
+from collections import OrderedDict
+from typing import Dict
 import jwt
-from jwt.exceptions import InvalidTokenError
+from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
 from fastapi import HTTPException, status
+from ..config import settings
 
-# Секретный ключ для подписи JWT токенов
-SECRET_KEY: str = "SECRET_KEY"
+# Класс создания и проверки JWT токенов со стандартными полями exp (время истечения) и iat (время выпуска).
+# Токен подписывается активным ключом, ID которого (kid) записывается в заголовок токена; проверка выполняется ключом из заголовка,
+# поэтому при смене ключа токены, подписанные прежним ключом, действуют, пока прежний ключ есть в наборе ключей.
+# Уже проверенные токены хранятся в LRU-кэше до истечения их срока действия, что избавляет от повторной проверки подписи.
+class TokenVerifier:
+    def __init__(
+        self,
+        keys: Dict[str, str],
+        active_key: str,
+        algorithm: str = "HS256",
+        ttl: int = 3600,
+        cache_size: int = 4096
+    ):
+        if active_key not in keys:
+            raise ValueError(f"Активный ключ подписи {active_key!r} отсутствует в наборе ключей")
+        self.keys = keys
+        self.active_key = active_key
+        self.algorithm = algorithm
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, dict] = OrderedDict()
 
-# Функция для создания JWT токена доступа
-def create_access_token(user: str) -> str:
-    # Формирование payload токена с идентификатором пользователя и временем истечения (1 час)
-    payload = {"user": user, "expires": time.time() + 3600}
-    
-    # Кодирование токена с использованием секретного ключа и алгоритма HS256
-    token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
-    
-    return token
+    # Метод для создания токена доступа пользователя
+    def create(self, user: str) -> str:
+        now = int(time.time())
+        payload = {"user": user, "iat": now, "exp": now + self.ttl}
+        return jwt.encode(payload, self.keys[self.active_key], algorithm=self.algorithm, headers={"kid": self.active_key})
 
-# Функция для верификации JWT токена доступа
-def verify_access_token(token: str) -> dict:
-    try:
-        # Декодирование токена с проверкой подписи
-        data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        
-        # Получение времени истечения токена
-        expire = data.get("expires")
-        
-        # Проверка наличия поля expires в токене
-        if expire is None:
+    # Метод для проверки токена доступа: возвращает данные токена или вызывает HTTPException
+    def verify(self, token: str) -> dict:
+        data = self._cache.get(token)
+        if data is not None:
+            if data["exp"] > time.time():
+                self._cache.move_to_end(token)
+                return data
+            del self._cache[token]
+
+        try:
+            key = self.keys.get(jwt.get_unverified_header(token).get("kid"))
+            if key is None:
+                raise InvalidTokenError("Unknown signing key")
+            data = jwt.decode(token, key, algorithms=[self.algorithm], options={"require": ["exp", "iat", "user"]})
+        except ExpiredSignatureError:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No access token supplied",
+                status_code=status.HTTP_403_FORBIDDEN, detail="Token expired!"
             )
-        
-        # Проверка срока действия токена
-        if datetime.utcnow() > datetime.utcfromtimestamp(expire):
+        except InvalidTokenError:
             raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Token expired!"
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token"
             )
-        
-        # Возврат данных из токена при успешной верификации
+
+        self._cache[token] = data
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
         return data
-    except InvalidTokenError:
-        # Обработка невалидного токена
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token"
-        )
\ No newline at end of file
+
+    # Метод для очистки кэша проверенных токенов
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+# Общий для процесса экземпляр с ключами подписи из настроек
+token_verifier = TokenVerifier(
+    keys=settings.jwt_keys,
+    active_key=settings.jwt_active_key,
+    algorithm=settings.jwt_algorithm,
+    ttl=settings.access_token_ttl,
+    cache_size=settings.token_cache_size
+)
+
+# Функция для создания JWT токена доступа
+def create_access_token(user: str) -> str:
+    return token_verifier.create(user)
+
+# Функция для верификации JWT токена доступа
+def verify_access_token(token: str) -> dict:
+    return token_verifier.verify(token)
@@ -0,0 +1,67 @@
+"""
+Файл user_cache содержит кэш данных аутентифицированных пользователей, который избавляет от запроса к базе данных при каждом запросе к API.
+"""
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from sqlalchemy import event
+from ..models.users import User
+from ..config import settings
+
+# Время жизни записи кэша в секундах
+USER_CACHE_TTL: float = settings.user_cache_ttl
+# Максимальное количество пользователей в кэше (при превышении удаляются давно не использованные записи)
+USER_CACHE_MAX_SIZE: int = settings.user_cache_max_size
+
+# Данные пользователя, необходимые для авторизации запросов (без пароля, аватара и прочих полей)
+class CachedUser(NamedTuple):
+    id: int
+    email: str
+
+# Класс LRU-кэша с ограниченным временем жизни записей, ключом которого является email из JWT токена
+class UserCache:
+    def __init__(self, ttl: float = USER_CACHE_TTL, max_size: int = USER_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, CachedUser]] = OrderedDict()
+    
+    # Метод для получения пользователя по email (None, если записи нет или ее время жизни истекло)
+    def get(self, email: str) -> Optional[CachedUser]:
+        entry = self._entries.get(email)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._entries[email]
+            return None
+        self._entries.move_to_end(email)
+        return user
+    
+    # Метод для сохранения пользователя в кэше
+    def set(self, user: CachedUser) -> None:
+        self._entries[user.email] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(user.email)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    # Метод для удаления записей пользователей из кэша (вызывается при изменении или удалении пользователя)
+    def invalidate(self, *emails: Optional[str]) -> None:
+        for email in emails:
+            if email is not None:
+                self._entries.pop(email, None)
+    
+    # Метод для полной очистки кэша
+    def clear(self) -> None:
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Общий для процесса экземпляр кэша пользователей. Другие процессы (воркеры uvicorn) о сбросе записей не узнают,
+# поэтому время жизни записей (USER_CACHE_TTL) ограничивает, как долго в них действует устаревшая запись
+user_cache = UserCache()
+
+# Удаление пользователя через ORM сбрасывает его запись в кэше
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target: User) -> None:
+    user_cache.invalidate(target.email)
@@ -0,0 +1,77 @@
+"""
+Файл compression представляет измерение выигрыша от сжатия ответов: размер тела и время передачи без сжатия и с gzip, brotli и zstd.
+"""
+import argparse
+import base64
+import json
+import os
+import time
+from typing import Callable
+
+from ..config import settings
+from ..middleware.compression import GzipCompressor, BrotliCompressor, ZstdCompressor, brotli, zstandard
+from .list_serialization import make_operations, serialize_rows
+
+# Пропускная способность канала клиента (Мбит/с), для которой оценивается время передачи ответа
+BANDWIDTHS_MBIT = (2, 10, 100)
+
+# Способы сжатия, доступные в текущем окружении, с настройками уровня сжатия из конфигурации приложения
+def available_compressors() -> dict[str, Callable]:
+    compressors = {"gzip": lambda: GzipCompressor(settings.compression_gzip_level)}
+    if brotli is not None:
+        compressors["br"] = lambda: BrotliCompressor(settings.compression_brotli_quality)
+    if zstandard is not None:
+        compressors["zstd"] = lambda: ZstdCompressor(settings.compression_zstd_level)
+    return compressors
+
+# Тело ответа /user/me; при avatar_size > 0 - с аватаром в виде data URL (как до переноса аватаров в хранилище)
+def make_user_payload(avatar_size: int) -> bytes:
+    user = {
+        "id": 1,
+        "name": "Дмитрий",
+        "surname": "Куракин",
+        "email": "example@yandex.ru",
+        "budgetLimit": 50000.0,
+        "avatar": None,
+    }
+    if avatar_size:
+        # Изображения уже сжаты, поэтому их содержимое близко к случайным байтам
+        user["avatar"] = "data:image/png;base64," + base64.b64encode(os.urandom(avatar_size)).decode()
+    return json.dumps(user, ensure_ascii=False).encode()
+
+# Лучшее время сжатия тела ответа из нескольких повторов и размер сжатого тела
+def measure(factory: Callable, body: bytes, repeat: int) -> tuple[float, int]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        compressed = factory().compress(body, finish=True)
+        timings.append(time.perf_counter() - started)
+    return min(timings), len(compressed)
+
+# Запуск измерений и вывод таблицы: размер, доля от исходного размера, время сжатия и оценка времени получения ответа
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Измерение выигрыша от сжатия ответов")
+    parser.add_argument("--operations", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--avatar-size", type=int, default=200 * 1024)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    payloads = {f"/operation ({count})": serialize_rows(make_operations(count)[1]) for count in args.operations}
+    payloads["/user/me"] = make_user_payload(0)
+    payloads["/user/me (data URL)"] = make_user_payload(args.avatar_size)
+    
+    compressors = available_compressors()
+    transfer_columns = " ".join(f"{f'{bandwidth} Мбит/с, мс':>16}" for bandwidth in BANDWIDTHS_MBIT)
+    print(f"{'ответ':<22} {'сжатие':<8} {'размер, Б':>11} {'доля':>6} {'сжатие, мс':>11} {transfer_columns}")
+    for name, body in payloads.items():
+        rows = [("нет", 0.0, len(body))]
+        rows += [(encoding, *measure(factory, body, args.repeat)) for encoding, factory in compressors.items()]
+        for encoding, elapsed, size in rows:
+            # Время получения ответа: сжатие на сервере и передача тела по каналу (без учета задержки сети)
+            transfer = " ".join(
+                f"{(elapsed + size * 8 / (bandwidth * 1_000_000)) * 1000:>16.2f}" for bandwidth in BANDWIDTHS_MBIT
+            )
+            print(f"{name:<22} {encoding:<8} {size:>11} {size / len(body):>6.2f} {elapsed * 1000:>11.2f} {transfer}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Файл list_serialization представляет сравнение скорости сериализации списка операций: через модели ответа и через строки столбцов.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+
+from ..models.operations import Operation
+from ..schemas.operations import OperationResponse, operation_rows_adapter
+from ..routes.operations import OPERATION_LIST_COLUMNS
+
+# Сериализатор списка моделей ответа, как его использует FastAPI при указании response_model
+response_adapter = TypeAdapter(List[OperationResponse])
+
+# Генерация тестовых операций в виде объектов ORM (прежний путь) и строк столбцов (быстрый путь)
+def make_operations(count: int) -> tuple[list[Operation], list[dict]]:
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    operations = [
+        Operation(id=i, name=f"Операция {i}", date=start + timedelta(minutes=i), amount=Decimal(-10050 - 100 * i).scaleb(-2), category_id=i % 20, author=1)
+        for i in range(count)
+    ]
+    names = [column.key for column in OPERATION_LIST_COLUMNS]
+    rows = [{name: getattr(operation, name) for name in names} for operation in operations]
+    return operations, rows
+
+# Прежний путь: валидация каждого объекта ORM в модель ответа (from_attributes и валидатор даты), затем json.dumps
+def serialize_models(operations: list[Operation]) -> bytes:
+    models = response_adapter.validate_python(operations, from_attributes=True)
+    content = response_adapter.dump_python(models, mode="json", by_alias=True)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# Быстрый путь: строки столбцов сериализуются в JSON одним вызовом pydantic-core
+def serialize_rows(rows: list[dict]) -> bytes:
+    return operation_rows_adapter.dump_json(rows)
+
+# Замер лучшего времени выполнения функции из нескольких повторов
+def best_time(func: Callable[[], bytes], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+# Запуск сравнения для нескольких размеров списка и вывод результатов в виде таблицы
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение сериализации списка операций")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'строк':>8} {'модели, мс':>12} {'строки, мс':>12} {'ускорение':>10}")
+    for count in args.rows:
+        operations, rows = make_operations(count)
+        models_time = best_time(lambda: serialize_models(operations), args.repeat)
+        rows_time = best_time(lambda: serialize_rows(rows), args.repeat)
+        print(f"{count:>8} {models_time * 1000:>12.2f} {rows_time * 1000:>12.2f} {models_time / rows_time:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+"""
+Файл load представляет нагрузочный тест API: наполнение отдельной базы данных (N пользователей × M категорий × K операций),
+параллельные запросы к приложению и расчет задержек (p50/p95/p99) и пропускной способности по сценариям с записью результатов в JSON.
+Запуск: python -m app.benchmarks.load --users 200 --categories 10 --operations 1000 --output load.json [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import asyncpg
+import httpx
+from sqlalchemy.engine import make_url
+
+# Пароль всех пользователей тестовой базы
+PASSWORD = "benchmark-password"
+# Сценарии, которые выполняются по умолчанию
+DEFAULT_SCENARIOS = ["login", "list", "page", "filter", "create", "summary", "category_summary", "timeseries", "budget"]
+
+# Наполнение таблиц одним запросом на таблицу: у пользователя i категории (i - 1) * M + 1 ... i * M (последняя - доход),
+# операции распределены по категориям пользователя и по датам за два года до начала теста; суммы указываются в копейках
+SEED = [
+    "INSERT INTO users (id, name, surname, email, password, budget_limit) "
+    "SELECT i, 'User', 'Benchmark', 'bench' || i || '@example.com', :password, 5000000 FROM generate_series(1, :users) AS i",
+    "INSERT INTO categories (id, name, color, category_type, author) "
+    "SELECT i, 'Category ' || i, '#336699', CASE WHEN i % :categories = 0 THEN 'income' ELSE 'expense' END, (i - 1) / :categories + 1 "
+    "FROM generate_series(1, :users * :categories) AS i",
+    "INSERT INTO operations (name, date, amount, category_id, author) "
+    "SELECT 'Operation ' || i, :started - (i % 730) * INTERVAL '1 day' - (i % 1440) * INTERVAL '1 minute', "
+    "(random() * 100000)::bigint, ((i - 1) / :operations) * :categories + i % :categories + 1, (i - 1) / :operations + 1 "
+    "FROM generate_series(1, :users * :operations) AS i",
+    "SELECT setval(pg_get_serial_sequence('users', 'id'), :users)",
+    "SELECT setval(pg_get_serial_sequence('categories', 'id'), :users * :categories)",
+]
+
+# URL базы данных приложения по тем же правилам, что и в настройках приложения (переменная окружения DATABASE_URL, файл .env,
+# значение по умолчанию). Модуль настроек загружается отдельно от app.config: движок приложения создается по настройкам,
+# загруженным при первом импорте app.config, а к этому моменту DATABASE_URL уже должна указывать на базу теста
+def application_database_url() -> str:
+    spec = importlib.util.spec_from_file_location("benchmark_config", Path(__file__).parent.parent / "config.py")
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+    return config.settings.database_url
+
+# Проверка, что URL указывают на одну и ту же базу данных (сервер, порт и имя базы)
+def same_database(first: str, second: str) -> bool:
+    first, second = make_url(str(first)), make_url(str(second))
+    return (first.host, first.port or 5432, first.database) == (second.host, second.port or 5432, second.database)
+
+# Создание базы данных для нагрузочного теста (если ее нет) через служебную базу postgres
+async def ensure_database(url: str) -> None:
+    target = make_url(url)
+    maintenance = target.set(drivername="postgresql", database="postgres").render_as_string(hide_password=False)
+    connection = await asyncpg.connect(maintenance)
+    try:
+        exists = await connection.fetchval("SELECT 1 FROM pg_database WHERE datname = $1", target.database)
+        if not exists:
+            await connection.execute(f'CREATE DATABASE "{target.database}"')
+    finally:
+        await connection.close()
+
+# Пересоздание таблиц и наполнение базы данными, итогами по месяцам и статистикой для планировщика. Таблицы базы приложения
+# (application_url) не пересоздаются, даже если движок приложения указывает на нее
+async def seed(users: int, categories: int, operations: int, application_url: str) -> None:
+    from sqlalchemy import DateTime, Integer, String, bindparam, text
+    from ..auth.hash_password import HashPassword
+    from ..database.base import Base
+    from ..database.connection import engine, session_maker
+    from ..database.rollups import rebuild_totals
+
+    if same_database(engine.url, application_url):
+        raise RuntimeError(f"База данных {engine.url.database} является базой приложения: наполнение отменено")
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+    hasher = HashPassword()
+    parameters = {
+        "users": users,
+        "categories": categories,
+        "operations": operations,
+        "password": await hasher.hash(PASSWORD),
+        "started": datetime.now(timezone.utc),
+    }
+    hasher.shutdown()
+    types = {"users": Integer(), "categories": Integer(), "operations": Integer(), "password": String(), "started": DateTime(timezone=True)}
+    async with session_maker() as session:
+        for statement in SEED:
+            names = [name for name in parameters if f":{name}" in statement]
+            query = text(statement).bindparams(*(bindparam(name, type_=types[name]) for name in names))
+            await session.execute(query, {name: parameters[name] for name in names})
+        await rebuild_totals(session)
+        await session.commit()
+    async with engine.connect() as connection:
+        await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("VACUUM ANALYZE"))
+
+# Пользователь, от имени которого выполняются запросы сценариев
+class BenchmarkUser:
+    def __init__(self, id: int, categories: int, token: str):
+        self.id = id
+        self.email = f"bench{id}@example.com"
+        self.category_ids = list(range((id - 1) * categories + 1, id * categories + 1))
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+# Запросы сценариев: каждый сценарий выполняет один запрос от имени случайного пользователя
+def scenarios(started: datetime) -> Dict[str, Callable[[httpx.AsyncClient, BenchmarkUser], Awaitable[httpx.Response]]]:
+    def month_range() -> dict:
+        end = started - timedelta(days=random.randint(0, 700))
+        return {"start_date": (end - timedelta(days=30)).isoformat(), "end_date": end.isoformat()}
+
+    return {
+        "login": lambda client, user: client.post("/user/login", json={"email": user.email, "password": PASSWORD}),
+        "list": lambda client, user: client.get("/operation", headers=user.headers),
+        "page": lambda client, user: client.get("/operation/page", params={"limit": 50}, headers=user.headers),
+        "filter": lambda client, user: client.get(
+            "/operation", params={"categoryId": random.choice(user.category_ids), **month_range()}, headers=user.headers
+        ),
+        "create": lambda client, user: client.post("/operation", json={
+            "name": "Benchmark",
+            "date": started.isoformat(),
+            "amount": round(random.uniform(1, 1000), 2),
+            "categoryId": random.choice(user.category_ids),
+        }, headers=user.headers),
+        "summary": lambda client, user: client.get("/operation/summary", params=month_range(), headers=user.headers),
+        "category_summary": lambda client, user: client.get("/operation/summary/category", headers=user.headers),
+        "timeseries": lambda client, user: client.get("/operation/timeseries", params={
+            "bucket": "month", "from": (started - timedelta(days=730)).date().isoformat(), "to": started.date().isoformat()
+        }, headers=user.headers),
+        "budget": lambda client, user: client.get("/user/me/budget-status", headers=user.headers),
+    }
+
+# Значение процентиля (0-100) по отсортированному списку задержек
+def percentile(values: List[float], rank: float) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(rank) - 1]
+
+# Выполнение сценария: requests запросов в concurrency параллельных потоках (после warmup запросов прогрева)
+async def run_scenario(
+    client: httpx.AsyncClient,
+    request: Callable,
+    users: List[BenchmarkUser],
+    requests: int,
+    concurrency: int,
+    warmup: int
+) -> dict:
+    for _ in range(warmup):
+        await request(client, random.choice(users))
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await request(client, random.choice(users))
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+# Текущий коммит git (для сравнения результатов между коммитами)
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Вывод результатов в виде таблицы; при наличии прежних результатов - с изменением p95 и пропускной способности в процентах
+def print_results(results: Dict[str, dict], baseline: Optional[Dict[str, dict]]) -> None:
+    header = f"{'сценарий':<18} {'запросов':>9} {'ошибок':>7} {'запр/с':>9} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9}"
+    if baseline:
+        header += f" {'Δ p95':>8} {'Δ запр/с':>9}"
+    print(header)
+    for name, result in results.items():
+        line = (
+            f"{name:<18} {result['requests']:>9} {result['errors']:>7} {result['throughput']:>9.1f} "
+            f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f}"
+        )
+        previous = (baseline or {}).get(name)
+        if previous:
+            line += f" {(result['p95_ms'] / previous['p95_ms'] - 1) * 100:>+7.1f}%"
+            line += f" {(result['throughput'] / previous['throughput'] - 1) * 100:>+8.1f}%"
+        print(line)
+
+# Запуск нагрузочного теста
+async def run(args: argparse.Namespace) -> dict:
+    # Модули приложения импортируются после выбора базы данных: движок создается при импорте по настройке DATABASE_URL
+    from ..main import app
+    from ..database.connection import engine
+
+    if not args.skip_seed:
+        started = time.perf_counter()
+        await seed(args.users, args.categories, args.operations, args.application_url)
+        print(f"Наполнение базы: {time.perf_counter() - started:.1f} с", file=sys.stderr)
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://benchmark", timeout=60)
+
+    results = {}
+    async with client:
+        # Токены активных пользователей получаются входом в систему, как у реальных клиентов
+        users = []
+        for id in random.sample(range(1, args.users + 1), min(args.active_users, args.users)):
+            response = await client.post("/user/login", json={"email": f"bench{id}@example.com", "password": PASSWORD})
+            response.raise_for_status()
+            users.append(BenchmarkUser(id, args.categories, response.json()["access_token"]))
+
+        requests = scenarios(datetime.now(timezone.utc))
+        for name in args.scenarios:
+            results[name] = await run_scenario(client, requests[name], users, args.requests, args.concurrency, args.warmup)
+            print(f"{name}: {results[name]['throughput']:.1f} запр/с", file=sys.stderr)
+    await engine.dispose()
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест API")
+    parser.add_argument("--database-url", default=os.environ.get("BENCHMARK_DATABASE_URL"),
+                        help="база данных теста (по умолчанию база приложения с суффиксом _benchmark); все таблицы пересоздаются")
+    parser.add_argument("--base-url", help="адрес запущенного сервера (по умолчанию приложение вызывается в процессе через ASGI)")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--categories", type=int, default=10, help="категорий на пользователя")
+    parser.add_argument("--operations", type=int, default=1000, help="операций на пользователя")
+    parser.add_argument("--active-users", type=int, default=50, help="пользователей, от имени которых выполняются запросы")
+    parser.add_argument("--requests", type=int, default=1000, help="запросов на сценарий")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--scenarios", nargs="+", choices=DEFAULT_SCENARIOS, default=DEFAULT_SCENARIOS)
+    parser.add_argument("--skip-seed", action="store_true", help="использовать уже наполненную базу")
+    parser.add_argument("--seed", type=int, default=0, help="начальное значение генератора случайных чисел")
+    parser.add_argument("--output", default="load-results.json")
+    parser.add_argument("--compare", help="файл результатов предыдущего запуска для сравнения")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    # До импорта модулей приложения: настройки приложения загружаются один раз, уже с базой теста в DATABASE_URL
+    args.application_url = application_database_url()
+    if args.database_url is None:
+        url = make_url(args.application_url)
+        args.database_url = url.set(database=f"{url.database}_benchmark").render_as_string(hide_password=False)
+    if same_database(args.database_url, args.application_url):
+        parser.error("база данных теста совпадает с базой приложения (DATABASE_URL), а все ее таблицы пересоздаются")
+    asyncio.run(ensure_database(args.database_url))
+    os.environ["DATABASE_URL"] = args.database_url
+
+    results = asyncio.run(run(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+    print_results(results, baseline)
+
+    report = {
+        "commit": current_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "parameters": {
+            key: getattr(args, key)
+            for key in ("users", "categories", "operations", "active_users", "requests", "concurrency", "warmup", "seed", "base_url")
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Файл partitions представляет сравнение обычной и секционированной по месяцам таблицы операций: обе таблицы наполняются одинаковыми
+строками до растущего числа строк, на каждом размере измеряются задержки (p50/p95) запросов с фильтром по дате и время архивирования месяца.
+Запуск: python -m app.benchmarks.partitions --rows 100000 1000000 10000000 100000000 --months 36 --output partitions.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timezone
+from typing import Dict, List
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from ..database.partitions import add_months
+from .load import ensure_database, percentile
+
+# Таблицы сравнения: обычная и секционированная по месяцам (столбцы и индексы повторяют таблицу operations)
+PLAIN = "bench_operations_plain"
+PARTITIONED = "bench_operations_partitioned"
+
+# Запросы с фильтром по дате: $1 - пользователь, $2 и $3 - начало и конец месяца
+QUERIES = {
+    # Страница операций пользователя за месяц (список операций с фильтром по дате)
+    "user_month_page": "SELECT id, name, date, amount, category_id FROM {table} "
+                       "WHERE author = $1 AND date >= $2 AND date < $3 ORDER BY date DESC, id DESC LIMIT 50",
+    # Сумма операций пользователя за месяц (сводка без таблиц итогов)
+    "user_month_total": "SELECT count(*), sum(abs(amount)) FROM {table} WHERE author = $1 AND date >= $2 AND date < $3",
+    # Сумма операций всех пользователей за месяц (отчеты и пересчет итогов)
+    "month_total": "SELECT count(*), sum(abs(amount)) FROM {table} WHERE $1::int IS NOT NULL AND date >= $2 AND date < $3",
+}
+
+# Граница месяца в UTC (для DDL)
+def bound(month: date) -> str:
+    return f"{month.isoformat()} 00:00:00+00"
+
+# Начало месяца в UTC (для параметров запросов)
+def moment(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+# Пересоздание таблиц: секции создаются на каждый месяц диапазона дат
+async def create_tables(connection: asyncpg.Connection, start: date, months: int) -> None:
+    columns = (
+        "id integer NOT NULL, name varchar(256) NOT NULL, date timestamptz NOT NULL, amount bigint NOT NULL, "
+        "category_id integer NOT NULL, author integer NOT NULL"
+    )
+    await connection.execute(f"DROP TABLE IF EXISTS {PLAIN}, {PARTITIONED}")
+    await connection.execute(f"CREATE TABLE {PLAIN} ({columns}, PRIMARY KEY (id))")
+    await connection.execute(f"CREATE TABLE {PARTITIONED} ({columns}, PRIMARY KEY (id, date)) PARTITION BY RANGE (date)")
+    for offset in range(months):
+        month = add_months(start, offset)
+        await connection.execute(
+            f"CREATE TABLE {PARTITIONED}_y{month.year:04d}m{month.month:02d} PARTITION OF {PARTITIONED} "
+            f"FOR VALUES FROM ('{bound(month)}') TO ('{bound(add_months(month, 1))}')"
+        )
+    for table in (PLAIN, PARTITIONED):
+        await connection.execute(f"CREATE INDEX ON {table} (author, date DESC, id)")
+
+# Добавление строк с номерами first..last в обе таблицы: даты равномерно распределены по месяцам диапазона
+async def fill(connection: asyncpg.Connection, first: int, last: int, start: date, months: int, users: int) -> None:
+    seconds = (add_months(start, months) - start).days * 86400
+    for table in (PLAIN, PARTITIONED):
+        await connection.execute(
+            f"INSERT INTO {table} SELECT i, 'Operation ' || i, "
+            f"$1::timestamptz + ((i::bigint * 7919) % $2) * INTERVAL '1 second', (random() * 100000)::bigint, i % 10 + 1, i % $3 + 1 "
+            f"FROM generate_series($4::int, $5::int) AS i",
+            moment(start), seconds, users, first, last
+        )
+    await connection.execute(f"VACUUM ANALYZE {PLAIN}")
+    await connection.execute(f"VACUUM ANALYZE {PARTITIONED}")
+
+# Измерение задержек запроса по обеим таблицам на случайных пользователях и месяцах
+async def measure(connection: asyncpg.Connection, query: str, start: date, months: int, users: int, requests: int) -> Dict[str, dict]:
+    results = {}
+    for table in (PLAIN, PARTITIONED):
+        statement = await connection.prepare(query.format(table=table))
+        latencies = []
+        for _ in range(requests):
+            month = add_months(start, random.randrange(months))
+            started = time.perf_counter()
+            await statement.fetch(random.randint(1, users), moment(month), moment(add_months(month, 1)))
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        results[table] = {"p50_ms": round(percentile(latencies, 50), 3), "p95_ms": round(percentile(latencies, 95), 3)}
+    return results
+
+# Время удаления операций самого старого месяца: DELETE из обычной таблицы и отсоединение секции с ее удалением.
+# Изменения откатываются, чтобы таблицы не менялись между размерами.
+async def measure_archive(connection: asyncpg.Connection, start: date) -> Dict[str, float]:
+    statements = {
+        PLAIN: [f"DELETE FROM {PLAIN} WHERE date >= '{bound(start)}' AND date < '{bound(add_months(start, 1))}'"],
+        PARTITIONED: [
+            f"ALTER TABLE {PARTITIONED} DETACH PARTITION {PARTITIONED}_y{start.year:04d}m{start.month:02d}",
+            f"DROP TABLE {PARTITIONED}_y{start.year:04d}m{start.month:02d}",
+        ],
+    }
+    results = {}
+    for table, queries in statements.items():
+        transaction = connection.transaction()
+        await transaction.start()
+        started = time.perf_counter()
+        for query in queries:
+            await connection.execute(query)
+        results[table] = round((time.perf_counter() - started) * 1000, 3)
+        await transaction.rollback()
+    return results
+
+# Запуск сравнения на всех размерах
+async def run(args: argparse.Namespace) -> List[dict]:
+    url = make_url(args.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+    connection = await asyncpg.connect(url)
+    start = date.fromisoformat(args.start)
+    results = []
+    try:
+        await create_tables(connection, start, args.months)
+        filled = 0
+        for rows in sorted(args.rows):
+            started = time.perf_counter()
+            await fill(connection, filled + 1, rows, start, args.months, args.users)
+            filled = rows
+            print(f"Наполнение до {rows} строк: {time.perf_counter() - started:.1f} с", file=sys.stderr)
+
+            result = {"rows": rows, "queries": {}, "archive_month_ms": await measure_archive(connection, start)}
+            for name, query in QUERIES.items():
+                result["queries"][name] = await measure(connection, query, start, args.months, args.users, args.requests)
+            results.append(result)
+            print_result(result)
+        if not args.keep:
+            await connection.execute(f"DROP TABLE {PLAIN}, {PARTITIONED}")
+    finally:
+        await connection.close()
+    return results
+
+# Вывод результатов размера: p95 обычной и секционированной таблицы и их отношение
+def print_result(result: dict) -> None:
+    print(f"строк: {result['rows']}")
+    for name, tables in result["queries"].items():
+        plain, partitioned = tables[PLAIN]["p95_ms"], tables[PARTITIONED]["p95_ms"]
+        print(f"  {name:<18} p95 обычная {plain:>9.3f} мс, секционированная {partitioned:>9.3f} мс, x{plain / max(partitioned, 1e-6):.1f}")
+    archive = result["archive_month_ms"]
+    print(f"  {'archive_month':<18} обычная {archive[PLAIN]:>9.1f} мс, секционированная {archive[PARTITIONED]:>9.1f} мс")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение обычной и секционированной по месяцам таблицы операций")
+    parser.add_argument("--database-url", default=os.environ.get("BENCHMARK_DATABASE_URL"),
+                        help="база данных сравнения (по умолчанию база приложения с суффиксом _benchmark)")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000, 10000000],
+                        help="размеры таблиц (строк), до которых таблицы последовательно наполняются, например до 100000000")
+    parser.add_argument("--months", type=int, default=36, help="месяцев в диапазоне дат операций")
+    parser.add_argument("--start", default="2023-01-01", help="первый месяц диапазона дат")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200, help="запросов на запрос и таблицу")
+    parser.add_argument("--seed", type=int, default=0, help="начальное значение генератора случайных чисел")
+    parser.add_argument("--keep", action="store_true", help="не удалять таблицы после сравнения")
+    parser.add_argument("--output", default="partitions-results.json")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    if args.database_url is None:
+        from ..config import settings
+        url = make_url(settings.database_url)
+        args.database_url = url.set(database=f"{url.database}_benchmark").render_as_string(hide_password=False)
+    asyncio.run(ensure_database(args.database_url))
+
+    results = asyncio.run(run(args))
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump({"months": args.months, "users": args.users, "results": results}, file, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()
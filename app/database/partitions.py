@@ -0,0 +1,149 @@
+"""
+Файл partitions содержит функции для управления помесячными секциями таблицы operations: создание секций на будущие месяцы
+и отсоединение старых секций с переносом в архивную схему (или удалением).
+Запуск: python -m app.database.partitions create [--months-ahead 3] | archive --before 2020-01-01 [--drop]
+"""
+import argparse
+import asyncio
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# Секционированная таблица и ее секция по умолчанию (операции за месяцы без собственной секции)
+PARTITIONED_TABLE = "operations"
+DEFAULT_PARTITION = "operations_default"
+# Схема, в которую переносятся отсоединенные секции
+ARCHIVE_SCHEMA = "archive"
+# Имя помесячной секции: operations_y2024m11
+PARTITION_NAME = re.compile(rf"^{PARTITIONED_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+# Первый день месяца, отстоящего от month на months месяцев
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+# Имя секции месяца
+def partition_name(month: date) -> str:
+    return f"{PARTITIONED_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+# Граница секции: начало дня в UTC (без указания часового пояса граница зависела бы от настройки TimeZone сеанса)
+def _bound(day: date) -> str:
+    return f"'{day.isoformat()} 00:00:00+00'"
+
+# Проверка, что таблица operations секционирована (до применения миграции таблица остается обычной)
+async def is_partitioned(connection: AsyncConnection) -> bool:
+    partitioned = await connection.scalar(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"), {"table": PARTITIONED_TABLE}
+    )
+    return bool(partitioned)
+
+# Помесячные секции таблицы: месяц -> имя секции
+async def list_partitions(connection: AsyncConnection) -> Dict[date, str]:
+    result = await connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table)"
+        ),
+        {"table": PARTITIONED_TABLE}
+    )
+    partitions = {}
+    for (name,) in result:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+# Блокировка, которая не дает нескольким процессам (например, рабочим процессам при запуске) изменять секции одновременно
+async def _lock(connection: AsyncConnection) -> None:
+    await connection.execute(text("SELECT pg_advisory_xact_lock(hashtext('operations_partitions'))"))
+
+# Создание секции месяца. Секция создается отдельной таблицей, в нее переносятся операции этого месяца из секции по умолчанию
+# (иначе присоединение секции было бы отклонено), после чего таблица присоединяется к operations; индексы и внешние ключи
+# секция получает от родительской таблицы при присоединении.
+async def create_partition(connection: AsyncConnection, month: date) -> str:
+    start, end = month, add_months(month, 1)
+    name = partition_name(month)
+    await connection.execute(text(f'CREATE TABLE "{name}" (LIKE {PARTITIONED_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    await connection.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date >= {_bound(start)} AND date < {_bound(end)} RETURNING *) "
+        f'INSERT INTO "{name}" SELECT * FROM moved'
+    ))
+    await connection.execute(text(
+        f'ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION "{name}" FOR VALUES FROM ({_bound(start)}) TO ({_bound(end)})'
+    ))
+    return name
+
+# Создание недостающих секций с текущего месяца (UTC) на months_ahead месяцев вперед. Возвращает имена созданных секций.
+async def ensure_partitions(connection: AsyncConnection, months_ahead: int = 3, today: Optional[date] = None) -> List[str]:
+    if not await is_partitioned(connection):
+        return []
+    await _lock(connection)
+    current = (today or datetime.now(timezone.utc).date()).replace(day=1)
+    existing = await list_partitions(connection)
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            created.append(await create_partition(connection, month))
+    return created
+
+# Отсоединение секций месяцев, закончившихся до даты before. Секции переносятся в схему archive (их можно выгрузить pg_dump
+# и удалить) или удаляются при drop=True. Внешние ключи отсоединенной секции удаляются, чтобы архив не зависел от пользователей
+# и категорий. Итоги по месяцам и дням сохраняются, а месяц записывается в archived_months, после чего его итоги заморожены
+# (пересчет итогов по таблице operations их не изменяет). Возвращает имена отсоединенных секций.
+async def archive_partitions(connection: AsyncConnection, before: date, drop: bool = False) -> List[str]:
+    if not await is_partitioned(connection):
+        return []
+    await _lock(connection)
+    archived = []
+    for month, name in sorted((await list_partitions(connection)).items()):
+        if add_months(month, 1) > before:
+            continue
+        await connection.execute(text(f'ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION "{name}"'))
+        if drop:
+            await connection.execute(text(f'DROP TABLE "{name}"'))
+        else:
+            constraints = await connection.execute(
+                text("SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:table) AND contype = 'f'"),
+                {"table": name}
+            )
+            for (constraint,) in constraints.all():
+                await connection.execute(text(f'ALTER TABLE "{name}" DROP CONSTRAINT "{constraint}"'))
+            await connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+            await connection.execute(text(f'ALTER TABLE "{name}" SET SCHEMA {ARCHIVE_SCHEMA}'))
+        await connection.execute(
+            text("INSERT INTO archived_months (month) VALUES (:month) ON CONFLICT DO NOTHING"), {"month": month}
+        )
+        archived.append(name)
+    return archived
+
+# Выполнение команды в отдельной транзакции
+async def run(args: argparse.Namespace) -> List[str]:
+    from .connection import engine
+
+    async with engine.begin() as connection:
+        if args.command == "create":
+            names = await ensure_partitions(connection, args.months_ahead)
+        else:
+            names = await archive_partitions(connection, args.before, args.drop)
+    await engine.dispose()
+    return names
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Управление помесячными секциями таблицы operations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="создать секции с текущего месяца на несколько месяцев вперед")
+    create.add_argument("--months-ahead", type=int, default=3)
+    archive = commands.add_parser("archive", help="отсоединить секции месяцев, закончившихся до даты")
+    archive.add_argument("--before", type=date.fromisoformat, required=True, help="дата в формате ГГГГ-ММ-ДД")
+    archive.add_argument("--drop", action="store_true", help="удалить секции вместо переноса в схему archive")
+    args = parser.parse_args()
+
+    for name in asyncio.run(run(args)):
+        print(name)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Файл replicas содержит маршрутизацию запросов чтения между основной базой данных и репликами только для чтения: выбор исправной реплики,
+чтение своих записей на основной базе в течение короткого времени после изменения и периодическую проверку состояния реплик.
+"""
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+from ..config import settings
+from .connection import make_engine, session_maker
+
+# Отставание реплики в секундах: 0, если реплика применила все полученные изменения (или база не является репликой)
+LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+# Ошибки подключения и выполнения запросов, после которых реплика считается неисправной
+REPLICA_ERRORS = (OSError, asyncio.TimeoutError, SQLAlchemyError)
+# Количество пользователей с недавними изменениями, после которого из словаря удаляются истекшие записи
+STICKY_CLEANUP_SIZE = 4096
+
+# Реплика и ее состояние по результатам последней проверки
+class Replica:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.failures = 0
+        self.checked_at: Optional[float] = None
+
+# Класс маршрутизации запросов чтения. Запросы чтения пользователя направляются на исправные реплики по очереди, кроме времени
+# sticky_seconds после изменения его данных: тогда, как и при отсутствии исправных реплик, используется основная база.
+# Реплика исключается при ошибке подключения и при отставании больше max_lag и возвращается после успешной проверки.
+class ReplicaRouter:
+    def __init__(self, engines: List[AsyncEngine], sticky_seconds: float, max_lag: float, check_timeout: float):
+        self.replicas = [Replica(engine) for engine in engines]
+        self.sticky_seconds = sticky_seconds
+        self.max_lag = max_lag
+        self.check_timeout = check_timeout
+        self._sticky_until: Dict[int, float] = {}
+        self._order = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    # Учет изменения данных пользователя: следующие sticky_seconds секунд его запросы чтения выполняются на основной базе
+    def mark_write(self, user_id: int) -> None:
+        now = time.monotonic()
+        if len(self._sticky_until) >= STICKY_CLEANUP_SIZE:
+            self._sticky_until = {key: until for key, until in self._sticky_until.items() if until > now}
+        self._sticky_until[user_id] = now + self.sticky_seconds
+
+    # Проверка, что пользователь недавно изменял данные
+    def is_sticky(self, user_id: int) -> bool:
+        until = self._sticky_until.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    # Выбор реплики для запросов чтения пользователя (None - основная база)
+    def choose(self, user_id: int) -> Optional[Replica]:
+        if self.is_sticky(user_id):
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._order) % len(healthy)]
+
+    # Исключение реплики до следующей успешной проверки
+    def mark_down(self, replica: Replica) -> None:
+        replica.healthy = False
+        replica.failures += 1
+
+    # Сессия для запросов чтения пользователя. Соединение с выбранной репликой получается сразу: если реплика недоступна,
+    # она исключается, а запросы выполняются в сессии основной базы primary (сессии запроса, которую маршрут получил бы без реплик)
+    @asynccontextmanager
+    async def read_session(self, user_id: int, primary: AsyncSession) -> AsyncIterator[AsyncSession]:
+        replica = self.choose(user_id)
+        if replica is not None:
+            session = session_maker(bind=replica.engine)
+            try:
+                await asyncio.wait_for(session.connection(), self.check_timeout)
+            except REPLICA_ERRORS:
+                await session.close()
+                self.mark_down(replica)
+            else:
+                async with session:
+                    yield session
+                return
+        yield primary
+
+    # Проверка реплики: доступность и отставание от основной базы
+    async def check_replica(self, replica: Replica) -> None:
+        async def measure_lag() -> float:
+            async with replica.engine.connect() as connection:
+                return float(await connection.scalar(LAG_QUERY) or 0)
+
+        replica.checked_at = time.monotonic()
+        try:
+            replica.lag = await asyncio.wait_for(measure_lag(), self.check_timeout)
+        except REPLICA_ERRORS:
+            self.mark_down(replica)
+            return
+        replica.healthy = replica.lag <= self.max_lag
+
+    # Проверка всех реплик
+    async def check(self) -> None:
+        await asyncio.gather(*(self.check_replica(replica) for replica in self.replicas))
+
+    # Периодическая проверка реплик
+    async def _check_periodically(self, interval: float) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(interval)
+
+    # Запуск периодической проверки реплик (при запуске приложения)
+    def start(self, interval: float) -> None:
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._check_periodically(interval))
+
+    # Остановка проверки и закрытие соединений с репликами (при остановке приложения)
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    # Состояние реплик для служебного маршрута
+    def stats(self) -> List[dict]:
+        return [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "healthy": replica.healthy,
+                "lag": replica.lag,
+                "failures": replica.failures,
+            }
+            for replica in self.replicas
+        ]
+
+# Экземпляр маршрутизации с репликами из конфигурации приложения
+replica_router = ReplicaRouter(
+    [make_engine(url) for url in settings.db_replica_urls],
+    sticky_seconds=settings.db_replica_sticky_seconds,
+    max_lag=settings.db_replica_max_lag,
+    check_timeout=settings.db_replica_check_timeout,
+)
+
+# Учет изменения данных пользователя при фиксации транзакции сессии, в которой определен текущий пользователь (см. get_current_user)
+@event.listens_for(Session, "after_commit")
+def remember_write(session: Session) -> None:
+    user_id = session.info.get("user_id")
+    if user_id is not None:
+        replica_router.mark_write(user_id)
@@ -0,0 +1,152 @@
+"""
+Файл rollups содержит функции для поддержания помесячных и дневных итогов операций (таблицы monthly_totals и daily_totals)
+и их полного пересчета. Запуск модуля (python -m app.database.rollups) пересчитывает итоги всех пользователей (кроме итогов архивных месяцев).
+"""
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from importlib import import_module
+from typing import Callable, Optional
+from sqlalchemy import CTE, ColumnElement, Date, Select, select, delete, func, literal_column, union_all
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.archived_months import ArchivedMonth
+from ..models.daily_totals import DailyTotal
+from ..models.monthly_totals import MonthlyTotal
+from ..models.operations import Operation
+from .connection import session_maker
+
+# Первый день месяца (UTC), к которому относится дата операции
+def month_of(value: datetime) -> date:
+    value = value.astimezone(timezone.utc) if value.tzinfo else value
+    return date(value.year, value.month, 1)
+
+# День (UTC), к которому относится дата операции
+def day_of(value: datetime) -> date:
+    value = value.astimezone(timezone.utc) if value.tzinfo else value
+    return value.date()
+
+# Первый день месяца (UTC), к которому относится дата операции, в виде SQL выражения (соответствует month_of)
+def month_expression(value: ColumnElement) -> ColumnElement:
+    return func.date_trunc(literal_column("'month'"), func.timezone("UTC", value)).cast(MonthlyTotal.month.type)
+
+# День (UTC), к которому относится дата операции, в виде SQL выражения (соответствует day_of)
+def day_expression(value: ColumnElement) -> ColumnElement:
+    return func.timezone("UTC", value).cast(Date)
+
+# Таблицы итогов: модель, столбец периода и SQL выражение периода, к которому относится дата операции
+ROLLUPS: tuple[tuple[type, str, Callable[[ColumnElement], ColumnElement]], ...] = (
+    (MonthlyTotal, "month", month_expression),
+    (DailyTotal, "day", day_expression),
+)
+
+# Добавление изменений к существующим итогам при совпадении ключа (INSERT ... ON CONFLICT DO UPDATE)
+def upsert_totals(model: type, period: str, statement: Insert) -> Insert:
+    return statement.on_conflict_do_update(
+        index_elements=[model.category_id, getattr(model, period)],
+        set_={
+            "total": model.total + statement.excluded.total,
+            "operations_count": model.operations_count + statement.excluded.operations_count,
+        }
+    )
+
+# Изменение итогов в виде CTE для изменений операций, выполняемых одним запросом. Каждый из запросов changes выбирает столбцы
+# author, category_id, date, amount и sign (1 - операция добавлена, -1 - удалена); изменения группируются по ключу итогов
+# каждой таблицы, так как один INSERT ... ON CONFLICT не может изменить одну строку дважды.
+def totals_ctes(*changes: Select) -> list[CTE]:
+    source = union_all(*changes).cte("operation_changes")
+    ctes = [source]
+    for model, period, expression in ROLLUPS:
+        bucket = expression(source.c.date)
+        grouped = (
+            select(
+                source.c.category_id,
+                bucket,
+                source.c.author,
+                func.sum(source.c.sign * func.abs(source.c.amount)),
+                func.sum(source.c.sign),
+            )
+            .group_by(source.c.category_id, bucket, source.c.author)
+        )
+        statement = insert(model).from_select(["category_id", period, "author", "total", "operations_count"], grouped)
+        ctes.append(upsert_totals(model, period, statement).cte(f"{model.__tablename__}_change"))
+    return ctes
+
+# Класс для накопления изменений итогов по ключу (пользователь, категория, день) с последующей записью в таблицы итогов
+class TotalsDelta:
+    def __init__(self):
+        self._changes: defaultdict[tuple[int, int, date], list] = defaultdict(lambda: [Decimal(0), 0])
+    
+    # Учет добавления (sign=1) или удаления (sign=-1) операции
+    def add(self, author: int, category_id: int, operation_date: datetime, amount: Decimal, sign: int = 1) -> None:
+        change = self._changes[(author, category_id, day_of(operation_date))]
+        change[0] += sign * abs(amount)
+        change[1] += sign
+    
+    # Учет операции в состоянии до изменения (вычитание) и после изменения (добавление)
+    def move(self, old: Operation, author: int, category_id: int, operation_date: datetime, amount: Decimal) -> None:
+        self.add(old.author, old.category_id, old.date, old.amount, sign=-1)
+        self.add(author, category_id, operation_date, amount)
+    
+    # Запись накопленных изменений в таблицы итогов (INSERT ... ON CONFLICT DO UPDATE); помесячные изменения складываются из дневных
+    async def apply(self, session: AsyncSession) -> None:
+        monthly: defaultdict[tuple[int, int, date], list] = defaultdict(lambda: [Decimal(0), 0])
+        for (author, category_id, day), (total, count) in self._changes.items():
+            change = monthly[(author, category_id, day.replace(day=1))]
+            change[0] += total
+            change[1] += count
+        
+        for (model, period, _), changes in zip(ROLLUPS, (monthly, self._changes)):
+            values = [
+                {"author": author, "category_id": category_id, period: key, "total": total, "operations_count": count}
+                for (author, category_id, key), (total, count) in changes.items()
+                if total != 0 or count != 0
+            ]
+            if values:
+                await session.execute(upsert_totals(model, period, insert(model).values(values)))
+        self._changes.clear()
+
+# Полный пересчет итогов по операциям (для одного пользователя или для всех, если author=None). Итоги архивных месяцев
+# (archived_months) не пересчитываются: операций этих месяцев в таблице operations уже нет, и итоги остаются прежними
+async def rebuild_totals(session: AsyncSession, author: Optional[int] = None) -> None:
+    archived = select(ArchivedMonth.month)
+    for model, period, expression in ROLLUPS:
+        bucket = expression(Operation.date)
+        source = (
+            select(
+                Operation.category_id,
+                bucket,
+                Operation.author,
+                func.sum(func.abs(Operation.amount)),
+                func.count(),
+            )
+            .where(month_expression(Operation.date).not_in(archived))
+            .group_by(Operation.category_id, bucket, Operation.author)
+        )
+        cleanup = delete(model).where(
+            func.date_trunc(literal_column("'month'"), getattr(model, period)).cast(Date).not_in(archived)
+        )
+        if author is not None:
+            source = source.where(Operation.author == author)
+            cleanup = cleanup.where(model.author == author)
+        
+        await session.execute(cleanup)
+        await session.execute(
+            insert(model).from_select(
+                ["category_id", period, "author", "total", "operations_count"], source
+            )
+        )
+
+# Пересчет итогов всех пользователей в отдельной транзакции
+async def reconcile() -> None:
+    async with session_maker() as session:
+        await rebuild_totals(session)
+        await session.commit()
+
+# Точка входа для пересчета итогов из командной строки
+if __name__ == '__main__':
+    # Модели, на которые ссылаются связи модели Operation (без приложения они не импортируются)
+    for module in ("users", "categories"):
+        import_module(f"..models.{module}", __package__)
+    asyncio.run(reconcile())
@@ -0,0 +1,32 @@
+"""
+Файл types содержит типы столбцов SQLAlchemy, общие для моделей.
+"""
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+# Количество знаков после запятой в денежных суммах (суммы хранятся в копейках, центах и т.п.)
+MINOR_UNIT_DIGITS = 2
+
+# Денежная сумма, которая хранится в БД целым числом минимальных единиц валюты (BIGINT), а в Python представлена
+# значением Decimal с двумя знаками после запятой. Сложение и агрегаты (sum, abs) выполняются в БД в целочисленной
+# арифметике, поэтому итоги точны; sum возвращает NUMERIC, который преобразуется так же.
+class Money(TypeDecorator):
+    impl = BigInteger
+    cache_ok = True
+
+    # Преобразование суммы в минимальные единицы; сумма точнее минимальной единицы не округляется, а отклоняется
+    def process_bind_param(self, value, dialect) -> Optional[int]:
+        if value is None:
+            return None
+        units = Decimal(str(value) if isinstance(value, float) else value).scaleb(MINOR_UNIT_DIGITS)
+        if units != units.to_integral_value():
+            raise ValueError(f"Сумма {value} содержит больше {MINOR_UNIT_DIGITS} знаков после запятой")
+        return int(units)
+
+    # Преобразование минимальных единиц в сумму
+    def process_result_value(self, value, dialect) -> Optional[Decimal]:
+        if value is None:
+            return None
+        return Decimal(value).scaleb(-MINOR_UNIT_DIGITS)
\ No newline at end of file
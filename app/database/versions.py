@@ -0,0 +1,64 @@
+"""
+Файл versions содержит функции для работы с версией данных пользователя, которая увеличивается при каждом изменении его данных.
+"""
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy import CTE, Executable, Result, select, update, func
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.users import User
+
+# Версия данных пользователя и время ее последнего изменения
+class DataVersion(NamedTuple):
+    version: int
+    updated_at: datetime
+
+# Увеличение версии данных пользователя (выполняется в транзакции изменяющего запроса, до ее фиксации).
+# Функция возвращает новую версию, которая записывается в измененные строки как номер изменения (seq) для синхронизации.
+# Строка пользователя остается заблокированной до конца транзакции, поэтому номера изменений одного пользователя не пересекаются.
+async def bump_data_version(session: AsyncSession, user_id: int) -> int:
+    result = await session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1, data_updated_at=func.now())
+        .returning(User.data_version)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one()
+
+# Увеличение версии данных пользователя в виде CTE (UPDATE ... RETURNING) для изменений, выполняемых одним запросом.
+# Основной запрос соединяется с CTE по автору (столбец author) и берет из него номер изменения (столбец seq): изменяемые строки
+# обрабатываются после соединения, поэтому строка пользователя блокируется раньше них, как и при вызове bump_data_version.
+def data_version_cte(user_id: int) -> CTE:
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1, data_updated_at=func.now())
+        .returning(User.id.label("author"), User.data_version.label("seq"))
+        .cte("data_version")
+    )
+
+# Код ошибки PostgreSQL serialization_failure
+SERIALIZATION_FAILURE = "40001"
+
+# Выполнение изменяющего запроса с CTE data_version_cte. Если параллельная транзакция того же пользователя перенесла изменяемую
+# операцию в другую помесячную секцию (изменила месяц ее даты), запрос не может перейти к новой версии строки и отклоняется
+# с ошибкой serialization_failure. В этом случае транзакция откатывается, строка пользователя блокируется отдельным запросом
+# и запрос повторяется: снимок данных повтора берется после фиксации всех изменений пользователя, поэтому ошибка не повторяется.
+async def execute_with_data_version(session: AsyncSession, statement: Executable, user_id: int) -> Result:
+    try:
+        return await session.execute(statement)
+    except DBAPIError as error:
+        if getattr(error.orig, "sqlstate", None) != SERIALIZATION_FAILURE:
+            raise
+    await session.rollback()
+    await session.execute(select(User.id).where(User.id == user_id).with_for_update())
+    return await session.execute(statement)
+
+# Получение текущей версии данных пользователя (один запрос по первичному ключу)
+async def get_data_version(session: AsyncSession, user_id: int) -> Optional[DataVersion]:
+    result = await session.execute(
+        select(User.data_version, User.data_updated_at).where(User.id == user_id)
+    )
+    row = result.one_or_none()
+    return DataVersion(*row) if row else None
@@ -0,0 +1,107 @@
+"""
+Файл bridge содержит мост между концентраторами событий процессов приложения: события процесса отправляются командой NOTIFY
+основной базы данных, а события других процессов принимаются через LISTEN и доставляются подключениям текущего процесса.
+"""
+import asyncio
+import json
+import uuid
+from typing import Optional, Tuple
+import asyncpg
+from sqlalchemy.engine import make_url
+from ..config import settings
+from .hub import EventHub, event_hub
+
+# Пауза перед повторным подключением к базе данных в секундах
+RECONNECT_DELAY = 1.0
+# Максимальное количество событий, ожидающих отправки (при недоступности базы данных лишние события отбрасываются)
+OUTGOING_QUEUE_SIZE = 10000
+
+# Класс моста LISTEN/NOTIFY. Мост использует одно отдельное соединение (вне пула приложения): на нем выполняется LISTEN,
+# и через него же отправляются события. Процесс доставляет свои события подключениям сразу, поэтому уведомления с собственным
+# идентификатором процесса (origin) пропускаются.
+class NotifyBridge:
+    def __init__(self, hub: EventHub, dsn: str, channel: str):
+        self.hub = hub
+        self.dsn = dsn
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self._outgoing: asyncio.Queue[Tuple[int, dict]] = asyncio.Queue(OUTGOING_QUEUE_SIZE)
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # Постановка события в очередь отправки другим процессам
+    def send(self, user_id: int, event: dict) -> None:
+        try:
+            self._outgoing.put_nowait((user_id, event))
+        except asyncio.QueueFull:
+            pass
+
+    # Обработка уведомления: доставка события другого процесса подключениям текущего процесса
+    def _receive(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        message = json.loads(payload)
+        if message["origin"] != self.origin:
+            self.hub.deliver(message["user"], message["event"])
+
+    # Подключение, подписка на канал и отправка событий. Соединение проверяется в паузах между событиями; после восстановления
+    # соединения подключения процесса получают событие reset, так как события других процессов за это время были потеряны.
+    async def _run(self) -> None:
+        pending: Optional[Tuple[int, dict]] = None
+        reconnected = False
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                await connection.add_listener(self.channel, self._receive)
+                self._connected.set()
+                if reconnected:
+                    self.hub.reset_all()
+                while True:
+                    if pending is None:
+                        try:
+                            pending = await asyncio.wait_for(self._outgoing.get(), settings.events_keepalive_seconds)
+                        except asyncio.TimeoutError:
+                            await connection.execute("SELECT 1")
+                            continue
+                    user_id, event = pending
+                    payload = json.dumps({"origin": self.origin, "user": user_id, "event": event}, separators=(",", ":"))
+                    await connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+                    pending = None
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                self._connected.clear()
+                reconnected = True
+                await asyncio.sleep(RECONNECT_DELAY)
+            finally:
+                if connection is not None:
+                    connection.terminate()
+
+    # Запуск моста (при запуске приложения): события концентратора передаются другим процессам. Функция ожидает первого
+    # подключения не дольше timeout секунд, чтобы недоступность базы данных не задерживала запуск приложения.
+    async def start(self, timeout: float = 5.0) -> None:
+        if self._task is not None:
+            return
+        self.hub.forward = self.send
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    # Остановка моста (при остановке приложения)
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self.hub.forward = None
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._connected.clear()
+
+# Адрес подключения asyncpg к основной базе данных (URL SQLAlchemy без указания драйвера)
+def bridge_dsn(database_url: str) -> str:
+    return make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+# Экземпляр моста для концентратора приложения
+event_bridge = NotifyBridge(event_hub, bridge_dsn(settings.database_url), settings.events_channel)
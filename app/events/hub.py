@@ -0,0 +1,63 @@
+"""
+Файл hub содержит концентратор событий изменения данных: рассылку событий пользователя всем его подключениям к потоку /events
+в текущем процессе и передачу событий в другие процессы (см. bridge).
+"""
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional, Set
+from ..config import settings
+
+# Событие, после которого клиент должен заново синхронизировать данные (часть событий могла быть потеряна)
+RESET_EVENT = {"type": "reset"}
+
+# Класс концентратора событий. Каждое подключение получает собственную очередь событий ограниченного размера: медленный клиент
+# не задерживает рассылку, а при переполнении его очередь заменяется одним событием reset.
+class EventHub:
+    def __init__(self, queue_size: int = settings.events_queue_size):
+        self.queue_size = queue_size
+        self._subscribers: defaultdict[int, Set[asyncio.Queue]] = defaultdict(set)
+        # Функция передачи событий в другие процессы (устанавливается мостом LISTEN/NOTIFY)
+        self.forward: Optional[Callable[[int, dict], None]] = None
+
+    # Подписка на события пользователя на время подключения
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers[user_id].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[user_id].discard(queue)
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+
+    # Доставка события подключениям пользователя в текущем процессе
+    def deliver(self, user_id: int, event: dict) -> None:
+        for queue in self._subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESET_EVENT)
+
+    # Отправка события reset всем подключениям процесса (например, после восстановления связи с другими процессами)
+    def reset_all(self) -> None:
+        for user_id in list(self._subscribers):
+            self.deliver(user_id, RESET_EVENT)
+
+    # Публикация события изменения данных пользователя (вызывается после фиксации изменения): тип объекта entity
+    # (operation, category, user), действие action (created, updated, deleted) и ID измененных объектов
+    def publish(self, user_id: int, entity: str, action: str, *ids: int) -> None:
+        event = {"type": "change", "entity": entity, "action": action, "ids": list(ids)}
+        self.deliver(user_id, event)
+        if self.forward is not None:
+            self.forward(user_id, event)
+
+    # Количество подключений в текущем процессе
+    def connections(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+# Экземпляр концентратора, используемый во всем приложении
+event_hub = EventHub()
@@ -6,7 +6,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from .routes.users import user_router
 from .routes.categories import category_router
 from .routes.operations import operation_router
+from .routes.service import service_router
+from .routes.sync import sync_router
+from .routes.metrics import metrics_router
+from .routes.events import events_router
+from .middleware.compression import CompressionMiddleware
+from .middleware.timing import TimingMiddleware, metrics_registry
 from .database.connection import init_db
+from .database.replicas import replica_router
+from .events.bridge import event_bridge
+from .config import settings
 import uvicorn
 
 # Создание основного экземпляра FastAPI приложения
@@ -21,16 +30,46 @@ app.add_middleware(
     allow_headers=["*"],  # Разрешение всех заголовков
 )
 
+# Сжатие ответов (gzip, brotli, zstd) с учетом заголовка Accept-Encoding клиента
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        zstd_level=settings.compression_zstd_level,
+    )
+
+# Замер времени обработки запросов и учет SQL запросов по маршрутам (добавляется последним, чтобы учитывать и время сжатия)
+app.add_middleware(TimingMiddleware, registry=metrics_registry, server_timing=settings.server_timing_enabled)
+
 # Подключение роутеров для различных модулей приложения
 app.include_router(user_router)     # Роутер для работы с пользователями
 app.include_router(category_router) # Роутер для работы с категориями
 app.include_router(operation_router) # Роутер для работы с операциями
+app.include_router(service_router)   # Роутер служебных маршрутов
+app.include_router(sync_router)      # Роутер синхронизации изменений
+app.include_router(metrics_router)   # Роутер показателей для Prometheus
+app.include_router(events_router)    # Роутер потока событий изменения данных
 
 # Обработчик события запуска приложения (выполняется при старте сервера)
 @app.on_event("startup")
 async def on_startup():
     # Инициализация базы данных (создание таблиц, если они не существуют)
     await init_db()
+    # Запуск периодической проверки реплик базы данных (если реплики заданы)
+    replica_router.start(settings.db_replica_check_interval)
+    # Запуск передачи событий изменения данных между процессами приложения
+    if settings.events_bridge_enabled:
+        await event_bridge.start()
+
+# Обработчик события остановки приложения
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Остановка проверки реплик и закрытие соединений с ними
+    await replica_router.stop()
+    # Остановка передачи событий между процессами
+    await event_bridge.stop()
 
 # Точка входа для запуска приложения напрямую (без использования командной строки)
 if __name__ == '__main__':
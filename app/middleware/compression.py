@@ -0,0 +1,190 @@
+"""
+Файл compression содержит промежуточный слой (middleware) сжатия ответов: gzip, а также brotli и zstd, если они установлены и поддерживаются клиентом.
+Потоковые ответы сжимаются по частям без накопления всего ответа в памяти.
+"""
+import zlib
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# brotli и zstandard - необязательные зависимости: без них используется только gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Типы содержимого, которые не сжимаются: уже сжатые данные и события, которые клиент должен получать сразу
+EXCLUDED_CONTENT_TYPES = (
+    "text/event-stream",
+    "image/",
+    "audio/",
+    "video/",
+    "application/gzip",
+    "application/zip",
+    "application/zstd",
+    "application/octet-stream",
+)
+
+# Сжатие gzip (zlib с заголовком gzip)
+class GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 - формат gzip
+
+    # Сжатие очередной части ответа: при finish=True поток завершается, иначе сжатые данные сбрасываются клиенту без завершения потока
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+# Сжатие brotli
+class BrotliCompressor:
+    encoding = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    # Сжатие очередной части ответа (аналогично GzipCompressor.compress)
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        return self._compressor.process(data) + (self._compressor.finish() if finish else self._compressor.flush())
+
+# Сжатие zstd
+class ZstdCompressor:
+    encoding = "zstd"
+
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    # Сжатие очередной части ответа (аналогично GzipCompressor.compress)
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        mode = zstandard.COMPRESSOBJ_FLUSH_FINISH if finish else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._compressor.compress(data) + self._compressor.flush(mode)
+
+# Выбор способа сжатия по заголовку Accept-Encoding: способ с наибольшим весом q, при равных весах - первый в порядке предпочтения сервера
+def select_encoding(accept_encoding: str, encodings: tuple[str, ...]) -> Optional[str]:
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name.strip().lower()] = q
+    
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+# Промежуточный слой сжатия ответов. Ответ сжимается, если клиент поддерживает один из доступных способов сжатия, тело ответа
+# не меньше minimum_size (или ответ потоковый), ответ еще не сжат и тип содержимого не входит в EXCLUDED_CONTENT_TYPES
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        # Фабрики сжатия в порядке предпочтения сервера (доступные в текущем окружении)
+        self.factories = {}
+        if zstandard is not None:
+            self.factories["zstd"] = lambda: ZstdCompressor(zstd_level)
+        if brotli is not None:
+            self.factories["br"] = lambda: BrotliCompressor(brotli_quality)
+        self.factories["gzip"] = lambda: GzipCompressor(gzip_level)
+        self.encodings = tuple(self.factories)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        responder = CompressionResponder(self.app, self.factories[encoding], self.minimum_size)
+        await responder(scope, receive, send)
+
+# Обработчик одного ответа: откладывает отправку заголовков до получения первой части тела, по которой решается, сжимать ли ответ
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, factory, minimum_size: int):
+        self.app = app
+        self.factory = factory
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.started = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    # Проверка, можно ли сжимать ответ по его заголовкам
+    def _is_compressible(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return not content_type.startswith(EXCLUDED_CONTENT_TYPES)
+
+    # Изменение заголовков сжатого ответа: способ сжатия, Vary, удаление Content-Length (длина станет другой)
+    # и ослабление ETag (сжатое представление не совпадает побайтно с исходным)
+    def _compressed_headers(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.compressor.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if "content-length" in headers:
+            del headers["content-length"]
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    async def send_with_compression(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            return
+        
+        if message_type != "http.response.body":
+            # Прочие сообщения (например, http.response.pathsend для файлов) передаются без изменений
+            if not self.started:
+                self.started = True
+                await self.send(self.start_message)
+            await self.send(message)
+            return
+        
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if self._is_compressible(headers) and (more_body or len(body) >= self.minimum_size):
+                self.compressor = self.factory()
+                self._compressed_headers(headers)
+                body = self.compressor.compress(body, finish=not more_body)
+                if not more_body:
+                    headers["Content-Length"] = str(len(body))
+                message = {**message, "body": body}
+            await self.send(self.start_message)
+            await self.send(message)
+            return
+        
+        if self.compressor is not None and (body or not more_body):
+            message = {**message, "body": self.compressor.compress(body, finish=not more_body)}
+        await self.send(message)
@@ -0,0 +1,195 @@
+"""
+Файл timing содержит промежуточный слой (middleware) замера времени обработки запросов и учета обращений к базе данных по маршрутам,
+а также вывод накопленных показателей в текстовом формате Prometheus и в заголовке Server-Timing.
+"""
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Границы интервалов гистограммы времени обработки запроса в секундах
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+# Границы интервалов гистограммы количества SQL запросов на один HTTP запрос (рост значений - признак проблемы N+1)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+# Метка маршрута для запросов, не соответствующих ни одному маршруту (чтобы произвольные адреса не порождали новые серии)
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Показатели обращений к базе данных в рамках одного запроса
+class RequestStats:
+    __slots__ = ("statements", "db_time", "rows", "pool_wait")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.pool_wait = 0.0
+
+# Показатели текущего запроса (None вне обработки запроса, например в фоновых задачах и миграциях)
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+# Учет времени ожидания соединения из пула в показателях текущего запроса
+def record_pool_wait(elapsed: float) -> None:
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.pool_wait += elapsed
+
+# Подключение обработчиков событий движка SQLAlchemy, которые учитывают количество SQL запросов, их время и количество строк
+def instrument_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_time += elapsed
+            # Для потоковой выборки (серверный курсор) количество строк заранее неизвестно и не учитывается
+            stats.rows += max(cursor.rowcount, 0)
+
+    # При ошибке выполнения after_cursor_execute не вызывается, поэтому отметка времени снимается здесь
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+# Гистограмма в формате Prometheus: количество наблюдений по интервалам (накопительно при выводе), сумма и общее количество
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    # Строки вывода гистограммы для набора меток
+    def render(self, name: str, labels: str) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+# Накопленные показатели одного маршрута
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.responses: Dict[int, int] = {}
+        self.db_time = 0.0
+        self.rows = 0
+        self.pool_wait = 0.0
+
+# Реестр показателей по маршрутам (свой у каждого процесса, как и кэш пользователей)
+class MetricsRegistry:
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+
+    # Учет завершенного запроса
+    def observe(self, method: str, route: str, status_code: int, duration: float, stats: RequestStats) -> None:
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[(method, route)] = RouteMetrics()
+        metrics.latency.observe(duration)
+        metrics.statements.observe(stats.statements)
+        metrics.responses[status_code] = metrics.responses.get(status_code, 0) + 1
+        metrics.db_time += stats.db_time
+        metrics.rows += stats.rows
+        metrics.pool_wait += stats.pool_wait
+
+    def clear(self) -> None:
+        self.routes.clear()
+
+    # Вывод показателей в текстовом формате Prometheus
+    def render(self) -> str:
+        sections = {
+            "http_request_duration_seconds": ("histogram", "Время обработки запроса"),
+            "http_requests_total": ("counter", "Количество запросов по коду ответа"),
+            "http_request_db_statements": ("histogram", "Количество SQL запросов на один запрос"),
+            "http_request_db_duration_seconds_total": ("counter", "Суммарное время выполнения SQL запросов"),
+            "http_request_db_rows_total": ("counter", "Количество строк, возвращенных или измененных SQL запросами"),
+            "http_request_pool_wait_seconds_total": ("counter", "Суммарное время ожидания соединения из пула"),
+        }
+        lines = {name: [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"] for name, (kind, help_text) in sections.items()}
+        for (method, route), metrics in sorted(self.routes.items()):
+            labels = f'method="{escape_label(method)}",route="{escape_label(route)}"'
+            lines["http_request_duration_seconds"] += metrics.latency.render("http_request_duration_seconds", labels)
+            for status_code, count in sorted(metrics.responses.items()):
+                lines["http_requests_total"].append(f'http_requests_total{{{labels},status="{status_code}"}} {count}')
+            lines["http_request_db_statements"] += metrics.statements.render("http_request_db_statements", labels)
+            lines["http_request_db_duration_seconds_total"].append(f"http_request_db_duration_seconds_total{{{labels}}} {metrics.db_time}")
+            lines["http_request_db_rows_total"].append(f"http_request_db_rows_total{{{labels}}} {metrics.rows}")
+            lines["http_request_pool_wait_seconds_total"].append(f"http_request_pool_wait_seconds_total{{{labels}}} {metrics.pool_wait}")
+        return "\n".join(line for section in lines.values() for line in section) + "\n"
+
+# Экранирование значения метки Prometheus
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# Значение заголовка Server-Timing: общее время до отправки заголовков, время SQL запросов (с их количеством) и ожидание пула
+def server_timing(duration: float, stats: RequestStats) -> str:
+    return (
+        f"app;dur={duration * 1000:.3f}, "
+        f'db;dur={stats.db_time * 1000:.3f};desc="{stats.statements} statements", '
+        f"pool;dur={stats.pool_wait * 1000:.3f}"
+    )
+
+# Промежуточный слой, который замеряет время обработки запроса, собирает показатели обращений к базе данных
+# и добавляет к ответу заголовок Server-Timing
+class TimingMiddleware:
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry, server_timing: bool = True):
+        self.app = app
+        self.registry = registry
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing(time.perf_counter() - started, stats))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_stats.reset(token)
+            # Метка маршрута - шаблон пути (например /operation/{id}), который маршрутизатор записывает в scope
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            self.registry.observe(scope["method"], route_path, status_code, time.perf_counter() - started, stats)
+
+# Общий для приложения реестр показателей
+metrics_registry = MetricsRegistry()
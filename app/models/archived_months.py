@@ -0,0 +1,23 @@
+"""
+Файл archived_months представляет модель для хранения месяцев, секции операций которых отсоединены от таблицы operations
+"""
+from ..database.base import Base
+from sqlalchemy import Date, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import date, datetime
+
+# Модель ArchivedMonth представляет таблицу "archived_months": месяц, операции которого перенесены в архив или удалены.
+# Итоги таких месяцев (monthly_totals, daily_totals) заморожены: при пересчете итогов по таблице operations они не изменяются,
+# так как операций месяца в ней уже нет.
+class ArchivedMonth(Base):
+    # Название таблицы в базе данных
+    __tablename__ = "archived_months"
+    
+    # Первый день месяца (UTC)
+    month: Mapped[date] = mapped_column(Date, primary_key=True)
+    # Время отсоединения секции месяца
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    
+    # Метод для строкового представления объекта ArchivedMonth
+    def __repr__(self) -> str:
+        return f"ArchivedMonth(month={self.month}, archived_at={self.archived_at})"
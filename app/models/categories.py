@@ -2,13 +2,19 @@
 Файл categories представляет модель для работы с категориями операций в базе данных
 """
 from ..database.base import Base
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import String, ForeignKey, DateTime, BigInteger, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from datetime import datetime
 
 # Модель Category представляет таблицу "categories" в базе данных для хранения категорий операций
 class Category(Base):
     # Название таблицы в базе данных
     __tablename__ = "categories"
+    # Индексы для выборки категорий пользователя и выборки изменений после номера изменения (синхронизация)
+    __table_args__ = (
+        Index("ix_categories_author", "author"),
+        Index("ix_categories_author_seq", "author", "seq"),
+    )
     
     # Первичный ключ - уникальный идентификатор категории
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -18,14 +24,19 @@ class Category(Base):
     color: Mapped[str] = mapped_column(String(7))
     # Тип категории: "income" (доход) или "expense" (расход)
     category_type: Mapped[str] = mapped_column("category_type", String(50))
-    # Внешний ключ для связи с пользователем, создавшим категорию
-    author: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    # Внешний ключ для связи с пользователем, создавшим категорию (категории удаляются вместе с пользователем на уровне БД)
+    author: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Номер изменения пользователя (версия данных), в котором категория была создана или изменена последний раз
+    seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+    # Время последнего изменения категории
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Связь с моделью User: каждая категория принадлежит одному пользователю
     user: Mapped["User"] = relationship("User", back_populates="categories")
     # Связь с моделью Operation: одна категория может иметь много операций
-    # Каскадное удаление: при удалении категории удаляются все связанные операции
-    operations: Mapped[list["Operation"]] = relationship("Operation", back_populates="category", cascade="all, delete-orphan")
+    # Каскадное удаление: при удалении категории удаляются все связанные операции (внешним ключом ON DELETE CASCADE,
+    # без загрузки операций в сессию)
+    operations: Mapped[list["Operation"]] = relationship("Operation", back_populates="category", cascade="all, delete-orphan", passive_deletes=True)
     
     # Метод для строкового представления объекта Category
     def __repr__(self) -> str:
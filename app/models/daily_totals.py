@@ -0,0 +1,34 @@
+"""
+Файл daily_totals представляет модель для хранения итогов операций пользователя по категориям за день (данные графиков)
+"""
+from ..database.base import Base
+from sqlalchemy import ForeignKey, Date, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import date
+from decimal import Decimal
+from ..database.types import Money
+
+# Модель DailyTotal представляет таблицу "daily_totals" с суммой и количеством операций в категории за день (UTC).
+# Итоги поддерживаются теми же запросами, что и помесячные итоги, и служат источником временных рядов для графиков.
+class DailyTotal(Base):
+    # Название таблицы в базе данных
+    __tablename__ = "daily_totals"
+    # Индекс для выборки итогов пользователя за диапазон дней
+    __table_args__ = (
+        Index("ix_daily_totals_author_day", "author", "day"),
+    )
+    
+    # Категория операций (итоги удаляются вместе с категорией на уровне БД)
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    # День (UTC), за который подсчитаны итоги
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    # Пользователь, которому принадлежат категория и операции
+    author: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Сумма операций по модулю (как на клиенте) в минимальных единицах валюты
+    total: Mapped[Decimal] = mapped_column(Money, default=0)
+    # Количество операций
+    operations_count: Mapped[int] = mapped_column(default=0)
+    
+    # Метод для строкового представления объекта DailyTotal
+    def __repr__(self) -> str:
+        return f"DailyTotal(category_id={self.category_id}, day={self.day}, author={self.author}, total={self.total}, operations_count={self.operations_count})"
\ No newline at end of file
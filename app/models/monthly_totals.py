@@ -0,0 +1,34 @@
+"""
+Файл monthly_totals представляет модель для хранения помесячных итогов операций пользователя по категориям
+"""
+from ..database.base import Base
+from sqlalchemy import ForeignKey, Date, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import date
+from decimal import Decimal
+from ..database.types import Money
+
+# Модель MonthlyTotal представляет таблицу "monthly_totals" с суммой и количеством операций в категории за месяц.
+# Итоги хранятся по категориям, а не по типу (доход/расход), поэтому изменение типа категории не требует их пересчета.
+class MonthlyTotal(Base):
+    # Название таблицы в базе данных
+    __tablename__ = "monthly_totals"
+    # Индекс для выборки итогов пользователя за месяц
+    __table_args__ = (
+        Index("ix_monthly_totals_author_month", "author", "month"),
+    )
+    
+    # Категория операций (итоги удаляются вместе с категорией на уровне БД)
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    # Первый день месяца (UTC), за который подсчитаны итоги
+    month: Mapped[date] = mapped_column(Date, primary_key=True)
+    # Пользователь, которому принадлежат категория и операции
+    author: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Сумма операций по модулю (как на клиенте) в минимальных единицах валюты
+    total: Mapped[Decimal] = mapped_column(Money, default=0)
+    # Количество операций
+    operations_count: Mapped[int] = mapped_column(default=0)
+    
+    # Метод для строкового представления объекта MonthlyTotal
+    def __repr__(self) -> str:
+        return f"MonthlyTotal(category_id={self.category_id}, month={self.month}, author={self.author}, total={self.total}, operations_count={self.operations_count})"
@@ -2,27 +2,46 @@
 Файл operations представляет модель для работы с финансовыми операциями в базе данных
 """
 from ..database.base import Base
-from sqlalchemy import String, ForeignKey, DateTime
+from sqlalchemy import DDL, String, ForeignKey, DateTime, BigInteger, Index, event, text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
+from decimal import Decimal
+from ..database.types import Money
 
-# Модель Operation представляет таблицу "operations" в базе данных для хранения финансовых операций
+# Модель Operation представляет таблицу "operations" в базе данных для хранения финансовых операций.
+# Таблица секционирована по диапазонам даты операции: секции по месяцам (UTC) создаются и архивируются функциями модуля
+# database.partitions, а операции за месяцы без собственной секции попадают в секцию по умолчанию operations_default.
 class Operation(Base):
     # Название таблицы в базе данных
     __tablename__ = "operations"
+    # Индексы под основные запросы: список операций пользователя по убыванию даты (в т.ч. keyset-пагинация),
+    # выборка операций пользователя по категории и диапазону дат, выборка изменений после номера изменения (синхронизация)
+    # и каскадное удаление операций категории
+    __table_args__ = (
+        Index("ix_operations_author_date_id", "author", text("date DESC"), "id"),
+        Index("ix_operations_author_category_date", "author", "category_id", "date"),
+        Index("ix_operations_author_seq", "author", "seq"),
+        Index("ix_operations_category_id", "category_id"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
     
-    # Первичный ключ - уникальный идентификатор операции
-    id: Mapped[int] = mapped_column(primary_key=True)
+    # Уникальный идентификатор операции (первичный ключ секционированной таблицы должен включать ключ секционирования,
+    # поэтому первичный ключ составной - ID и дата; ID по-прежнему уникален, так как выдается последовательностью)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     # Название операции (максимальная длина 256 символов)
     name: Mapped[str] = mapped_column(String(256))
-    # Дата и время операции с учетом часового пояса
-    date: Mapped[datetime] = mapped_column(DateTime(timezone=True))
-    # Сумма операции (число с плавающей точкой)
-    amount: Mapped[float] = mapped_column()
-    # Внешний ключ для связи с категорией операции
-    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), nullable=False)
-    # Внешний ключ для связи с пользователем, создавшим операцию
-    author: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    # Дата и время операции с учетом часового пояса (ключ секционирования)
+    date: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    # Сумма операции (хранится целым числом минимальных единиц валюты пользователя)
+    amount: Mapped[Decimal] = mapped_column(Money)
+    # Внешний ключ для связи с категорией операции (операции удаляются вместе с категорией на уровне БД)
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
+    # Внешний ключ для связи с пользователем, создавшим операцию (операции удаляются вместе с пользователем на уровне БД)
+    author: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Номер изменения пользователя (версия данных), в котором операция была создана или изменена последний раз
+    seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+    # Время последнего изменения операции
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Связь с моделью User: каждая операция принадлежит одному пользователю
     user: Mapped["User"] = relationship("User", back_populates="operations")
@@ -31,4 +50,7 @@ class Operation(Base):
     
     # Метод для строкового представления объекта Operation
     def __repr__(self) -> str:
-        return f"Operation(id={self.id}, name={self.name}, date={self.date}, amount={self.amount}, category_id={self.category_id}, author={self.author})"
\ No newline at end of file
+        return f"Operation(id={self.id}, name={self.name}, date={self.date}, amount={self.amount}, category_id={self.category_id}, author={self.author})"
+
+# Секция по умолчанию создается вместе с таблицей (create_all), чтобы добавление операций работало и без помесячных секций
+event.listen(Operation.__table__, "after_create", DDL("CREATE TABLE operations_default PARTITION OF operations DEFAULT"))
\ No newline at end of file
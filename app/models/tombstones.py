@@ -0,0 +1,34 @@
+"""
+Файл tombstones представляет модель для хранения отметок об удалении операций и категорий (для синхронизации изменений)
+"""
+from ..database.base import Base
+from sqlalchemy import String, ForeignKey, DateTime, BigInteger, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+# Модель Tombstone представляет таблицу "tombstones": запись об удаленной операции или категории с номером изменения пользователя,
+# по которой клиент при синхронизации узнает, что объект нужно удалить у себя
+class Tombstone(Base):
+    # Название таблицы в базе данных
+    __tablename__ = "tombstones"
+    # Индекс для выборки удалений пользователя после указанного номера изменения
+    __table_args__ = (
+        Index("ix_tombstones_author_seq", "author", "seq"),
+    )
+    
+    # Первичный ключ - уникальный идентификатор записи
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # Пользователь, которому принадлежал удаленный объект
+    author: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Тип удаленного объекта: "operation" (операция) или "category" (категория)
+    entity: Mapped[str] = mapped_column(String(20))
+    # ID удаленного объекта
+    entity_id: Mapped[int] = mapped_column()
+    # Номер изменения пользователя, в котором объект был удален
+    seq: Mapped[int] = mapped_column(BigInteger)
+    # Время удаления
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    
+    # Метод для строкового представления объекта Tombstone
+    def __repr__(self) -> str:
+        return f"Tombstone(id={self.id}, author={self.author}, entity={self.entity}, entity_id={self.entity_id}, seq={self.seq})"
@@ -2,13 +2,20 @@
 Файл users представляет модель для работы с пользователями в базе данных
 """
 from ..database.base import Base
-from sqlalchemy import String, Text
+from sqlalchemy import String, Text, Index, BigInteger, DateTime, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from datetime import datetime
+from decimal import Decimal
+from ..database.types import Money
 
 # Модель User представляет таблицу "users" в базе данных для хранения информации о пользователях
 class User(Base):
     # Название таблицы в базе данных
     __tablename__ = "users"
+    # Уникальный индекс для поиска пользователя по email (выполняется при каждом аутентифицированном запросе)
+    __table_args__ = (
+        Index("ix_users_email", "email", unique=True),
+    )
     
     # Первичный ключ - уникальный идентификатор пользователя
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -20,17 +27,33 @@ class User(Base):
     email: Mapped[str] = mapped_column(String(256))
     # Хэшированный пароль пользователя (максимальная длина 256 символов)
     password: Mapped[str] = mapped_column(String(256))
-    # Лимит бюджета пользователя на месяц (по умолчанию 0.0)
-    budgetLimit: Mapped[float] = mapped_column("budget_limit", default=0.0)
-    # Аватар пользователя в формате base64 (может быть NULL)
-    avatar: Mapped[str] = mapped_column(Text, nullable=True)
+    # Лимит бюджета пользователя на месяц (хранится целым числом минимальных единиц валюты, по умолчанию 0)
+    budgetLimit: Mapped[Decimal] = mapped_column("budget_limit", Money, default=0)
+    # Код валюты ISO 4217, в которой указаны лимит бюджета и суммы операций пользователя
+    currency: Mapped[str] = mapped_column(String(3), default="RUB", server_default="RUB")
+    # Ссылка на аватар пользователя на внешнем ресурсе (может быть NULL)
+    avatar_url: Mapped[str] = mapped_column("avatar", Text, nullable=True)
+    # SHA-256 хеш загруженного изображения аватара в хранилище аватаров (может быть NULL)
+    avatar_hash: Mapped[str] = mapped_column(String(64), nullable=True)
+    # Версия данных пользователя: увеличивается при каждом изменении пользователя, его категорий или операций (для ETag)
+    data_version: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+    # Время последнего изменения данных пользователя (для Last-Modified)
+    data_updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now(), server_default=func.now())
     
     # Связь с моделью Category: один пользователь может иметь много категорий
-    # Каскадное удаление: при удалении пользователя удаляются все его категории
-    categories: Mapped[list["Category"]] = relationship("Category", back_populates="user", cascade="all, delete-orphan")
+    # Каскадное удаление: при удалении пользователя удаляются все его категории (внешним ключом ON DELETE CASCADE)
+    categories: Mapped[list["Category"]] = relationship("Category", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
     # Связь с моделью Operation: один пользователь может иметь много операций
-    # Каскадное удаление: при удалении пользователя удаляются все его операции
-    operations: Mapped[list["Operation"]] = relationship("Operation", back_populates="user", cascade="all, delete-orphan")
+    # Каскадное удаление: при удалении пользователя удаляются все его операции (внешним ключом ON DELETE CASCADE)
+    operations: Mapped[list["Operation"]] = relationship("Operation", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    
+    # Адрес аватара пользователя: загруженное изображение отдается маршрутом /user/{id}/avatar
+    # (версия в адресе меняется вместе с изображением), иначе используется ссылка на внешний ресурс
+    @property
+    def avatar(self) -> str | None:
+        if self.avatar_hash:
+            return f"/user/{self.id}/avatar?v={self.avatar_hash[:16]}"
+        return self.avatar_url
     
     # Метод для строкового представления объекта User
     def __repr__(self) -> str:
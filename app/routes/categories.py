@@ -2,78 +2,107 @@
 Файл categories предоставляет маршруты для работы с категориями.
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import Select, select, insert, update, delete, literal
+from typing import List, NoReturn
 
 from ..database.connection import get_session
+from ..database.versions import data_version_cte
+from ..events.hub import event_hub
 from ..models.categories import Category
-from ..schemas.categories import CategoryCreate, CategoryUpdate, CategoryResponse
-from .dependencies import get_current_user
+from ..models.tombstones import Tombstone
+from ..schemas.categories import CategoryCreate, CategoryUpdate, CategoryResponse, category_rows_adapter
+from .dependencies import get_current_user, get_read_session, check_data_version
 
 category_router = APIRouter(
     prefix="/category",
     tags=["Categories"]
 )
 
+# Столбцы категории, выбираемые для списка категорий (в порядке полей ответа API)
+CATEGORY_LIST_COLUMNS = (Category.id, Category.name, Category.color, Category.category_type, Category.author)
+
+# Построение запроса списка категорий пользователя
+def category_list_query(author_id: int) -> Select:
+    return select(*CATEGORY_LIST_COLUMNS).where(Category.author == author_id)
+
+# Определение причины, по которой запрос с проверкой принадлежности в условии не нашел категорию (выполняется только в этом случае):
+# категория не существует либо принадлежит другому пользователю. Изменения в том же запросе (увеличение версии данных) отменяются.
+async def _raise_access_error(session: AsyncSession, id: int, action: str) -> NoReturn:
+    await session.rollback()
+    exists = await session.scalar(select(select(Category.id).where(Category.id == id).exists()))
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Категория с указанным ID не существует."
+        )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"Нельзя {action} категорию другого пользователя."
+    )
+
 # Получение всех категорий текущего пользователя. Функция возвращает список всех категорий, созданных текущим аутентифицированным пользователем
+# Категории выбираются отдельными столбцами и сериализуются в JSON одним вызовом pydantic-core, минуя построчную валидацию моделей ответа.
 @category_router.get("", response_model=List[CategoryResponse])
 async def retrieve_all_categories(
+    version_headers: dict = Depends(check_data_version),
     current_user = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session)
-) -> List[CategoryResponse]:
-    query = select(Category).where(Category.author == current_user.id)
-    result = await session.execute(query)
-    categories = result.scalars().all()
-    return categories
+    session: AsyncSession = Depends(get_read_session)
+) -> Response:
+    result = await session.execute(category_list_query(current_user.id))
+    rows = [row._asdict() for row in result]
+    return Response(content=category_rows_adapter.dump_json(rows), media_type="application/json", headers=version_headers)
 
 # Получение конкретной категории по ID. Функция проверяет, существует ли категория с указанным ID и принадлежит ли она текущему пользователю
-@category_router.get("/{id}", response_model=CategoryResponse)
+@category_router.get("/{id}", response_model=CategoryResponse, dependencies=[Depends(check_data_version)])
 async def retrieve_category(
     id: int,
     current_user = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session)
 ) -> CategoryResponse:
     result = await session.execute(
-        select(Category).where(Category.id == id)
+        select(Category).where(Category.id == id, Category.author == current_user.id)
     )
     category = result.scalar_one_or_none()
     
     if not category:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail="Категория с указанным ID не существует."
-        )
-    
-    if category.author != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Нельзя получить категорию другого пользователя."
-        )
+        await _raise_access_error(session, id, "получить")
     
     return category
 
-# Создание новой категории. Функция создает новую категорию с данными из запроса и связывает ее с текущим пользователем
+# Создание новой категории. Функция создает новую категорию с данными из запроса и связывает ее с текущим пользователем.
+# Увеличение версии данных и добавление категории выполняются одним запросом (INSERT ... RETURNING).
 @category_router.post("", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 async def create_category(
     body: CategoryCreate,
     current_user = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ) -> CategoryResponse:
-    category = Category(
-        name=body.name,
-        color=body.color,
-        category_type=body.category_type,
-        author=current_user.id
+    data_version = data_version_cte(current_user.id)
+    result = await session.execute(
+        insert(Category)
+        .from_select(
+            ["name", "color", "category_type", "author", "seq"],
+            select(
+                literal(body.name, Category.name.type),
+                literal(body.color, Category.color.type),
+                literal(body.category_type, Category.category_type.type),
+                data_version.c.author,
+                data_version.c.seq
+            )
+        )
+        .returning(*CATEGORY_LIST_COLUMNS)
     )
-    
-    session.add(category)
+    category = result.one()
     await session.commit()
-    await session.refresh(category)
+    event_hub.publish(current_user.id, "category", "created", category.id)
     
-    return category
+    return category._asdict()
 
-# Обновление существующей категории. Функция обновляет данные категории с указанным ID, если она принадлежит текущему пользователю
+# Обновление существующей категории. Функция обновляет данные категории с указанным ID, если она принадлежит текущему пользователю.
+# Увеличение версии данных и изменение категории (с проверкой принадлежности в условии) выполняются одним запросом
+# (UPDATE ... RETURNING); при отказе причина определяется дополнительным запросом.
 @category_router.put("/{id}", response_model=CategoryResponse)
 async def update_category(
     id: int,
@@ -81,58 +110,64 @@ async def update_category(
     current_user = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ) -> CategoryResponse:
-    result = await session.execute(
-        select(Category).where(Category.id == id)
-    )
-    category = result.scalar_one_or_none()
-    
-    if not category:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Категория с указанным ID не существует."
-        )
-    
-    if category.author != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Нельзя обновить категорию другого пользователя."
-        )
-
+    data_version = data_version_cte(current_user.id)
+    values = {"seq": data_version.c.seq}
     if body.name is not None:
-        category.name = body.name
+        values["name"] = body.name
     if body.color is not None:
-        category.color = body.color
+        values["color"] = body.color
+    # Помесячные итоги хранятся по категориям, поэтому смена типа категории не требует их пересчета
     if body.category_type is not None:
-        category.category_type = body.category_type
+        values["category_type"] = body.category_type
     
-    await session.commit()
-    await session.refresh(category)
+    result = await session.execute(
+        update(Category)
+        .where(Category.id == id, Category.author == data_version.c.author)
+        .values(**values)
+        .returning(*CATEGORY_LIST_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    category = result.one_or_none()
     
-    return category
+    if category is None:
+        await _raise_access_error(session, id, "обновить")
+    
+    await session.commit()
+    event_hub.publish(current_user.id, "category", "updated", category.id)
+    return category._asdict()
 
-# Удаление категории по ID. Функция удаляет категорию с указанным ID, если она принадлежит текущему пользователю
+# Удаление категории по ID. Функция удаляет категорию с указанным ID, если она принадлежит текущему пользователю.
+# Увеличение версии данных, удаление (DELETE ... RETURNING с проверкой принадлежности в условии) и отметка об удалении
+# выполняются одним запросом. Операции и помесячные итоги категории удаляются внешними ключами (ON DELETE CASCADE)
+# без загрузки в приложение.
 @category_router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_category(
     id: int,
     current_user = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
-    result = await session.execute(
-        select(Category).where(Category.id == id)
+    data_version = data_version_cte(current_user.id)
+    deleted = (
+        delete(Category)
+        .where(Category.id == id, Category.author == data_version.c.author)
+        .returning(Category.id, Category.author)
+        .cte("deleted_category")
     )
-    category = result.scalar_one_or_none()
-    
-    if not category:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Категория с указанным ID не существует."
+    # Одна отметка об удалении категории: ее операции удаляются каскадно, а клиент при синхронизации удаляет их вместе с категорией,
+    # поэтому отметки для каждой операции не создаются (у категории могут быть десятки тысяч операций)
+    category_tombstone = (
+        insert(Tombstone)
+        .from_select(
+            ["author", "entity", "entity_id", "seq"],
+            select(deleted.c.author, literal("category"), deleted.c.id, data_version.c.seq)
+            .join(data_version, data_version.c.author == deleted.c.author)
         )
+        .cte("category_tombstone")
+    )
+    result = await session.execute(select(deleted.c.id).add_cte(category_tombstone))
     
-    if category.author != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Нельзя удалить категорию другого пользователя."
-        )
+    if result.scalar_one_or_none() is None:
+        await _raise_access_error(session, id, "удалить")
     
-    await session.delete(category)
-    await session.commit()
\ No newline at end of file
+    await session.commit()
+    event_hub.publish(current_user.id, "category", "deleted", id)
\ No newline at end of file
@@ -1,23 +1,123 @@
 """
-Файл dependencies предоставляет функцию-зависимость для получения текущего пользователя для маршрутов.
+Файл dependencies предоставляет функции-зависимости для маршрутов: получение текущего пользователя (с кэшированием), разбор параметров фильтрации операций
+и проверку условных запросов по версии данных пользователя.
 """
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Select, select
+from typing import AsyncGenerator
+from datetime import datetime, timezone
+from email.utils import format_datetime
 from ..database.connection import get_session
+from ..database.replicas import replica_router
+from ..database.versions import DataVersion, get_data_version
 from ..models.users import User
+from ..schemas.operations import OperationFilters
 from ..auth.authenticate import authenticate
+from ..auth.user_cache import CachedUser, user_cache
 
-# Функция-зависимость для получения текущего пользователя из базы данных по email из JWT токена.
+# Построение запроса данных пользователя, нужных для авторизации, по email
+def current_user_query(email: str) -> Select:
+    return select(User.id, User.email).where(User.email == email)
+
+# Функция-зависимость для получения текущего пользователя по email из JWT токена. Данные пользователя, нужные для авторизации,
+# берутся из кэша, а при его отсутствии загружаются из базы данных и кэшируются.
 async def get_current_user(
     user_email: str = Depends(authenticate),
     session: AsyncSession = Depends(get_session)
-) -> User:
-    result = await session.execute(select(User).where(User.email == user_email))
-    user = result.scalar_one_or_none()
-    if not user:
+) -> CachedUser:
+    # Пользователь сессии запроса: при фиксации изменений в ней его запросы чтения временно направляются на основную базу
+    user = user_cache.get(user_email)
+    if user is not None:
+        session.info["user_id"] = user.id
+        return user
+    
+    result = await session.execute(current_user_query(user_email))
+    row = result.one_or_none()
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден."
+        )
+    user = CachedUser(id=row.id, email=row.email)
+    user_cache.set(user)
+    session.info["user_id"] = user.id
+    return user
+
+# Функция-зависимость для получения сессии маршрутов, которые только читают данные. Сессия открывается на исправной реплике,
+# а сразу после изменения данных пользователя или при недоступности реплик используется сессия основной базы (get_session)
+async def get_read_session(
+    current_user: CachedUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+) -> AsyncGenerator[AsyncSession, None]:
+    async with replica_router.read_session(current_user.id, session) as read_session:
+        yield read_session
+
+# Функция-зависимость для получения сессии маршрутов чтения данных пользователя с ID user_id из пути (в том числе без аутентификации).
+# Как и в get_read_session, после изменения данных этого пользователя запросы временно выполняются на основной базе
+async def get_user_read_session(
+    user_id: int,
+    session: AsyncSession = Depends(get_session)
+) -> AsyncGenerator[AsyncSession, None]:
+    async with replica_router.read_session(user_id, session) as read_session:
+        yield read_session
+
+# Приведение даты к UTC (даты без часового пояса считаются датами в UTC)
+def to_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+# Функция-зависимость для разбора параметров фильтрации операций: по категории, дате начала и дате окончания.
+async def get_operation_filters(
+    categoryId: int = Query(None),
+    start_date: datetime = Query(None),
+    end_date: datetime = Query(None)
+) -> OperationFilters:
+    return OperationFilters(
+        categoryId=categoryId,
+        start_date=to_utc(start_date) if start_date else None,
+        end_date=to_utc(end_date) if end_date else None
+    )
+
+# Построение заголовков ответа по версии данных пользователя: слабый ETag (пользователь и версия), время изменения
+# и требование проверять актуальность ответа при каждом обращении
+def data_version_headers(user_id: int, data_version: DataVersion) -> dict[str, str]:
+    return {
+        "ETag": f'W/"{user_id}-{data_version.version}"',
+        "Last-Modified": format_datetime(data_version.updated_at.astimezone(timezone.utc), usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+
+# Проверка соответствия ETag значению заголовка If-None-Match (сравнение без учета признака слабого ETag)
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in tags
+
+# Функция-зависимость для условных GET-запросов. Функция получает версию данных текущего пользователя одним запросом по первичному ключу
+# и, если клиент уже получил ответ для этой версии (If-None-Match), завершает запрос ответом 304 без загрузки данных.
+# Иначе заголовки ETag и Last-Modified добавляются к ответу маршрута. Версия читается в сессии чтения маршрута (на той же реплике,
+# что и данные ответа), иначе ETag новой версии с основной базы мог бы достаться данным отстающей реплики.
+async def check_data_version(
+    request: Request,
+    response: Response,
+    current_user: CachedUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+) -> dict[str, str]:
+    data_version = await get_data_version(session, current_user.id)
+    if data_version is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Пользователь не найден."
+            detail="Пользователь не найден."
         )
-    return user
\ No newline at end of file
+    
+    headers = data_version_headers(current_user.id, data_version)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
+    return headers
@@ -0,0 +1,77 @@
+"""
+Файл events предоставляет поток событий изменения данных текущего пользователя (Server-Sent Events), по которому клиент обновляет
+кэш вместо повторной загрузки данных.
+"""
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Optional
+
+from ..auth.jwt_handler import verify_access_token
+from ..auth.user_cache import CachedUser
+from ..config import settings
+from ..database.connection import get_session
+from ..events.hub import event_hub
+from .dependencies import get_current_user
+
+events_router = APIRouter(
+    tags=["Events"]
+)
+
+# Время в миллисекундах, через которое EventSource переподключается после разрыва соединения
+RECONNECT_MILLISECONDS = 3000
+
+# Функция-зависимость для аутентификации подключения к потоку событий. Токен берется из заголовка Authorization, а при его отсутствии -
+# из параметра access_token, так как EventSource в браузере не позволяет передать заголовки.
+async def authenticate_stream(request: Request, access_token: Optional[str] = Query(None)) -> str:
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        token = access_token
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return verify_access_token(token)["user"]
+
+# Функция-зависимость для получения пользователя потока событий (как get_current_user, но с токеном из authenticate_stream)
+async def get_stream_user(
+    user_email: str = Depends(authenticate_stream),
+    session: AsyncSession = Depends(get_session)
+) -> CachedUser:
+    return await get_current_user(user_email, session)
+
+# Форматирование события в формате Server-Sent Events
+def format_event(event: dict) -> bytes:
+    return f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n".encode()
+
+# Поток событий подключения: событие ready после подписки, события изменений из очереди и комментарии keep-alive в паузах
+async def event_stream(user_id: int, keepalive: float) -> AsyncIterator[bytes]:
+    async with event_hub.subscribe(user_id) as queue:
+        yield f"retry: {RECONNECT_MILLISECONDS}\n".encode() + format_event({"type": "ready"})
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            yield format_event(event)
+
+# Подключение к потоку событий текущего пользователя. После события ready клиент получает события change (тип объекта, действие
+# и ID измененных объектов) по изменениям, сделанным в любой вкладке, на любом устройстве и в любом процессе приложения.
+# События не сохраняются: после подключения или события reset клиент синхронизирует данные (маршрут /sync).
+@events_router.get("/events")
+async def stream_events(
+    current_user: CachedUser = Depends(get_stream_user),
+    session: AsyncSession = Depends(get_session)
+) -> StreamingResponse:
+    # Соединение с базой данных возвращается в пул до начала потока, который может длиться часами
+    await session.rollback()
+    return StreamingResponse(
+        event_stream(current_user.id, settings.events_keepalive_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,29 @@
+"""
+Файл metrics предоставляет маршрут /metrics с показателями запросов в текстовом формате Prometheus.
+"""
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Response, status
+
+from ..config import settings
+from ..middleware.timing import metrics_registry
+
+metrics_router = APIRouter(tags=["Service"])
+
+# Проверка токена сборщика показателей. Маршрут недоступен, пока токен не задан в настройках (metrics_token)
+async def verify_metrics_token(authorization: Optional[str] = Header(None)) -> None:
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.metrics_token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Неверный токен доступа к показателям.",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+# Получение показателей запросов по маршрутам: гистограммы времени обработки и количества SQL запросов, время SQL запросов,
+# количество строк и время ожидания соединения из пула
+@metrics_router.get("/metrics", dependencies=[Depends(verify_metrics_token)], include_in_schema=False)
+async def retrieve_metrics() -> Response:
+    return Response(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
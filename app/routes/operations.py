@@ -1,123 +1,677 @@
 """
 Файл operations предоставляет маршруты для работы с финансовыми операциями.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, UploadFile, File
+from fastapi.responses import Response, StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
-from datetime import datetime, timezone
+from sqlalchemy import Select, Date, DateTime, select, insert, update, delete, func, case, cast, literal, literal_column, tuple_
+from typing import Any, AsyncIterator, BinaryIO, Callable, Iterator, List, Literal, NoReturn, Optional
+from datetime import date, datetime, timedelta, timezone
+import asyncio
+import base64
+import csv
+import io
+import json
+import tempfile
+import zlib
+from decimal import Decimal
 
 from ..database.connection import get_session
+from ..database.versions import bump_data_version, data_version_cte, execute_with_data_version
+from ..database.rollups import TotalsDelta, totals_ctes
+from ..events.hub import event_hub
 from ..models.operations import Operation
+from ..models.daily_totals import DailyTotal
 from ..models.categories import Category
-from ..schemas.operations import OperationCreate, OperationUpdate, OperationResponse
-from .dependencies import get_current_user 
+from ..models.tombstones import Tombstone
+from ..schemas.operations import (
+    OperationCreate, OperationUpdate, OperationResponse, OperationFilters, OperationPage,
+    OperationTotals, OperationPeriodSummary, OperationCategorySummary, OperationSeries, OperationTimeseries,
+    OperationBulkResult, OperationBulkError,
+    OperationRow, operation_row_adapter, operation_rows_adapter
+)
+from .dependencies import get_current_user, get_read_session, get_operation_filters, check_data_version, to_utc
 
 operation_router = APIRouter(
     prefix="/operation",
     tags=["Operations"]
 )
 
+# Столбцы операции, выбираемые для списка операций (в порядке полей ответа API)
+OPERATION_LIST_COLUMNS = (Operation.id, Operation.name, Operation.date, Operation.amount, Operation.category_id, Operation.author)
+# Максимальный размер страницы при постраничном получении операций
+MAX_PAGE_SIZE = 500
+# Количество операций, читаемых из БД и отправляемых клиенту за одну порцию при потоковой выдаче
+STREAM_CHUNK_SIZE = 500
+# Столбцы файла CSV при экспорте операций (совпадают с полями ответа API)
+EXPORT_CSV_COLUMNS = ["id", "name", "date", "amount", "category_id", "author"]
+# Количество операций, добавляемых одним запросом при массовой загрузке
+BULK_BATCH_SIZE = 1000
+# Максимальное количество ошибок по строкам, возвращаемых в ответе массовой загрузки
+MAX_BULK_ERRORS = 1000
+# Максимальное количество периодов во временных рядах (десять лет по дням)
+MAX_TIMESERIES_PERIODS = 3660
+
+# Построение условий выборки операций текущего пользователя по параметрам фильтрации
+def _operation_conditions(filters: OperationFilters, author_id: int) -> list:
+    conditions = [Operation.author == author_id]
+    if filters.categoryId:
+        conditions.append(Operation.category_id == filters.categoryId)
+    if filters.start_date:
+        conditions.append(Operation.date >= filters.start_date)
+    if filters.end_date:
+        conditions.append(Operation.date <= filters.end_date)
+    return conditions
+
+# Построение запроса списка операций текущего пользователя (в порядке убывания даты)
+def operation_list_query(filters: OperationFilters, author_id: int) -> Select:
+    return (
+        select(*OPERATION_LIST_COLUMNS)
+        .where(*_operation_conditions(filters, author_id))
+        .order_by(Operation.date.desc(), Operation.id.desc())
+    )
+
+# Построение запроса страницы операций: операции после позиции курсора (дата и ID) и еще одна для определения наличия следующей страницы
+def operation_page_query(filters: OperationFilters, author_id: int, limit: int, position: Optional[tuple[datetime, int]] = None) -> Select:
+    query = select(Operation).where(*_operation_conditions(filters, author_id))
+    if position:
+        query = query.where(tuple_(Operation.date, Operation.id) < position)
+    return query.order_by(Operation.date.desc(), Operation.id.desc()).limit(limit + 1)
+
 # Получение всех операций текущего пользователя с фильтрацией. Функция возвращает список всех операций, созданных текущим аутентифицированным пользователем,
 # с возможностью фильтрации по категории, дате начала и дате окончания, а также сортирует результаты по дате в порядке убывания.
+# Операции выбираются отдельными столбцами без создания объектов ORM и сериализуются в JSON одним вызовом pydantic-core,
+# минуя построчную валидацию моделей ответа.
 @operation_router.get("", response_model=List[OperationResponse])
 async def retrieve_all_operations(
-    categoryId: int = Query(None),
-    start_date: datetime = Query(None),
-    end_date: datetime = Query(None),
+    filters: OperationFilters = Depends(get_operation_filters),
+    version_headers: dict = Depends(check_data_version),
     current_user = Depends(get_current_user), 
-    session: AsyncSession = Depends(get_session)
-) -> List[OperationResponse]:
-    query = select(Operation).where(Operation.author == current_user.id)
-    if categoryId:
-        query = query.where(Operation.category_id == categoryId)
-
-    if start_date:
-        if start_date.tzinfo is None:
-            start_date = start_date.replace(tzinfo=timezone.utc)
-        else:
-            start_date = start_date.astimezone(timezone.utc)
-        query = query.where(Operation.date >= start_date)
+    session: AsyncSession = Depends(get_read_session)
+) -> Response:
+    result = await session.execute(operation_list_query(filters, current_user.id))
+    rows = [row._asdict() for row in result]
     
-    if end_date:
-        if end_date.tzinfo is None:
-            end_date = end_date.replace(tzinfo=timezone.utc)
+    return Response(content=operation_rows_adapter.dump_json(rows), media_type="application/json", headers=version_headers)
+
+# Кодирование позиции последней операции страницы (дата и ID) в непрозрачный курсор
+def _encode_cursor(operation: Operation) -> str:
+    raw = json.dumps([operation.date.isoformat(), operation.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+# Декодирование курсора в позицию (дата и ID), после которой начинается следующая страница
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        date, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return to_utc(datetime.fromisoformat(date)), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор."
+        )
+
+# Постраничное получение операций текущего пользователя. Функция использует keyset-пагинацию по (дата, ID) в порядке убывания,
+# поэтому стоимость получения любой страницы не зависит от ее номера. Для следующей страницы нужно передать next_cursor из ответа.
+@operation_router.get("/page", response_model=OperationPage, dependencies=[Depends(check_data_version)])
+async def retrieve_operations_page(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    filters: OperationFilters = Depends(get_operation_filters),
+    current_user = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+) -> OperationPage:
+    query = operation_page_query(filters, current_user.id, limit, _decode_cursor(cursor) if cursor else None)
+    result = await session.execute(query)
+    operations = result.scalars().all()
+    
+    next_cursor = _encode_cursor(operations[limit - 1]) if len(operations) > limit else None
+    return OperationPage(items=operations[:limit], next_cursor=next_cursor)
+
+# Чтение операций текущего пользователя серверным курсором порциями по STREAM_CHUNK_SIZE (в порядке убывания даты)
+async def _iter_operation_chunks(
+    session: AsyncSession,
+    filters: OperationFilters,
+    author_id: int
+) -> AsyncIterator[List[OperationRow]]:
+    query = operation_list_query(filters, author_id).execution_options(yield_per=STREAM_CHUNK_SIZE)
+    result = await session.stream(query)
+    async for partition in result.partitions():
+        yield [row._asdict() for row in partition]
+
+# Потоковая выдача операций текущего пользователя. Функция читает операции серверным курсором порциями и сразу отправляет их клиенту
+# в формате NDJSON (по одной операции в строке) или JSON-массива, не загружая весь результат в память.
+@operation_router.get("/stream", response_model=List[OperationResponse])
+async def stream_operations(
+    format: Literal["ndjson", "json"] = Query("ndjson"),
+    filters: OperationFilters = Depends(get_operation_filters),
+    current_user = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+) -> StreamingResponse:
+    async def generate():
+        first = True
+        if format == "json":
+            yield b"["
+        async for operations in _iter_operation_chunks(session, filters, current_user.id):
+            if format == "json":
+                chunk = operation_rows_adapter.dump_json(operations)[1:-1]  # Элементы массива без скобок
+                yield chunk if first else b"," + chunk
+            else:
+                yield b"".join(operation_row_adapter.dump_json(operation) + b"\n" for operation in operations)
+            first = False
+        if format == "json":
+            yield b"]"
+    
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(generate(), media_type=media_type)
+
+# Экспорт операций текущего пользователя в файл CSV или NDJSON. Функция использует те же фильтры, что и получение списка операций,
+# читает операции серверным курсором и передает файл потоком (при gzip=true - со сжатием на лету), поэтому объем используемой памяти
+# не зависит от количества операций.
+@operation_router.get("/export")
+async def export_operations(
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    gzip: bool = Query(False),
+    filters: OperationFilters = Depends(get_operation_filters),
+    current_user = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+) -> StreamingResponse:
+    async def generate_rows():
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_CSV_COLUMNS)
+            async for operations in _iter_operation_chunks(session, filters, current_user.id):
+                writer.writerows(
+                    [operation["id"], operation["name"], operation["date"].isoformat(), operation["amount"], operation["category_id"], operation["author"]]
+                    for operation in operations
+                )
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
         else:
-            end_date = end_date.astimezone(timezone.utc)
-        query = query.where(Operation.date <= end_date)
+            async for operations in _iter_operation_chunks(session, filters, current_user.id):
+                yield b"".join(operation_row_adapter.dump_json(operation) + b"\n" for operation in operations)
+    
+    async def generate_gzip():
+        compressor = zlib.compressobj(wbits=31)  # wbits=31 - формат gzip
+        async for chunk in generate_rows():
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
     
-    query = query.order_by(Operation.date.desc())
+    filename = f"operations.{format}"
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    
+    return StreamingResponse(
+        generate_gzip() if gzip else generate_rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Сумма операции по модулю (как на клиенте) с типом столбца суммы, чтобы результат агрегатов преобразовывался в денежную сумму
+_absolute_amount = func.abs(Operation.amount, type_=Operation.amount.type)
+# Суммы доходов и расходов: тип операции определяется типом ее категории
+_income_amount = case((Category.category_type == "income", _absolute_amount), else_=0)
+_expense_amount = case((Category.category_type == "expense", _absolute_amount), else_=0)
+_income_count = case((Category.category_type == "income", 1), else_=0)
+_expense_count = case((Category.category_type == "expense", 1), else_=0)
+
+# Получение итоговой сводки по операциям текущего пользователя. Функция считает общие доходы, расходы, их количество и баланс
+# одним агрегирующим запросом в БД с учетом тех же фильтров, что и получение списка операций.
+@operation_router.get("/summary", response_model=OperationTotals)
+async def retrieve_operations_summary(
+    filters: OperationFilters = Depends(get_operation_filters),
+    current_user = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+) -> OperationTotals:
+    query = (
+        select(
+            func.coalesce(func.sum(_income_amount), 0).label("totalIncome"),
+            func.coalesce(func.sum(_expense_amount), 0).label("totalExpense"),
+            func.coalesce(func.sum(_income_count), 0).label("incomeCount"),
+            func.coalesce(func.sum(_expense_count), 0).label("expenseCount"),
+        )
+        .select_from(Operation)
+        .join(Category, Category.id == Operation.category_id)
+        .where(*_operation_conditions(filters, current_user.id))
+    )
+    row = (await session.execute(query)).one()
     
+    return OperationTotals(
+        totalIncome=row.totalIncome,
+        totalExpense=row.totalExpense,
+        incomeCount=row.incomeCount,
+        expenseCount=row.expenseCount,
+        balance=row.totalIncome - row.totalExpense
+    )
+
+# Получение сводки по операциям текущего пользователя с группировкой по периодам (день, неделя, месяц или год).
+# Периоды считаются в UTC и возвращаются в хронологическом порядке.
+@operation_router.get("/summary/period", response_model=List[OperationPeriodSummary])
+async def retrieve_operations_summary_by_period(
+    period: Literal["day", "week", "month", "year"] = Query("month"),
+    filters: OperationFilters = Depends(get_operation_filters),
+    current_user = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+) -> List[OperationPeriodSummary]:
+    # Единица периода подставляется литералом (значение ограничено Literal), чтобы выражение в SELECT и GROUP BY совпадало
+    bucket = func.date_trunc(literal_column(f"'{period}'"), func.timezone("UTC", Operation.date)).label("period")
+    query = (
+        select(
+            bucket,
+            func.sum(_income_amount).label("income"),
+            func.sum(_expense_amount).label("expense"),
+        )
+        .join(Category, Category.id == Operation.category_id)
+        .where(*_operation_conditions(filters, current_user.id))
+        .group_by(bucket)
+        .order_by(bucket)
+    )
     result = await session.execute(query)
-    operations = result.scalars().all()
     
-    return operations
+    return [
+        OperationPeriodSummary(
+            period=row.period.replace(tzinfo=timezone.utc),
+            income=row.income,
+            expense=row.expense,
+            balance=row.income - row.expense
+        )
+        for row in result
+    ]
+
+# Получение сводки по операциям текущего пользователя в разрезе категорий. Функция возвращает сумму и количество операций
+# для каждой категории, в которой есть операции, попадающие под фильтры.
+@operation_router.get("/summary/category", response_model=List[OperationCategorySummary])
+async def retrieve_operations_summary_by_category(
+    filters: OperationFilters = Depends(get_operation_filters),
+    current_user = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+) -> List[OperationCategorySummary]:
+    query = (
+        select(
+            Category.id,
+            Category.name,
+            Category.color,
+            Category.category_type,
+            func.sum(_absolute_amount).label("total"),
+            func.count(Operation.id).label("count"),
+        )
+        .join(Category, Category.id == Operation.category_id)
+        .where(*_operation_conditions(filters, current_user.id))
+        .group_by(Category.id)
+        .order_by(Category.id)
+    )
+    result = await session.execute(query)
+    
+    return [
+        OperationCategorySummary(
+            categoryId=row.id,
+            name=row.name,
+            color=row.color,
+            category_type=row.category_type,
+            total=row.total,
+            count=row.count
+        )
+        for row in result
+    ]
+
+# Начало периода (дня, недели с понедельника или месяца), к которому относится день
+def _period_start(value: date, bucket: str) -> date:
+    if bucket == "week":
+        return value - timedelta(days=value.weekday())
+    if bucket == "month":
+        return value.replace(day=1)
+    return value
+
+# Начало следующего периода
+def _next_period(value: date, bucket: str) -> date:
+    if bucket == "month":
+        return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+    return value + timedelta(days=7 if bucket == "week" else 1)
+
+# Получение временных рядов доходов и расходов текущего пользователя для графиков. Суммы читаются из дневных итогов
+# по категориям (не более одной строки на категорию и день) и группируются по периодам в БД, поэтому график за несколько лет
+# строится по нескольким сотням строк, а не по всем операциям. Дни from и to (UTC) входят в диапазон; периоды без операций
+# заполняются нулями. Итоги категорий за тот же диапазон возвращаются по убыванию суммы (порядок столбчатой и круговой диаграмм).
+@operation_router.get("/timeseries", response_model=OperationTimeseries)
+async def retrieve_operations_timeseries(
+    bucket: Literal["day", "week", "month"] = Query("day"),
+    start: date = Query(..., alias="from"),
+    end: date = Query(..., alias="to"),
+    type: Literal["income", "expense", "all"] = Query("all"),
+    current_user = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+) -> OperationTimeseries:
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Начало диапазона позже его окончания."
+        )
+    periods = []
+    period = _period_start(start, bucket)
+    while period <= end:
+        if len(periods) == MAX_TIMESERIES_PERIODS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Слишком много периодов (больше {MAX_TIMESERIES_PERIODS}), выберите более крупный период или меньший диапазон."
+            )
+        periods.append(period)
+        period = _next_period(period, bucket)
+    
+    category_types = ["income", "expense"] if type == "all" else [type]
+    conditions = [
+        DailyTotal.author == current_user.id,
+        DailyTotal.day >= start,
+        DailyTotal.day <= end,
+        Category.category_type.in_(category_types),
+    ]
+    # Единица периода подставляется литералом (значение ограничено Literal), чтобы выражение в SELECT и GROUP BY совпадало
+    period_start = func.date_trunc(literal_column(f"'{bucket}'"), cast(DailyTotal.day, DateTime)).cast(Date).label("period")
+    series_query = (
+        select(period_start, Category.category_type, func.sum(DailyTotal.total).label("total"))
+        .join(Category, Category.id == DailyTotal.category_id)
+        .where(*conditions)
+        .group_by(period_start, Category.category_type)
+    )
+    total = func.sum(DailyTotal.total)
+    count = func.sum(DailyTotal.operations_count)
+    categories_query = (
+        select(Category.id, Category.name, Category.color, Category.category_type, total.label("total"), count.label("count"))
+        .join(Category, Category.id == DailyTotal.category_id)
+        .where(*conditions)
+        .group_by(Category.id)
+        .having(count > 0)
+        .order_by(total.desc(), Category.id)
+    )
+    
+    positions = {period: index for index, period in enumerate(periods)}
+    values = {category_type: [Decimal(0)] * len(periods) for category_type in category_types}
+    for row in await session.execute(series_query):
+        values[row.category_type][positions[row.period]] += row.total
+    categories = await session.execute(categories_query)
+    
+    return OperationTimeseries(
+        bucket=bucket,
+        periods=periods,
+        series=[OperationSeries(category_type=category_type, values=values[category_type]) for category_type in category_types],
+        categories=[
+            OperationCategorySummary(
+                categoryId=row.id,
+                name=row.name,
+                color=row.color,
+                category_type=row.category_type,
+                total=row.total,
+                count=row.count
+            )
+            for row in categories
+        ]
+    )
 
 # Получение конкретной операции по ID. Функция проверяет, существует ли операция с указанным ID и принадлежит ли она текущему пользователю.
-@operation_router.get("/{id}", response_model=OperationResponse)
+@operation_router.get("/{id}", response_model=OperationResponse, dependencies=[Depends(check_data_version)])
 async def retrieve_operation(
     id: int,
     current_user = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session)
 ) -> OperationResponse:
     result = await session.execute(
-        select(Operation).where(Operation.id == id)
+        select(Operation).where(Operation.id == id, Operation.author == current_user.id)
     )
     operation = result.scalar_one_or_none()
     
     if not operation:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail="Операции с указанным ID не существует."
-        )
+        await _raise_access_error(session, current_user.id, "получить", operation_id=id)
+    
+    return operation
+
+# Определение причины, по которой запрос с проверкой принадлежности в условии не нашел ни одной строки (выполняется только в этом случае):
+# операция или категория не существует либо принадлежит другому пользователю. Изменения в том же запросе (увеличение версии данных) отменяются.
+async def _raise_access_error(
+    session: AsyncSession,
+    author_id: int,
+    action: str,
+    operation_id: Optional[int] = None,
+    category_id: Optional[int] = None
+) -> NoReturn:
+    await session.rollback()
+    if operation_id is not None:
+        operation_author = await session.scalar(select(Operation.author).where(Operation.id == operation_id))
+        if operation_author is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Операции с указанным ID не существует."
+            )
+        if operation_author != author_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Нельзя {action} операцию другого пользователя."
+            )
     
-    if operation.author != current_user.id:
+    category_author = await session.scalar(select(Category.author).where(Category.id == category_id))
+    if category_author is None:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Нельзя получить операцию другого пользователя."
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Категория с указанным ID не существует."
         )
-    
-    return operation
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"Нельзя {action} операцию в категории другого пользователя."
+    )
 
 # Создание новой операции. Функция создает новую операцию с данными из запроса, проверяя что указанная категория существует и принадлежит текущему пользователю.
+# Увеличение версии данных, проверка категории (условием соединения), добавление операции и изменение помесячных и дневных итогов
+# выполняются одним запросом; при отказе причина определяется дополнительным запросом.
 @operation_router.post("", response_model=OperationResponse, status_code=status.HTTP_201_CREATED)
 async def create_operation(
     body: OperationCreate,
     current_user = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ) -> OperationResponse:
-    category_result = await session.execute(
-        select(Category).where(Category.id == body.categoryId)
+    data_version = data_version_cte(current_user.id)
+    inserted = (
+        insert(Operation)
+        .from_select(
+            ["name", "date", "amount", "category_id", "author", "seq"],
+            select(
+                literal(body.name, Operation.name.type),
+                literal(body.date, Operation.date.type),
+                literal(body.amount, Operation.amount.type),
+                Category.id,
+                Category.author,
+                data_version.c.seq
+            )
+            .join(data_version, data_version.c.author == Category.author)
+            .where(Category.id == body.categoryId)
+        )
+        .returning(*OPERATION_LIST_COLUMNS)
+        .cte("inserted_operation")
     )
-    category = category_result.scalar_one_or_none()
+    totals = totals_ctes(
+        select(inserted.c.author, inserted.c.category_id, inserted.c.date, inserted.c.amount, literal(1).label("sign"))
+    )
+    result = await session.execute(select(inserted).add_cte(*totals))
+    operation = result.one_or_none()
     
-    if not category:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Категория с указанным ID не существует."
-        )
+    if operation is None:
+        await _raise_access_error(session, current_user.id, "создать", category_id=body.categoryId)
+    
+    await session.commit()
+    event_hub.publish(current_user.id, "operation", "created", operation.id)
+    return operation._asdict()
 
-    if category.author != current_user.id:
+# Определение формата входных данных массовой загрузки по типу содержимого или расширению файла
+def _detect_bulk_format(content_type: Optional[str], filename: Optional[str]) -> Optional[str]:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"):
+        return "ndjson"
+    if content_type == "application/json":
+        return "json"
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        return "csv"
+    if extension in ("ndjson", "jsonl"):
+        return "ndjson"
+    if extension == "json":
+        return "json"
+    return None
+
+# Последовательное чтение записей из файла массовой загрузки. CSV и NDJSON читаются построчно;
+# JSON-массив загружается целиком, поэтому для больших объемов следует использовать CSV или NDJSON.
+def _read_bulk_records(file: BinaryIO, format: str) -> Iterator[Any]:
+    if format == "json":
+        records = json.load(file)
+        if not isinstance(records, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Ожидается JSON-массив операций."
+            )
+        yield from records
+        return
+    
+    text_file = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if format == "csv":
+        yield from csv.DictReader(text_file)
+        return
+    
+    for line in text_file:
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as error:
+                yield error
+
+# Разбор и проверка записей массовой загрузки до набора порции из BULK_BATCH_SIZE корректных операций или до конца данных.
+# Некорректные записи передаются в reject с номером строки и описанием ошибки.
+def _parse_bulk_batch(
+    records: Iterator[tuple[int, Any]],
+    category_ids: set[int],
+    reject: Callable[[int, str], None]
+) -> List[OperationCreate]:
+    operations = []
+    for row, record in records:
+        if isinstance(record, json.JSONDecodeError):
+            reject(row, f"Некорректный JSON: {record.msg}")
+            continue
+        try:
+            operation = OperationCreate.model_validate(record)
+        except ValidationError as error:
+            reject(row, "; ".join(
+                f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}" for item in error.errors()
+            ))
+            continue
+        if operation.categoryId not in category_ids:
+            reject(row, "Категория с указанным ID не существует.")
+            continue
+        
+        operations.append(operation)
+        if len(operations) >= BULK_BATCH_SIZE:
+            break
+    return operations
+
+# Массовая загрузка операций текущего пользователя (например, выписки из банка). Функция принимает CSV, NDJSON или JSON-массив
+# в теле запроса или в виде загруженного файла (multipart/form-data), проверяет принадлежность всех категорий одним запросом
+# и добавляет операции многострочными INSERT порциями по BULK_BATCH_SIZE. Некорректные строки пропускаются и перечисляются в ответе.
+@operation_router.post("/bulk", response_model=OperationBulkResult, status_code=status.HTTP_201_CREATED)
+async def create_operations_bulk(
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    format: Optional[Literal["csv", "ndjson", "json"]] = Query(None),
+    current_user = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+) -> OperationBulkResult:
+    if file is not None:
+        source = file.file
+        format = format or _detect_bulk_format(file.content_type, file.filename)
+    else:
+        # Тело запроса сохраняется во временный файл (в памяти до 1 МБ, затем на диске) по мере получения
+        source = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        async for chunk in request.stream():
+            source.write(chunk)
+        format = format or _detect_bulk_format(request.headers.get("content-type"), None)
+    source.seek(0)
+    
+    if format is None:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Нельзя создать операцию в категории другого пользователя."
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Неподдерживаемый формат данных. Допустимые форматы: csv, ndjson, json."
         )
-
-    operation = Operation(
-        name=body.name,
-        date=body.date,
-        amount=body.amount,
-        category_id=body.categoryId,
-        author=current_user.id
+    
+    # Все категории пользователя загружаются одним запросом для проверки принадлежности категорий операций
+    category_result = await session.execute(
+        select(Category.id).where(Category.author == current_user.id)
     )
+    category_ids = set(category_result.scalars().all())
     
-    session.add(operation)
-    await session.commit()
-    await session.refresh(operation)
+    inserted = 0
+    failed = 0
+    errors = []
+    seq = None
+    totals = TotalsDelta()
     
-    return operation
+    def reject(row: int, detail: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_BULK_ERRORS:
+            errors.append(OperationBulkError(row=row, detail=detail))
+    
+    records = enumerate(_read_bulk_records(source, format), start=1)
+    try:
+        while True:
+            # Разбор и проверка записей выполняются в отдельном потоке, чтобы не блокировать цикл событий
+            operations = await asyncio.to_thread(_parse_bulk_batch, records, category_ids, reject)
+            if not operations:
+                break
+            if seq is None:
+                # Версия данных увеличивается (а строка пользователя блокируется до конца транзакции) только перед первой вставкой;
+                # все добавленные операции получают один номер изменения
+                seq = await bump_data_version(session, current_user.id)
+            
+            batch = []
+            for operation in operations:
+                batch.append({
+                    "name": operation.name,
+                    "date": operation.date,
+                    "amount": operation.amount,
+                    "category_id": operation.categoryId,
+                    "author": current_user.id,
+                    "seq": seq,
+                })
+                totals.add(current_user.id, operation.categoryId, operation.date, operation.amount)
+            await session.execute(insert(Operation), batch)
+            inserted += len(batch)
+            if len(operations) < BULK_BATCH_SIZE:
+                break
+    except (UnicodeDecodeError, json.JSONDecodeError, csv.Error) as error:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Не удалось прочитать данные: {error}"
+        )
+    finally:
+        source.close()
+    
+    # Если ни одна операция не добавлена, версия данных пользователя не меняется
+    # Событие массовой загрузки не содержит ID операций: клиент получает их синхронизацией
+    if inserted:
+        await totals.apply(session)
+        await session.commit()
+        event_hub.publish(current_user.id, "operation", "created")
+    else:
+        await session.rollback()
+    
+    return OperationBulkResult(inserted=inserted, failed=failed, errors=errors)
 
 # Обновление существующей операции. Функция обновляет данные операции с указанным ID, проверяя права доступа и валидность новой категории (если она указана).
+# Увеличение версии данных, чтение прежних значений операции (с блокировкой строки), проверки принадлежности, изменение операции
+# и перенос суммы в помесячных и дневных итогах выполняются одним запросом; при отказе причина определяется дополнительными запросами.
 @operation_router.put("/{id}", response_model=OperationResponse)
 async def update_operation(
     id: int,
@@ -125,77 +679,87 @@ async def update_operation(
     current_user = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ) -> OperationResponse:
-    result = await session.execute(
-        select(Operation).where(Operation.id == id)
+    data_version = data_version_cte(current_user.id)
+    # Прежние значения читаются с блокировкой (FOR UPDATE), которая возвращает последнюю версию строки даже после ожидания
+    # параллельного изменения, поэтому сумма переносится из актуальных месяца и категории
+    old = (
+        select(Operation.id, Operation.author, Operation.category_id, Operation.date, Operation.amount)
+        .join(data_version, data_version.c.author == Operation.author)
+        .where(Operation.id == id)
+        .with_for_update(of=Operation)
+        .cte("old_operation")
     )
-    operation = result.scalar_one_or_none()
     
-    if not operation:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Операции с указанным ID не существует."
-        )
-    
-    if operation.author != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Нельзя обновить операцию другого пользователя."
-        )
-
+    values = {"seq": data_version.c.seq}
+    conditions = [Operation.id == old.c.id, Operation.author == data_version.c.author]
     if body.categoryId is not None:
-        category_result = await session.execute(
-            select(Category).where(Category.id == body.categoryId)
+        values["category_id"] = body.categoryId
+        conditions.append(
+            select(Category.id).where(Category.id == body.categoryId, Category.author == data_version.c.author).exists()
         )
-        category = category_result.scalar_one_or_none()
-        
-        if not category:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Категория с указанным ID не существует."
-            )
-        
-        if category.author != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Нельзя обновить операцию в категории другого пользователя."
-            )
-        operation.category_id = body.categoryId
-
     if body.name is not None:
-        operation.name = body.name
+        values["name"] = body.name
     if body.date is not None:
-        operation.date = body.date
+        values["date"] = body.date
     if body.amount is not None:
-        operation.amount = body.amount
+        values["amount"] = body.amount
+    updated = (
+        update(Operation)
+        .where(*conditions)
+        .values(**values)
+        .returning(*OPERATION_LIST_COLUMNS)
+        .cte("updated_operation")
+    )
     
-    await session.commit()
-    await session.refresh(operation)
+    # Сумма операции переносится в итоги новых месяца и категории
+    totals = totals_ctes(
+        select(old.c.author, old.c.category_id, old.c.date, old.c.amount, literal(-1).label("sign"))
+        .join(updated, updated.c.id == old.c.id),
+        select(updated.c.author, updated.c.category_id, updated.c.date, updated.c.amount, literal(1).label("sign"))
+    )
+    result = await execute_with_data_version(session, select(updated).add_cte(*totals), current_user.id)
+    operation = result.one_or_none()
     
-    return operation
+    if operation is None:
+        await _raise_access_error(session, current_user.id, "обновить", operation_id=id, category_id=body.categoryId)
+    
+    await session.commit()
+    event_hub.publish(current_user.id, "operation", "updated", operation.id)
+    return operation._asdict()
 
-# Удаление операции по ID. Функция удаляет операцию с указанным ID, если она принадлежит текущему пользователю
+# Удаление операции по ID. Функция удаляет операцию с указанным ID, если она принадлежит текущему пользователю.
+# Увеличение версии данных, удаление (DELETE ... RETURNING с проверкой принадлежности в условии), отметка об удалении
+# и вычитание суммы из помесячных и дневных итогов выполняются одним запросом.
 @operation_router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_operation(
     id: int,
     current_user = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
-    result = await session.execute(
-        select(Operation).where(Operation.id == id)
+    data_version = data_version_cte(current_user.id)
+    deleted = (
+        delete(Operation)
+        .where(Operation.id == id, Operation.author == data_version.c.author)
+        .returning(Operation.id, Operation.author, Operation.category_id, Operation.date, Operation.amount)
+        .cte("deleted_operation")
     )
-    operation = result.scalar_one_or_none()
-    
-    if not operation:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Операции с указанным ID не существует."
+    # Отметка об удалении позволяет клиентам узнать об удалении операции при синхронизации
+    tombstone = (
+        insert(Tombstone)
+        .from_select(
+            ["author", "entity", "entity_id", "seq"],
+            select(deleted.c.author, literal("operation"), deleted.c.id, data_version.c.seq)
+            .join(data_version, data_version.c.author == deleted.c.author)
         )
+        .cte("operation_tombstone")
+    )
+    totals = totals_ctes(
+        select(deleted.c.author, deleted.c.category_id, deleted.c.date, deleted.c.amount, literal(-1).label("sign"))
+    )
+    result = await execute_with_data_version(session, select(deleted.c.id).add_cte(tombstone, *totals), current_user.id)
     
-    if operation.author != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Нельзя удалить операцию другого пользователя."
-        )
+    if result.scalar_one_or_none() is None:
+        await _raise_access_error(session, current_user.id, "удалить", operation_id=id)
     
-    await session.delete(operation)
-    await session.commit()
\ No newline at end of file
+    await session.commit()
+    event_hub.publish(current_user.id, "operation", "deleted", id)
\ No newline at end of file
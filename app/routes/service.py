@@ -0,0 +1,43 @@
+"""
+Файл service предоставляет служебные маршруты для наблюдения за состоянием приложения.
+"""
+from fastapi import APIRouter, Depends
+from typing import List
+
+from ..database.connection import get_pool_stats
+from ..database.replicas import replica_router
+from ..schemas.service import PoolStats, ReplicaStats, HashPoolStats
+from . import users
+from .dependencies import get_current_user
+
+# Служебные маршруты доступны только аутентифицированным пользователям
+service_router = APIRouter(
+    prefix="/service",
+    tags=["Service"],
+    dependencies=[Depends(get_current_user)]
+)
+
+# Получение статистики пула соединений с базой данных. Функция возвращает текущее состояние пула и накопленное время ожидания соединений,
+# по которым можно подобрать размер пула под реальную нагрузку.
+@service_router.get("/pool", response_model=PoolStats)
+async def retrieve_pool_stats() -> PoolStats:
+    return get_pool_stats()
+
+# Получение состояния реплик базы данных. Функция возвращает для каждой реплики признак исправности и отставание от основной базы
+# по последней проверке; пока реплика неисправна, запросы чтения выполняются на основной базе.
+@service_router.get("/replicas", response_model=List[ReplicaStats])
+async def retrieve_replica_stats() -> List[ReplicaStats]:
+    return replica_router.stats()
+
+# Получение статистики пула хеширования паролей. Функция возвращает количество выполняемых задач и длину очереди:
+# постоянно заполненная очередь означает, что пулу не хватает потоков или процессов для входов и регистраций.
+@service_router.get("/hashing", response_model=HashPoolStats)
+async def retrieve_hash_pool_stats() -> HashPoolStats:
+    hasher = users.hash_password
+    return HashPoolStats(
+        executor=hasher.executor,
+        max_workers=hasher.max_workers,
+        max_queue=hasher.max_queue,
+        in_flight=hasher.in_flight,
+        queue_depth=hasher.queue_depth,
+    )
@@ -0,0 +1,75 @@
+"""
+Файл sync предоставляет маршрут синхронизации: получение изменений операций и категорий после номера изменения клиента.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from ..database.versions import get_data_version
+from ..models.operations import Operation
+from ..models.categories import Category
+from ..models.tombstones import Tombstone
+from ..schemas.sync import SyncResponse, sync_rows_adapter
+from .dependencies import get_current_user, get_read_session
+from .operations import OPERATION_LIST_COLUMNS
+from .categories import CATEGORY_LIST_COLUMNS
+
+sync_router = APIRouter(
+    prefix="/sync",
+    tags=["Sync"]
+)
+
+# Соответствие типа удаленного объекта и списка удаленных ID в ответе синхронизации
+TOMBSTONE_KEYS = {"operation": "operations", "category": "categories"}
+
+# Получение изменений данных текущего пользователя после номера изменения since. Функция возвращает операции и категории,
+# созданные или измененные после since, и ID удаленных объектов, а также номер изменения для следующего запроса.
+# Операции удаленной категории не перечисляются в deleted.operations: клиент удаляет их вместе с категорией.
+# При since=0 (первая синхронизация) или неизвестном номере изменения возвращаются все данные пользователя с признаком reset.
+@sync_router.get("", response_model=SyncResponse)
+async def sync_changes(
+    since: int = Query(0, ge=0),
+    current_user = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+) -> Response:
+    # Версия читается до выборки изменений: изменения, зафиксированные после ее чтения, попадут и в этот, и в следующий ответ,
+    # что безопасно, так как клиент просто перезаписывает полученные объекты
+    data_version = await get_data_version(session, current_user.id)
+    if data_version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден."
+        )
+    
+    seq = data_version.version
+    reset = since == 0 or since > seq
+    changes = {
+        "seq": seq,
+        "reset": reset,
+        "operations": [],
+        "categories": [],
+        "deleted": {"operations": [], "categories": []},
+    }
+    if since == seq:
+        return Response(content=sync_rows_adapter.dump_json(changes), media_type="application/json")
+    
+    operations_query = select(*OPERATION_LIST_COLUMNS).where(Operation.author == current_user.id)
+    categories_query = select(*CATEGORY_LIST_COLUMNS).where(Category.author == current_user.id)
+    if not reset:
+        operations_query = operations_query.where(Operation.seq > since)
+        categories_query = categories_query.where(Category.seq > since)
+        
+        tombstones = await session.execute(
+            select(Tombstone.entity, Tombstone.entity_id)
+            .where(Tombstone.author == current_user.id, Tombstone.seq > since)
+        )
+        for entity, entity_id in tombstones:
+            changes["deleted"][TOMBSTONE_KEYS[entity]].append(entity_id)
+    
+    operations = await session.execute(operations_query.order_by(Operation.date.desc(), Operation.id.desc()))
+    changes["operations"] = [row._asdict() for row in operations]
+    categories = await session.execute(categories_query)
+    changes["categories"] = [row._asdict() for row in categories]
+    
+    return Response(content=sync_rows_adapter.dump_json(changes), media_type="application/json")
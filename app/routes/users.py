@@ -1,15 +1,27 @@
 """
 Файл users предоставляет маршруты для работы с пользователями.
 """
-from fastapi import APIRouter, HTTPException, status, Depends
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import urlsplit
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
+from fastapi.responses import FileResponse, RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, func
+from sqlalchemy.exc import IntegrityError
 from ..database.connection import get_session
+from ..database.rollups import month_of
+from ..events.hub import event_hub
 from ..models.users import User
-from ..schemas.users import UserLogin, UserRegister, UserUpdate, UserResponse, UserBudgetUpdate, UserAvatarUpdate
+from ..models.categories import Category
+from ..models.monthly_totals import MonthlyTotal
+from ..schemas.users import UserLogin, UserRegister, UserUpdate, UserResponse, UserBudgetUpdate, UserAvatarUpdate, UserBudgetStatus
 from ..auth.hash_password import HashPassword
 from ..auth.jwt_handler import create_access_token
-from .dependencies import get_current_user
+from ..auth.user_cache import CachedUser, user_cache
+from ..storage.avatars import AVATAR_THUMBNAIL_SIZES, avatar_storage, decode_data_url, is_data_url
+from .dependencies import get_current_user, get_read_session, get_user_read_session, check_data_version
 
 user_router = APIRouter(
     prefix="/user",
@@ -18,25 +30,56 @@ user_router = APIRouter(
 
 hash_password = HashPassword()
 
+# Доля лимита бюджета, начиная с которой выдается предупреждение о приближении к лимиту
+BUDGET_WARNING_THRESHOLD = 0.8
+
+# Значения столбцов аватара пользователя: изображение в виде data URL сохраняется в хранилище аватаров (в БД хранится только его хеш),
+# а ссылка на внешний ресурс сохраняется как есть
+async def _avatar_values(avatar: Optional[str]) -> dict:
+    if avatar and is_data_url(avatar):
+        data = decode_data_url(avatar)
+        return {"avatar_hash": await asyncio.to_thread(avatar_storage.save, data), "avatar_url": None}
+    return {"avatar_hash": None, "avatar_url": avatar}
+
+# Изменение данных пользователя вместе с увеличением версии его данных одним запросом (UPDATE ... RETURNING).
+# Занятость email проверяется уникальным индексом, а не отдельным запросом.
+async def _update_user(session: AsyncSession, user_id: int, values: dict) -> User:
+    try:
+        result = await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(**values, data_version=User.data_version + 1, data_updated_at=func.now())
+            .returning(User)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Email уже занят другим пользователем."
+        )
+    user = result.scalar_one_or_none()
+    
+    if not user:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден."
+        )
+    
+    await session.commit()
+    event_hub.publish(user_id, "user", "updated", user_id)
+    return user
+
 # Регистрация нового пользователя. Функция создает нового пользователя с указанными данными, хеширует пароль, сохраняет пользователя в базе данных 
-# и возвращает JWT токен для аутентификации.
+# и возвращает JWT токен для аутентификации. Пользователь добавляется одним запросом (INSERT ... RETURNING id),
+# а занятость email проверяется уникальным индексом.
 @user_router.post("/register", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def register_user(
     data: UserRegister,
     session: AsyncSession = Depends(get_session)
 ) -> dict:
-    result = await session.execute(
-        select(User).where(User.email == data.email)
-    )
-    existing_user = result.scalar_one_or_none()
-    
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="User with supplied email already exists"
-        )
-
-    hashed_password = hash_password.create_hash(data.password)
+    hashed_password = await hash_password.hash(data.password)
     
     new_user = User(
         name=data.name,
@@ -44,12 +87,19 @@ async def register_user(
         email=data.email,
         password=hashed_password,
         budgetLimit=data.budgetLimit,
-        avatar=data.avatar
+        currency=data.currency,
+        **await _avatar_values(data.avatar)
     )
     
     session.add(new_user)
-    await session.commit()
-    await session.refresh(new_user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="User with supplied email already exists"
+        )
 
     token = create_access_token(new_user.email)
     
@@ -77,12 +127,18 @@ async def login_user(
             detail="Такого пользователя не существует!"
         )
 
-    if not hash_password.verify_hash(user.password, found_user.password):
+    is_valid, new_hash = await hash_password.verify_and_update(user.password, found_user.password)
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Неправильный пароль!"
         )
     
+    # Пароль, захешированный с другой стоимостью bcrypt, перехешируется с текущей
+    if new_hash is not None:
+        found_user.password = new_hash
+        await session.commit()
+    
     token = create_access_token(found_user.email)
     
     return {
@@ -93,17 +149,72 @@ async def login_user(
     }
 
 # Получение данных текущего аутентифицированного пользователя. Функция возвращает информацию о пользователе, который в данный момент аутентифицирован.
-@user_router.get("/me", response_model=UserResponse)
+@user_router.get("/me", response_model=UserResponse, dependencies=[Depends(check_data_version)])
 async def get_current_user_endpoint(
-    current_user: User = Depends(get_current_user)
+    current_user: CachedUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
 ) -> UserResponse:
-    return current_user
+    result = await session.execute(
+        select(User).where(User.id == current_user.id)
+    )
+    user = result.scalar_one_or_none()
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден."
+        )
+    
+    return user
+
+# Получение состояния бюджета текущего пользователя за текущий месяц (UTC). Функция берет расходы из помесячных итогов,
+# поэтому время ответа не зависит от количества операций пользователя; суммы складываются в БД в целых минимальных единицах валюты.
+@user_router.get("/me/budget-status", response_model=UserBudgetStatus)
+async def get_budget_status(
+    current_user: CachedUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session)
+) -> UserBudgetStatus:
+    month = month_of(datetime.now(timezone.utc))
+    expenses_query = (
+        select(func.coalesce(func.sum(MonthlyTotal.total), 0))
+        .join(Category, Category.id == MonthlyTotal.category_id)
+        .where(
+            MonthlyTotal.author == current_user.id,
+            MonthlyTotal.month == month,
+            Category.category_type == "expense"
+        )
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        select(User.budgetLimit, User.currency, expenses_query.label("expenses")).where(User.id == current_user.id)
+    )
+    row = result.one()
+    
+    budget_limit = row.budgetLimit
+    expenses = row.expenses
+    usage = float(expenses / budget_limit) if budget_limit > 0 else None
+    if usage is None or usage < BUDGET_WARNING_THRESHOLD:
+        budget_status = "ok"
+    elif usage <= 1:
+        budget_status = "warning"
+    else:
+        budget_status = "exceeded"
+    
+    return UserBudgetStatus(
+        month=month,
+        budgetLimit=budget_limit,
+        currency=row.currency,
+        expenses=expenses,
+        remaining=budget_limit - expenses,
+        usage=usage,
+        status=budget_status
+    )
 
 # Получение данных пользователя по ID. Функция позволяет получить информацию о пользователе по его ID.
 @user_router.get("/{user_id}", response_model=UserResponse)
 async def get_user_by_id(
     user_id: int,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_user_read_session)
 ) -> UserResponse:
     result = await session.execute(
         select(User).where(User.id == user_id)
@@ -123,7 +234,7 @@ async def get_user_by_id(
 async def update_user(
     user_id: int,
     data: UserUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ) -> UserResponse:
     if current_user.id != user_id:
@@ -132,42 +243,24 @@ async def update_user(
             detail="Нельзя обновить данные другого пользователя."
         )
     
-    result = await session.execute(
-        select(User).where(User.id == user_id)
-    )
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Пользователь не найден."
-        )
-
+    values = {}
     if data.name is not None:
-        user.name = data.name
+        values["name"] = data.name
     if data.surname is not None:
-        user.surname = data.surname
+        values["surname"] = data.surname
     if data.email is not None:
-        email_check = await session.execute(
-            select(User).where(User.email == data.email, User.id != user_id)
-        )
-        existing_user = email_check.scalar_one_or_none()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Email уже занят другим пользователем."
-            )
-        user.email = data.email
+        values["email"] = data.email
     if data.password is not None:
-        hashed_password = hash_password.create_hash(data.password)
-        user.password = hashed_password
+        values["password"] = await hash_password.hash(data.password)
     if data.budgetLimit is not None:
-        user.budgetLimit = data.budgetLimit
+        values["budgetLimit"] = data.budgetLimit
+    if data.currency is not None:
+        values["currency"] = data.currency
     if data.avatar is not None:
-        user.avatar = data.avatar
+        values.update(await _avatar_values(data.avatar))
     
-    await session.commit()
-    await session.refresh(user)
+    user = await _update_user(session, user_id, values)
+    user_cache.invalidate(current_user.email, data.email)
     
     return user
 
@@ -176,7 +269,7 @@ async def update_user(
 async def update_user_budget(
     user_id: int,
     budget_update: UserBudgetUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ) -> UserResponse:
     if current_user.id != user_id:
@@ -185,21 +278,8 @@ async def update_user_budget(
             detail="Нельзя обновить данные другого пользователя."
         )
     
-    result = await session.execute(
-        select(User).where(User.id == user_id)
-    )
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Пользователь не найден."
-        )
-    
-    user.budgetLimit = budget_update.budgetLimit
-    
-    await session.commit()
-    await session.refresh(user)
+    user = await _update_user(session, user_id, {"budgetLimit": budget_update.budgetLimit})
+    user_cache.invalidate(current_user.email)
     
     return user
 
@@ -208,7 +288,7 @@ async def update_user_budget(
 async def update_user_avatar(
     user_id: int,
     avatar_update: UserAvatarUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ) -> UserResponse:
     if current_user.id != user_id:
@@ -217,20 +297,65 @@ async def update_user_avatar(
             detail="Нельзя обновить данные другого пользователя."
         )
     
+    user = await _update_user(session, user_id, await _avatar_values(avatar_update.avatar))
+    user_cache.invalidate(current_user.email)
+    
+    return user
+
+# Получение изображения аватара пользователя. Функция отдает исходное изображение или миниатюру указанного размера
+# с заголовками ETag и Cache-Control; адрес с актуальной версией (параметр v) кэшируется клиентом без повторных запросов.
+# Если у пользователя указана ссылка на внешний аватар, выполняется перенаправление на нее (только для адресов http
+# и https; для остальных значений возвращается 404).
+@user_router.get("/{user_id}/avatar")
+async def get_user_avatar(
+    user_id: int,
+    request: Request,
+    size: Optional[int] = Query(None),
+    v: Optional[str] = Query(None),
+    session: AsyncSession = Depends(get_user_read_session)
+) -> Response:
+    if size is not None and size not in AVATAR_THUMBNAIL_SIZES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Допустимые размеры миниатюр: {', '.join(map(str, AVATAR_THUMBNAIL_SIZES))}."
+        )
+    
     result = await session.execute(
-        select(User).where(User.id == user_id)
+        select(User.avatar_hash, User.avatar_url).where(User.id == user_id)
     )
-    user = result.scalar_one_or_none()
+    user = result.one_or_none()
     
-    if not user:
+    if not user or not (user.avatar_hash or user.avatar_url):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Пользователь не найден."
+            detail="Аватар не найден."
         )
     
-    user.avatar = avatar_update.avatar
+    if not user.avatar_hash:
+        url = urlsplit(user.avatar_url)
+        if url.scheme not in ("http", "https") or not url.netloc:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Аватар не найден."
+            )
+        return RedirectResponse(user.avatar_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
     
-    await session.commit()
-    await session.refresh(user)
+    etag = f'"{user.avatar_hash}-{size or 0}"'
+    if v == user.avatar_hash[:16]:
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = "public, no-cache"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    resolved = avatar_storage.resolve(user.avatar_hash, size)
+    if resolved is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Аватар не найден."
+        )
+    path, content_type = resolved
     
-    return user
\ No newline at end of file
+    return FileResponse(path, media_type=content_type, headers=headers)
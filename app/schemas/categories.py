@@ -1,8 +1,9 @@
 """
 Файл categories представляет схемы для работы с категориями операций
 """
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, TypeAdapter
+from typing import Optional, List
+from typing_extensions import TypedDict
 
 # Базовый класс запроса для категории
 class CategoryRequest(BaseModel):
@@ -40,4 +41,15 @@ class CategoryResponse(CategoryCreate):
 
     class Config:
         # Включение поддержки ORM (конвертация из объектов SQLAlchemy)
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Строка списка категорий, выбранная из БД отдельными столбцами (поля совпадают с CategoryResponse)
+class CategoryRow(TypedDict):
+    id: int
+    name: str
+    color: str
+    category_type: str
+    author: int
+
+# Сериализатор списка категорий в JSON без создания моделей (схема компилируется один раз при импорте модуля)
+category_rows_adapter = TypeAdapter(List[CategoryRow])
@@ -0,0 +1,36 @@
+"""
+Файл money представляет типы денежных сумм и кодов валют для схем
+"""
+from decimal import Decimal
+from typing import Annotated
+from pydantic import AfterValidator, Field, PlainSerializer
+from ..database.types import MINOR_UNIT_DIGITS
+
+# Денежная сумма не более чем с двумя знаками после запятой (в БД хранится целым числом минимальных единиц валюты).
+# Сумма с большей точностью отклоняется при проверке запроса, а не округляется; в JSON сумма выводится числом, как и прежде.
+Money = Annotated[
+    Decimal,
+    Field(max_digits=18, decimal_places=MINOR_UNIT_DIGITS),
+    PlainSerializer(float, return_type=float, when_used="json"),
+]
+
+# Валюты ISO 4217, минимальная единица которых не равна сотой доле: без дробной части (JPY, KRW и др.) и с тремя или четырьмя
+# знаками после запятой (KWD, BHD, CLF и др.). Суммы всех пользователей хранятся с MINOR_UNIT_DIGITS знаками после запятой,
+# поэтому такие валюты не поддерживаются
+UNSUPPORTED_CURRENCIES = frozenset({
+    "BIF", "CLP", "DJF", "GNF", "ISK", "JPY", "KMF", "KRW", "PYG", "RWF", "UGX", "UYI", "VND", "VUV", "XAF", "XOF", "XPF",
+    "BHD", "IQD", "JOD", "KWD", "LYD", "OMR", "TND",
+    "CLF", "UYW",
+})
+
+# Проверка, что минимальная единица валюты совпадает с точностью хранения сумм
+def check_currency(code: str) -> str:
+    if code in UNSUPPORTED_CURRENCIES:
+        raise ValueError(f"Валюта {code} не поддерживается: суммы хранятся с {MINOR_UNIT_DIGITS} знаками после запятой")
+    return code
+
+# Трехбуквенный код валюты ISO 4217 (например, RUB) с двумя знаками после запятой
+CurrencyCode = Annotated[str, Field(pattern=r"^[A-Z]{3}$"), AfterValidator(check_currency)]
+
+# Валюта пользователя по умолчанию
+DEFAULT_CURRENCY = "RUB"
\ No newline at end of file
@@ -1,15 +1,17 @@
 """
 Файл operations представляет схемы для работы с финансовыми операциями
 """
-from pydantic import BaseModel, ConfigDict, field_validator, Field
-from datetime import datetime, timezone
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, TypeAdapter, field_validator, Field
+from datetime import date, datetime, timezone
+from typing import Optional, List
+from typing_extensions import TypedDict
+from .money import Money
 
 # Класс для создания операции
 class OperationCreate(BaseModel):
-    name: str
+    name: str = Field(..., max_length=256)  # Ограничение длины столбца name в БД
     date: datetime
-    amount: float
+    amount: Money
     categoryId: int
 
     # Валидатор для приведения даты к UTC
@@ -34,9 +36,9 @@ class OperationCreate(BaseModel):
 
 # Класс для обновления операции (все поля опциональны)
 class OperationUpdate(BaseModel):
-    name: Optional[str] = None
+    name: Optional[str] = Field(None, max_length=256)
     date: Optional[datetime] = None
-    amount: Optional[float] = None
+    amount: Optional[Money] = None
     categoryId: Optional[int] = None
 
     # Валидатор для приведения даты к UTC (с учетом опциональности)
@@ -55,7 +57,7 @@ class OperationResponse(BaseModel):
     id: int
     name: str
     date: datetime
-    amount: float
+    amount: Money
     categoryId: int = Field(alias="category_id")  # Сопоставление с полем category_id в БД
     author: int
 
@@ -71,8 +73,84 @@ class OperationResponse(BaseModel):
     model_config = ConfigDict(
         from_attributes=True,  # Поддержка ORM
         populate_by_name=True,  # Разрешение заполнения по имени (включая alias)
-        json_encoders={
-            # Кодировщик для datetime в JSON (в ISO формате с часовым поясом)
-            datetime: lambda v: v.isoformat() if v.tzinfo else v.replace(tzinfo=timezone.utc).isoformat()
-        }
-    )
\ No newline at end of file
+    )
+
+# Строка списка операций, выбранная из БД отдельными столбцами (поля совпадают с OperationResponse)
+class OperationRow(TypedDict):
+    id: int
+    name: str
+    date: datetime  # Столбец timestamptz, драйвер возвращает дату уже в UTC
+    amount: Money
+    category_id: int
+    author: int
+
+# Сериализаторы операции и списка операций в JSON без создания моделей (схемы компилируются один раз при импорте модуля)
+operation_row_adapter = TypeAdapter(OperationRow)
+operation_rows_adapter = TypeAdapter(List[OperationRow])
+
+# Класс страницы операций для постраничного (keyset) получения списка
+class OperationPage(BaseModel):
+    items: List[OperationResponse]
+    next_cursor: Optional[str] = None  # Непрозрачный курсор следующей страницы (None, если страница последняя)
+
+
+# Класс ошибки в строке при массовой загрузке операций
+class OperationBulkError(BaseModel):
+    row: int  # Номер строки (записи) во входных данных, начиная с 1
+    detail: str
+
+
+# Класс результата массовой загрузки операций
+class OperationBulkResult(BaseModel):
+    inserted: int  # Количество добавленных операций
+    failed: int  # Количество отклоненных строк
+    errors: List[OperationBulkError]  # Ошибки по строкам (не более MAX_BULK_ERRORS)
+
+
+# Класс параметров фильтрации операций (категория и диапазон дат в UTC)
+class OperationFilters(BaseModel):
+    categoryId: Optional[int] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+
+# Класс итоговой сводки по операциям (доходы, расходы и баланс)
+class OperationTotals(BaseModel):
+    totalIncome: Money
+    totalExpense: Money
+    incomeCount: int
+    expenseCount: int
+    balance: Money
+
+
+# Класс сводки по операциям за период (день, неделя, месяц или год)
+class OperationPeriodSummary(BaseModel):
+    period: datetime
+    income: Money
+    expense: Money
+    balance: Money
+
+
+# Класс сводки по операциям в разрезе категории
+class OperationCategorySummary(BaseModel):
+    categoryId: int
+    name: str
+    color: str
+    category_type: str
+    total: Money
+    count: int
+
+
+# Класс временного ряда сумм операций одного типа (значения соответствуют периодам временных рядов)
+class OperationSeries(BaseModel):
+    category_type: str
+    values: List[Money]
+
+
+# Класс временных рядов для графиков: начала периодов в хронологическом порядке (включая периоды без операций),
+# ряды доходов и расходов в порядке наборов данных графика и итоги категорий по убыванию суммы
+class OperationTimeseries(BaseModel):
+    bucket: str
+    periods: List[date]
+    series: List[OperationSeries]
+    categories: List[OperationCategorySummary]
@@ -0,0 +1,32 @@
+"""
+Файл service представляет схемы для служебных маршрутов (состояние и статистика приложения)
+"""
+from typing import Optional
+from pydantic import BaseModel
+
+# Класс статистики пула соединений с базой данных
+class PoolStats(BaseModel):
+    size: int  # Размер пула (постоянные соединения)
+    checked_in: int  # Свободные соединения в пуле
+    checked_out: int  # Соединения, выданные в данный момент
+    overflow: int  # Дополнительные соединения сверх размера пула
+    checkouts: int  # Общее количество выдач соединений
+    timeouts: int  # Количество выдач, завершившихся таймаутом
+    wait_time_total: float  # Суммарное время ожидания соединений в секундах
+    wait_time_avg: float  # Среднее время ожидания соединения в секундах
+    wait_time_max: float  # Максимальное время ожидания соединения в секундах
+
+# Класс состояния реплики базы данных
+class ReplicaStats(BaseModel):
+    url: str  # Адрес реплики (без пароля)
+    healthy: bool  # Направляются ли на реплику запросы чтения
+    lag: Optional[float]  # Отставание от основной базы в секундах по последней проверке (None - проверки еще не было)
+    failures: int  # Количество исключений реплики из-за ошибок подключения
+
+# Класс статистики пула хеширования паролей
+class HashPoolStats(BaseModel):
+    executor: str  # Тип пула: "thread" или "process"
+    max_workers: int  # Количество потоков или процессов в пуле
+    max_queue: int  # Максимальное количество задач в очереди (сверх него запросы отклоняются с кодом 503)
+    in_flight: int  # Задачи, выполняемые в данный момент
+    queue_depth: int  # Задачи, ожидающие свободного потока или процесса
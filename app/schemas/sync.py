@@ -0,0 +1,39 @@
+"""
+Файл sync представляет схемы для синхронизации изменений операций и категорий
+"""
+from pydantic import BaseModel, TypeAdapter
+from typing import List
+from typing_extensions import TypedDict
+from .operations import OperationResponse, OperationRow
+from .categories import CategoryResponse, CategoryRow
+
+# Класс ID объектов, удаленных после номера изменения клиента. Удаление категории означает и удаление всех ее операций:
+# клиент после применения измененных объектов удаляет у себя категории из categories вместе с их операциями
+class SyncDeleted(BaseModel):
+    operations: List[int]
+    categories: List[int]
+
+
+# Класс ответа синхронизации: объекты, созданные или измененные после номера изменения клиента, и ID удаленных объектов
+class SyncResponse(BaseModel):
+    seq: int  # Номер изменения, который клиент передает в следующем запросе (since)
+    reset: bool  # Ответ содержит все данные пользователя, клиент заменяет ими свои данные
+    operations: List[OperationResponse]
+    categories: List[CategoryResponse]
+    deleted: SyncDeleted
+
+
+# Ответ синхронизации в виде строк столбцов для сериализации без создания моделей (поля совпадают с SyncResponse)
+class SyncDeletedRows(TypedDict):
+    operations: List[int]
+    categories: List[int]
+
+class SyncRows(TypedDict):
+    seq: int
+    reset: bool
+    operations: List[OperationRow]
+    categories: List[CategoryRow]
+    deleted: SyncDeletedRows
+
+# Сериализатор ответа синхронизации в JSON (схема компилируется один раз при импорте модуля)
+sync_rows_adapter = TypeAdapter(SyncRows)
@@ -2,7 +2,9 @@
 Файл users представляет схемы для работы с пользователями
 """
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import Optional, Literal
+from datetime import date
+from .money import CurrencyCode, DEFAULT_CURRENCY, Money
 
 # Класс для входа пользователя
 class UserLogin(BaseModel):
@@ -24,7 +26,8 @@ class UserRegister(UserLogin):
     surname: str = Field(..., min_length=2, max_length=50)
     email: EmailStr
     password: str = Field(..., min_length=6, max_length=255)
-    budgetLimit: Optional[float] = 0.0
+    budgetLimit: Optional[Money] = 0
+    currency: CurrencyCode = DEFAULT_CURRENCY
     avatar: Optional[str] = None
 
     class Config:
@@ -36,6 +39,7 @@ class UserRegister(UserLogin):
                 "email": "example@yandex.ru",
                 "password": "qwerty",
                 "budgetLimit": 10000.0,
+                "currency": "RUB",
                 "avatar": "https://example.com/avatar.jpg"
             }
         }
@@ -46,7 +50,8 @@ class UserUpdate(UserRegister):
     surname: Optional[str] = None
     email: Optional[EmailStr] = None
     password: Optional[str] = None
-    budgetLimit: Optional[float] = None
+    budgetLimit: Optional[Money] = None
+    currency: Optional[CurrencyCode] = None
     avatar: Optional[str] = None
 
 # Класс ответа API для пользователя
@@ -55,7 +60,8 @@ class UserResponse(UserRegister):
     name: str
     surname: str
     email: EmailStr
-    budgetLimit: float
+    budgetLimit: Money
+    currency: str
     avatar: Optional[str] = None
 
     class Config:
@@ -63,8 +69,18 @@ class UserResponse(UserRegister):
 
 # Класс для обновления бюджета пользователя
 class UserBudgetUpdate(UserUpdate):
-    budgetLimit: float
+    budgetLimit: Money
 
 # Класс для обновления аватара пользователя
 class UserAvatarUpdate(UserUpdate):
-    avatar: str
\ No newline at end of file
+    avatar: str
+
+# Класс состояния бюджета пользователя за текущий месяц
+class UserBudgetStatus(BaseModel):
+    month: date  # Первый день текущего месяца (UTC)
+    budgetLimit: Money
+    currency: str
+    expenses: Money  # Расходы за текущий месяц
+    remaining: Money  # Остаток бюджета (отрицательный при превышении лимита)
+    usage: Optional[float] = None  # Доля израсходованного лимита (None, если лимит не задан)
+    status: Literal["ok", "warning", "exceeded"]
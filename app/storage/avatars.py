@@ -0,0 +1,148 @@
+"""
+Файл avatars содержит хранилище аватаров пользователей, адресуемое по содержимому (имя файла - SHA-256 хеш изображения),
+и функции разбора аватаров, присылаемых клиентом в виде data URL (base64).
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional
+from fastapi import HTTPException, status
+from ..config import settings
+
+# Pillow - необязательная зависимость: без нее миниатюры не создаются и вместо них отдается исходное изображение
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Размеры (в пикселях) квадратных миниатюр, создаваемых при загрузке аватара
+AVATAR_THUMBNAIL_SIZES = (64, 192)
+
+# Сигнатуры поддерживаемых форматов изображений и соответствующие типы содержимого
+_IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+# Регулярное выражение для разбора data URL вида data:image/png;base64,....
+_DATA_URL_PATTERN = re.compile(r"^data:(?P<mime>[\w/+.-]*)(;[\w=.-]+)*;base64,(?P<data>.*)$", re.DOTALL)
+
+# Определение типа изображения по его первым байтам (None, если формат не поддерживается)
+def detect_image_type(data: bytes) -> Optional[str]:
+    for signature, content_type in _IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+# Проверка, является ли значение аватара изображением в виде data URL (а не ссылкой на внешний ресурс)
+def is_data_url(value: str) -> bool:
+    return value.startswith("data:")
+
+# Декодирование data URL в байты изображения с проверкой размера и формата
+def decode_data_url(value: str) -> bytes:
+    match = _DATA_URL_PATTERN.match(value)
+    if not match:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Аватар должен быть изображением в формате data URL (base64)."
+        )
+    try:
+        data = base64.b64decode(match.group("data"), validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Некорректные данные изображения аватара."
+        )
+    if len(data) > settings.avatar_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Слишком большой размер изображения аватара."
+        )
+    if detect_image_type(data) is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Неподдерживаемый формат изображения аватара."
+        )
+    return data
+
+# Хранилище аватаров в локальной файловой системе. Файлы раскладываются по подкаталогам по первым символам хеша,
+# одинаковые изображения хранятся в одном экземпляре.
+class LocalAvatarStorage:
+    def __init__(self, root: str):
+        self.root = Path(root)
+    
+    # Путь к исходному изображению (size=None) или к миниатюре указанного размера
+    def path(self, avatar_hash: str, size: Optional[int] = None) -> Path:
+        name = avatar_hash if size is None else f"{avatar_hash}_{size}"
+        return self.root / avatar_hash[:2] / avatar_hash[2:4] / name
+    
+    # Сохранение изображения и его миниатюр. Возвращает хеш, по которому изображение доступно в хранилище.
+    def save(self, data: bytes) -> str:
+        avatar_hash = hashlib.sha256(data).hexdigest()
+        path = self.path(avatar_hash)
+        if not path.exists():
+            self._write(path, data)
+            self._create_thumbnails(avatar_hash, path)
+        return avatar_hash
+    
+    # Чтение исходного изображения из хранилища
+    def read(self, avatar_hash: str) -> bytes:
+        return self.path(avatar_hash).read_bytes()
+    
+    # Файл, который следует отдать клиенту, и его тип: миниатюра, если она есть, иначе исходное изображение
+    def resolve(self, avatar_hash: str, size: Optional[int] = None) -> Optional[tuple[Path, str]]:
+        if size is not None:
+            thumbnail = self.path(avatar_hash, size)
+            if thumbnail.exists():
+                return thumbnail, "image/png"
+        path = self.path(avatar_hash)
+        if not path.exists():
+            return None
+        with path.open("rb") as file:
+            content_type = detect_image_type(file.read(16)) or "application/octet-stream"
+        return path, content_type
+    
+    # Атомарная запись файла: через временный файл в том же каталоге и переименование
+    def _write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    
+    # Создание квадратных миниатюр в формате PNG (только при установленном Pillow)
+    def _create_thumbnails(self, avatar_hash: str, path: Path) -> None:
+        if Image is None:
+            return
+        try:
+            with Image.open(path) as image:
+                image = image.convert("RGBA")
+                side = min(image.size)
+                left = (image.width - side) // 2
+                top = (image.height - side) // 2
+                square = image.crop((left, top, left + side, top + side))
+                for size in AVATAR_THUMBNAIL_SIZES:
+                    thumbnail = square.resize((size, size), Image.LANCZOS)
+                    thumbnail_path = self.path(avatar_hash, size)
+                    temp_path = thumbnail_path.with_name(thumbnail_path.name + ".tmp")
+                    thumbnail.save(temp_path, format="PNG")
+                    os.replace(temp_path, thumbnail_path)
+        except (OSError, Image.DecompressionBombError):
+            # Изображение, которое Pillow не может прочитать или которое слишком велико для декодирования,
+            # отдается без миниатюр
+            pass
+
+# Общий для приложения экземпляр хранилища аватаров
+avatar_storage = LocalAvatarStorage(settings.avatar_storage_path)
@@ -1,10 +1,18 @@
 """
 Тесты для маршрутов аутентификации пользователей
 """
+import asyncio
 import pytest
 import httpx
 from datetime import datetime
-from ..auth.jwt_handler import create_access_token
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import jwt
+from ..auth.jwt_handler import TokenVerifier, create_access_token
+from ..auth.hash_password import HashPassword
+from ..models.users import User
+from ..routes import users
 
 @pytest.mark.asyncio
 async def test_register_new_user(client: httpx.AsyncClient) -> None:
@@ -103,4 +111,138 @@ async def test_register_duplicate_email(client: httpx.AsyncClient) -> None:
     response = await client.post("/user/register", json=payload)
     
     assert response.status_code == 409
-    assert "already exists" in response.json()["detail"]
\ No newline at end of file
+    assert "already exists" in response.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_login_rehashes_password_with_new_cost(client: httpx.AsyncClient, test_session: AsyncSession, monkeypatch) -> None:
+    """Тест перехеширования пароля при входе после изменения стоимости bcrypt"""
+    register_payload = {
+        "name": "Олег",
+        "surname": "Олегов",
+        "email": "rehash@server.com",
+        "password": "testpassword123",
+        "budgetLimit": 1000.0
+    }
+    await client.post("/user/register", json=register_payload)
+    
+    # Стоимость хеширования меняется после регистрации пользователя
+    monkeypatch.setattr(users, "hash_password", HashPassword(rounds=4))
+    
+    response = await client.post("/user/login", json={"email": "rehash@server.com", "password": "testpassword123"})
+    assert response.status_code == 200
+    
+    result = await test_session.execute(select(User.password).where(User.email == "rehash@server.com"))
+    stored_hash = result.scalar_one()
+    assert stored_hash.startswith("$2b$04$")
+    
+    # С перехешированным паролем вход продолжает работать
+    response = await client.post("/user/login", json={"email": "rehash@server.com", "password": "testpassword123"})
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_hash_pool_backpressure() -> None:
+    """Тест ограничения очереди пула хеширования"""
+    hasher = HashPassword(rounds=10, max_workers=1, max_queue=1)
+    try:
+        tasks = [asyncio.create_task(hasher.hash("password")) for _ in range(3)]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        rejected = [result for result in results if isinstance(result, HTTPException)]
+        assert len(rejected) == 1
+        assert rejected[0].status_code == 503
+        assert hasher.queue_depth == 0
+        assert all(hasher.verify_hash("password", result) for result in results if isinstance(result, str))
+    finally:
+        hasher.shutdown()
+
+@pytest.mark.asyncio
+async def test_hash_pool_counts_cancelled_requests() -> None:
+    """Тест учета задачи хеширования до ее завершения в пуле, даже если ожидающий запрос отменен"""
+    hasher = HashPassword(rounds=10, max_workers=1, max_queue=0)
+    try:
+        task = asyncio.create_task(hasher.hash("password"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        
+        # Задача продолжает выполняться в пуле, поэтому новые задачи отклоняются
+        assert hasher.in_flight == 1
+        with pytest.raises(HTTPException):
+            await hasher.hash("password")
+        
+        for _ in range(200):
+            if hasher.in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert hasher.in_flight == 0
+        assert hasher.verify_hash("password", await hasher.hash("password"))
+    finally:
+        hasher.shutdown()
+
+def test_token_standard_claims_and_expiry() -> None:
+    """Тест стандартных полей токена (exp, iat, kid) и отклонения истекшего токена"""
+    verifier = TokenVerifier({"k1": "secret-1"}, "k1", ttl=60)
+    token = verifier.create("user@server.com")
+    
+    assert jwt.get_unverified_header(token)["kid"] == "k1"
+    data = verifier.verify(token)
+    assert data["user"] == "user@server.com"
+    assert data["exp"] - data["iat"] == 60
+    
+    expired = TokenVerifier({"k1": "secret-1"}, "k1", ttl=-10).create("user@server.com")
+    with pytest.raises(HTTPException) as error:
+        verifier.verify(expired)
+    assert error.value.status_code == 403
+    
+    # Токены без ID ключа или без обязательных полей отклоняются
+    for payload, headers in (({"user": "user@server.com", "expires": 0}, None), ({"user": "user@server.com"}, {"kid": "k1"})):
+        with pytest.raises(HTTPException) as error:
+            verifier.verify(jwt.encode(payload, "secret-1", algorithm="HS256", headers=headers))
+        assert error.value.status_code == 400
+
+def test_token_key_rotation() -> None:
+    """Тест смены ключа подписи: токены прежнего ключа действуют, пока ключ есть в наборе"""
+    old_token = TokenVerifier({"k1": "secret-1"}, "k1").create("user@server.com")
+    
+    rotated = TokenVerifier({"k1": "secret-1", "k2": "secret-2"}, "k2")
+    new_token = rotated.create("user@server.com")
+    assert jwt.get_unverified_header(new_token)["kid"] == "k2"
+    assert rotated.verify(old_token)["user"] == "user@server.com"
+    assert rotated.verify(new_token)["user"] == "user@server.com"
+    
+    retired = TokenVerifier({"k2": "secret-2"}, "k2")
+    with pytest.raises(HTTPException):
+        retired.verify(old_token)
+    assert retired.verify(new_token)["user"] == "user@server.com"
+    
+    # Подпись другим ключом с тем же kid не принимается
+    forged = TokenVerifier({"k2": "other-secret"}, "k2").create("admin@server.com")
+    with pytest.raises(HTTPException):
+        retired.verify(forged)
+    
+    with pytest.raises(ValueError):
+        TokenVerifier({"k1": "secret-1"}, "k2")
+
+def test_token_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Тест кэша проверенных токенов: повторная проверка не декодирует токен, размер кэша ограничен"""
+    verifier = TokenVerifier({"k1": "secret-1"}, "k1", cache_size=2)
+    tokens = [verifier.create(f"user{index}@server.com") for index in range(3)]
+    
+    decode_calls = 0
+    decode = jwt.decode
+    def counting_decode(*args, **kwargs):
+        nonlocal decode_calls
+        decode_calls += 1
+        return decode(*args, **kwargs)
+    monkeypatch.setattr(jwt, "decode", counting_decode)
+    
+    for _ in range(3):
+        assert verifier.verify(tokens[0])["user"] == "user0@server.com"
+    assert decode_calls == 1
+    
+    verifier.verify(tokens[1])
+    verifier.verify(tokens[2])
+    assert len(verifier) == 2
+    verifier.verify(tokens[0])
+    assert decode_calls == 4
@@ -0,0 +1,35 @@
+"""
+Тесты защиты базы данных приложения от наполнения нагрузочным тестом
+"""
+import sys
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..benchmarks import load
+from ..config import settings
+from ..database.connection import engine
+
+@pytest.mark.asyncio
+async def test_seed_refuses_application_database(test_session: AsyncSession) -> None:
+    """Тест наполнения: таблицы не пересоздаются, если движок приложения указывает на базу приложения"""
+    assert load.same_database(engine.url, settings.database_url)
+    with pytest.raises(RuntimeError):
+        await load.seed(1, 1, 1, settings.database_url)
+    assert await test_session.scalar(text("SELECT to_regclass('operations')")) is not None
+
+def test_application_database_url_ignores_loaded_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Тест URL базы приложения: определяется заново по DATABASE_URL, не затрагивая уже загруженные настройки"""
+    url = make_url(settings.database_url).set(database="finance_app_other").render_as_string(hide_password=False)
+    monkeypatch.setenv("DATABASE_URL", url)
+    assert load.application_database_url() == url
+    assert sys.modules["app.config"].settings is settings
+    assert settings.database_url != url
+
+def test_main_refuses_application_database(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Тест запуска нагрузочного теста: база теста, совпадающая с базой приложения, отклоняется до наполнения"""
+    monkeypatch.setattr(load, "ensure_database", None)
+    monkeypatch.setattr(sys, "argv", ["load", "--database-url", settings.database_url])
+    with pytest.raises(SystemExit) as error:
+        load.main()
+    assert error.value.code == 2
@@ -0,0 +1,126 @@
+"""
+Тесты промежуточного слоя сжатия ответов
+"""
+import asyncio
+import gzip
+import zlib
+import pytest
+import httpx
+from starlette.responses import Response, StreamingResponse
+from ..middleware.compression import CompressionMiddleware, select_encoding
+
+@pytest.fixture
+async def headers(client: httpx.AsyncClient) -> dict:
+    """Фикстура для заголовков авторизации пользователя с категорией и операциями"""
+    response = await client.post("/user/register", json={
+        "name": "Test",
+        "surname": "User",
+        "email": "testuser@server.com",
+        "password": "testpassword123"
+    })
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    category = await client.post("/category", json={"name": "Продукты", "color": "#FF33A8", "category_type": "expense"}, headers=headers)
+    records = "\n".join(
+        f'{{"name": "Операция {i}", "date": "2024-12-01T10:00:00Z", "amount": -{i}.5, "categoryId": {category.json()["id"]}}}'
+        for i in range(200)
+    )
+    await client.post("/operation/bulk", content=records, headers={**headers, "Content-Type": "application/x-ndjson"})
+    return headers
+
+async def capture(app, accept_encoding: str = "gzip") -> list:
+    """Выполнение запроса к ASGI-приложению с сохранением всех отправленных сообщений"""
+    messages = []
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    disconnected = asyncio.Event()
+    async def receive():
+        # Клиент не отключается до конца ответа
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+    async def send(message):
+        messages.append(message)
+    await app(scope, receive, send)
+    disconnected.set()
+    return messages
+
+
+def test_select_encoding() -> None:
+    """Тест выбора способа сжатия по заголовку Accept-Encoding"""
+    encodings = ("zstd", "br", "gzip")
+    assert select_encoding("gzip, deflate, br, zstd", encodings) == "zstd"
+    assert select_encoding("gzip, br;q=0.9", encodings) == "gzip"
+    assert select_encoding("br;q=0, gzip;q=0.5", encodings) == "gzip"
+    assert select_encoding("*", encodings) == "zstd"
+    assert select_encoding("identity", encodings) is None
+    assert select_encoding("", encodings) is None
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding, module", [("gzip", None), ("br", "brotli"), ("zstd", "zstandard")])
+async def test_compressed_list(client: httpx.AsyncClient, headers: dict, encoding: str, module: str) -> None:
+    """Тест сжатия большого списка операций каждым способом сжатия"""
+    if module:
+        # brotli и zstd доступны только при установленной группе зависимостей compression
+        pytest.importorskip(module)
+    plain = await client.get("/operation", headers={**headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    
+    response = await client.get("/operation", headers={**headers, "Accept-Encoding": encoding})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(plain.content) / 4
+    assert response.json() == plain.json()
+    # ETag сохраняется, и условный запрос по нему работает для сжатого ответа
+    assert response.headers["etag"] == plain.headers["etag"]
+    not_modified = await client.get("/operation", headers={**headers, "Accept-Encoding": encoding, "If-None-Match": response.headers["etag"]})
+    assert not_modified.status_code == 304
+
+@pytest.mark.asyncio
+async def test_small_and_compressed_responses_skipped(client: httpx.AsyncClient, headers: dict) -> None:
+    """Тест пропуска маленьких ответов и уже сжатого содержимого"""
+    response = await client.get("/user/me", headers={**headers, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    
+    response = await client.get("/operation/export", params={"gzip": "true"}, headers={**headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-type"] == "application/gzip"
+    assert "content-encoding" not in response.headers
+    assert gzip.decompress(response.content).startswith(b"id,name,date")
+
+@pytest.mark.asyncio
+async def test_streaming_response_compressed_by_chunks() -> None:
+    """Тест сжатия потокового ответа по частям: каждая часть распаковывается сразу после получения"""
+    chunks = [("строка %d\n" % i).encode() * 10 for i in range(5)]
+    async def generate():
+        for chunk in chunks:
+            yield chunk
+    app = CompressionMiddleware(StreamingResponse(generate(), media_type="application/x-ndjson"), minimum_size=10_000)
+    
+    messages = await capture(app)
+    start, bodies = messages[0], messages[1:]
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    
+    decompressor = zlib.decompressobj(wbits=31)
+    for chunk, message in zip(chunks, bodies):
+        assert decompressor.decompress(message["body"]) == chunk
+    assert bodies[-1]["more_body"] is False
+    decompressor.decompress(bodies[-1]["body"])
+    assert decompressor.eof
+
+@pytest.mark.asyncio
+async def test_excluded_content_types() -> None:
+    """Тест пропуска изображений, событий и ответов с уже указанным способом сжатия"""
+    body = b"x" * 5000
+    for response in (
+        Response(body, media_type="image/png"),
+        Response(body, media_type="text/event-stream"),
+        Response(gzip.compress(body), media_type="application/json", headers={"Content-Encoding": "gzip"}),
+    ):
+        messages = await capture(CompressionMiddleware(response))
+        assert messages[1]["body"] == response.body
+    
+    messages = await capture(CompressionMiddleware(Response(body, media_type="text/plain", headers={"ETag": '"abc"'})))
+    headers = dict(messages[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"etag"] == b'W/"abc"'
+    assert gzip.decompress(messages[1]["body"]) == body
@@ -0,0 +1,122 @@
+"""
+Тесты условных GET-запросов (ETag, If-None-Match, 304) по версии данных пользователя
+"""
+import pytest
+import httpx
+from sqlalchemy import event
+from .conftest import engine
+
+@pytest.fixture
+async def access_token(client: httpx.AsyncClient) -> str:
+    """Фикстура для создания токена доступа"""
+    response = await client.post("/user/register", json={
+        "name": "Test",
+        "surname": "User",
+        "email": "testuser@server.com",
+        "password": "testpassword123",
+        "budgetLimit": 10000.0
+    })
+    return response.json()["access_token"]
+
+@pytest.fixture
+async def headers(access_token: str) -> dict:
+    """Фикстура для заголовков авторизации"""
+    return {"Authorization": f"Bearer {access_token}"}
+
+@pytest.fixture
+async def category_id(client: httpx.AsyncClient, headers: dict) -> int:
+    """Фикстура для создания категории"""
+    response = await client.post("/category", json={"name": "Продукты", "color": "#FF33A8", "category_type": "expense"}, headers=headers)
+    return response.json()["id"]
+
+@pytest.fixture
+def statements():
+    """Фикстура для подсчета SQL-запросов, выполненных во время теста"""
+    executed = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/operation", "/category", "/user/me"])
+async def test_not_modified(client: httpx.AsyncClient, headers: dict, category_id: int, statements: list, path: str) -> None:
+    """Тест ответа 304 на повторный запрос без изменений данных (без загрузки строк из БД)"""
+    response = await client.get(path, headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert "Last-Modified" in response.headers
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    
+    statements.clear()
+    response = await client.get(path, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    # Выполняется только запрос версии данных пользователя
+    assert len(statements) == 1
+    assert "data_version" in statements[0]
+
+@pytest.mark.asyncio
+async def test_etag_changes_on_mutations(client: httpx.AsyncClient, headers: dict, category_id: int) -> None:
+    """Тест изменения ETag после каждого изменяющего запроса"""
+    etags = set()
+    
+    async def current_etag() -> str:
+        response = await client.get("/operation", headers=headers)
+        assert response.status_code == 200
+        return response.headers["ETag"]
+    
+    etags.add(await current_etag())
+    
+    response = await client.post("/operation", json={
+        "name": "Кофе", "date": "2024-12-01T10:00:00Z", "amount": -250.0, "categoryId": category_id
+    }, headers=headers)
+    operation_id = response.json()["id"]
+    etags.add(await current_etag())
+    
+    await client.put(f"/operation/{operation_id}", json={"amount": -300.0}, headers=headers)
+    etags.add(await current_etag())
+    
+    await client.put(f"/category/{category_id}", json={"name": "Кафе"}, headers=headers)
+    etags.add(await current_etag())
+    
+    user_id = (await client.get("/user/me", headers=headers)).json()["id"]
+    await client.patch(f"/user/{user_id}/budget", json={"budgetLimit": 500.0}, headers=headers)
+    etags.add(await current_etag())
+    
+    await client.delete(f"/operation/{operation_id}", headers=headers)
+    etags.add(await current_etag())
+    
+    await client.delete(f"/category/{category_id}", headers=headers)
+    etags.add(await current_etag())
+    
+    assert len(etags) == 7
+    
+    # Старый ETag больше не подходит, ответ содержит актуальные данные
+    old_etag = sorted(etags)[0]
+    response = await client.get("/operation", headers={**headers, "If-None-Match": old_etag})
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_etag_is_per_user(client: httpx.AsyncClient, headers: dict, category_id: int) -> None:
+    """Тест независимости версий данных разных пользователей"""
+    etag = (await client.get("/category", headers=headers)).headers["ETag"]
+    
+    response = await client.post("/user/register", json={
+        "name": "Other",
+        "surname": "User",
+        "email": "otheruser@server.com",
+        "password": "testpassword123"
+    })
+    other_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    await client.post("/category", json={"name": "Кафе", "color": "#FF33A8", "category_type": "expense"}, headers=other_headers)
+    
+    # Изменения другого пользователя не меняют версию, а его ETag не подходит первому пользователю
+    response = await client.get("/category", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    response = await client.get("/category", headers={**other_headers, "If-None-Match": etag})
+    assert response.status_code == 200
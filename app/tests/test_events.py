@@ -0,0 +1,144 @@
+"""
+Тесты для потока событий изменения данных
+"""
+import pytest
+import httpx
+import asyncio
+import json
+from urllib.parse import urlsplit
+from ..events.bridge import NotifyBridge, bridge_dsn
+from ..events.hub import EventHub, RESET_EVENT, event_hub
+from ..main import app
+from .conftest import DATABASE_URL
+
+async def register(client: httpx.AsyncClient, email: str) -> dict:
+    """Регистрирует пользователя и возвращает заголовки авторизации"""
+    response = await client.post("/user/register", json={
+        "name": "Test", "surname": "User", "email": email, "password": "testpassword123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+class EventStream:
+    """Подключение к потоку событий напрямую через ASGI (транспорт httpx дожидается окончания ответа, а поток бесконечен)"""
+
+    def __init__(self, url: str, headers: dict):
+        parts = urlsplit(url)
+        self.scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": parts.path, "raw_path": parts.path.encode(), "query_string": parts.query.encode(), "root_path": "",
+            "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+            "server": ("localhost", 80), "client": ("127.0.0.1", 50000),
+        }
+        self.messages: asyncio.Queue = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+        self.buffer = b""
+
+    async def receive(self) -> dict:
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def __aenter__(self) -> "EventStream":
+        self.task = asyncio.create_task(app(self.scope, self.receive, self.messages.put))
+        self.start = await asyncio.wait_for(self.messages.get(), 5)
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, 5)
+
+    async def next_event(self) -> tuple[str, dict]:
+        """Возвращает тип и данные следующего события (комментарии keep-alive пропускаются)"""
+        while True:
+            block, separator, rest = self.buffer.partition(b"\n\n")
+            if separator:
+                self.buffer = rest
+                fields = dict(line.split(": ", 1) for line in block.decode().split("\n") if line and not line.startswith(":") and ": " in line)
+                if "event" in fields:
+                    return fields["event"], json.loads(fields["data"])
+                continue
+            message = await asyncio.wait_for(self.messages.get(), 5)
+            self.buffer += message.get("body", b"")
+
+@pytest.mark.asyncio
+async def test_events_stream(client: httpx.AsyncClient) -> None:
+    """Тест потока событий: изменения пользователя приходят во все его подключения, изменения других пользователей - нет"""
+    headers = await register(client, "events@server.com")
+    other_headers = await register(client, "other@server.com")
+
+    async with EventStream("/events", headers) as first, EventStream("/events", headers) as second:
+        assert first.start["status"] == 200
+        assert dict(first.start["headers"])[b"content-type"].startswith(b"text/event-stream")
+        for stream in (first, second):
+            assert (await stream.next_event())[0] == "ready"
+
+        await client.post("/category", json={"name": "Чужая", "color": "#000000", "category_type": "expense"}, headers=other_headers)
+        category_id = (await client.post("/category", json={
+            "name": "Продукты", "color": "#33FF57", "category_type": "expense"
+        }, headers=headers)).json()["id"]
+        operation_id = (await client.post("/operation", json={
+            "name": "Хлеб", "date": "2024-11-15T12:00:00Z", "amount": -50.0, "categoryId": category_id
+        }, headers=headers)).json()["id"]
+        await client.put(f"/operation/{operation_id}", json={"amount": -60.0}, headers=headers)
+        await client.delete(f"/operation/{operation_id}", headers=headers)
+        user_id = (await client.get("/user/me", headers=headers)).json()["id"]
+        await client.patch(f"/user/{user_id}/budget", json={"budgetLimit": 1000.0}, headers=headers)
+        # Отклоненное изменение не публикуется
+        await client.delete(f"/category/{category_id + 100}", headers=headers)
+        await client.delete(f"/category/{category_id}", headers=headers)
+
+        expected = [
+            {"type": "change", "entity": "category", "action": "created", "ids": [category_id]},
+            {"type": "change", "entity": "operation", "action": "created", "ids": [operation_id]},
+            {"type": "change", "entity": "operation", "action": "updated", "ids": [operation_id]},
+            {"type": "change", "entity": "operation", "action": "deleted", "ids": [operation_id]},
+            {"type": "change", "entity": "user", "action": "updated", "ids": [user_id]},
+            {"type": "change", "entity": "category", "action": "deleted", "ids": [category_id]},
+        ]
+        for stream in (first, second):
+            assert [(await stream.next_event())[1] for _ in expected] == expected
+
+    assert event_hub.connections() == 0
+
+@pytest.mark.asyncio
+async def test_events_authentication(client: httpx.AsyncClient) -> None:
+    """Тест аутентификации потока событий: без токена - 401, токен EventSource передается параметром access_token"""
+    response = await client.get("/events")
+    assert response.status_code == 401
+
+    headers = await register(client, "events@server.com")
+    token = headers["Authorization"].removeprefix("Bearer ")
+    async with EventStream(f"/events?access_token={token}", {}) as stream:
+        assert stream.start["status"] == 200
+        assert await stream.next_event() == ("ready", {"type": "ready"})
+
+@pytest.mark.asyncio
+async def test_hub_overflow_resets_subscriber() -> None:
+    """Тест переполнения очереди подключения: накопленные события заменяются событием reset"""
+    hub = EventHub(queue_size=2)
+    async with hub.subscribe(1) as slow, hub.subscribe(1) as fast:
+        for id in range(3):
+            hub.publish(1, "operation", "created", id)
+            if id < 2:
+                assert (await fast.get())["ids"] == [id]
+        assert [slow.get_nowait() for _ in range(slow.qsize())] == [RESET_EVENT]
+        assert (await fast.get())["ids"] == [2]
+
+@pytest.mark.asyncio
+async def test_bridge_delivers_between_processes() -> None:
+    """Тест моста LISTEN/NOTIFY: событие одного процесса доставляется подключениям другого процесса ровно один раз"""
+    hubs = [EventHub(), EventHub()]
+    bridges = [NotifyBridge(hub, bridge_dsn(DATABASE_URL.render_as_string(hide_password=False)), "finance_events_test") for hub in hubs]
+    for bridge in bridges:
+        await bridge.start()
+    try:
+        async with hubs[0].subscribe(7) as local, hubs[1].subscribe(7) as remote, hubs[1].subscribe(8) as other:
+            hubs[0].publish(7, "category", "created", 1)
+            hubs[0].publish(7, "category", "deleted", 1)
+            assert (await asyncio.wait_for(remote.get(), 5))["action"] == "created"
+            assert (await asyncio.wait_for(remote.get(), 5))["action"] == "deleted"
+            # Собственные уведомления процесса не доставляются повторно
+            assert [local.get_nowait()["action"] for _ in range(local.qsize())] == ["created", "deleted"]
+            assert other.empty()
+    finally:
+        for bridge in bridges:
+            await bridge.stop()
@@ -0,0 +1,84 @@
+"""
+Тесты использования индексов планировщиком запросов PostgreSQL
+"""
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy import Select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..routes.dependencies import current_user_query
+from ..routes.categories import category_list_query
+from ..routes.operations import operation_list_query, operation_page_query
+from ..schemas.operations import OperationFilters
+
+# Запросы, которые строят маршруты, и индексы, которые планировщик должен для них выбрать (пользователь 7 владеет категориями 61-70).
+# Полный список операций пользователя читается целиком, поэтому для него допустимо и чтение по любому индексу, начинающемуся с author,
+# с последующей сортировкой; постраничное получение должно читать операции по индексу сразу в нужном порядке.
+QUERIES = [
+    ("current_user", current_user_query("user7@server.com"), "ix_users_email"),
+    ("category_list", category_list_query(7), "ix_categories_author"),
+    ("operation_list", operation_list_query(OperationFilters(), 7), ("ix_operations_author_date_id", "ix_operations_author_seq")),
+    ("operation_page", operation_page_query(OperationFilters(), 7, 50), "ix_operations_author_date_id"),
+    (
+        "operation_page_cursor",
+        operation_page_query(OperationFilters(), 7, 50, (datetime(2022, 6, 1, tzinfo=timezone.utc), 100000)),
+        "ix_operations_author_date_id",
+    ),
+    (
+        "operation_list_filtered",
+        operation_list_query(OperationFilters(
+            categoryId=61,
+            start_date=datetime(2022, 12, 1, tzinfo=timezone.utc),
+            end_date=datetime(2022, 12, 31, 23, 59, 59, tzinfo=timezone.utc),
+        ), 7),
+        "ix_operations_author_category_date",
+    ),
+]
+
+# Наполнение таблиц данными 2000 пользователей (по 10 категорий и 100 операций на пользователя), чтобы выборка данных одного
+# пользователя была малой долей таблицы, как в рабочей базе, и планировщик выбирал индекс без отключения последовательного сканирования
+SEED = [
+    "INSERT INTO users (id, name, surname, email, password, budget_limit) "
+    "SELECT i, 'User', 'Test', 'user' || i || '@server.com', 'hash', 0 FROM generate_series(1, 2000) AS i",
+    "INSERT INTO categories (id, name, color, category_type, author) "
+    "SELECT i, 'Category', '#ffffff', 'expense', (i - 1) / 10 + 1 FROM generate_series(1, 20000) AS i",
+    "INSERT INTO operations (name, date, amount, category_id, author) "
+    "SELECT 'Operation', TIMESTAMPTZ '2020-01-01' + i * INTERVAL '10 minutes', 100, i % 20000 + 1, (i % 20000) / 10 + 1 "
+    "FROM generate_series(1, 200000) AS i",
+    "ANALYZE users, categories, operations",
+]
+
+# Текст запроса SQLAlchemy с подставленными значениями параметров для EXPLAIN
+def compile_query(query: Select) -> str:
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+@pytest.mark.asyncio
+async def test_queries_use_indexes(test_session: AsyncSession) -> None:
+    """Тест того, что планировщик использует индексы для запросов маршрутов"""
+    for statement in SEED:
+        await test_session.execute(text(statement))
+    
+    # Таблица операций секционирована: в плане указываются индексы секций, которые заменяются именами индексов
+    # родительской таблицы, от которых они унаследованы
+    result = await test_session.execute(text(
+        "SELECT child.relname, parent.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "WHERE child.relkind = 'i'"
+    ))
+    parent_indexes = result.all()
+    
+    plans = {}
+    for name, query, index_names in QUERIES:
+        result = await test_session.execute(text(f"EXPLAIN {compile_query(query)}"))
+        plan = "\n".join(row[0] for row in result)
+        for child, parent in parent_indexes:
+            plan = plan.replace(f" {child} ", f" {parent} ")
+        plans[name] = (index_names, plan)
+    await test_session.rollback()
+    
+    for name, (index_names, plan) in plans.items():
+        index_names = index_names if isinstance(index_names, tuple) else (index_names,)
+        assert any(f" {index_name} " in f"{plan} " for index_name in index_names), f"{name}: {plan}"
+        assert "Seq Scan" not in plan, f"{name}: {plan}"
@@ -0,0 +1,57 @@
+"""
+Тесты для замера времени обработки запросов и маршрута /metrics
+"""
+import re
+import pytest
+import httpx
+from ..config import settings
+from ..middleware.timing import metrics_registry
+
+@pytest.fixture
+async def headers(client: httpx.AsyncClient) -> dict:
+    """Фикстура для заголовков авторизации"""
+    response = await client.post("/user/register", json={
+        "name": "Test",
+        "surname": "User",
+        "email": "testuser@server.com",
+        "password": "testpassword123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.mark.asyncio
+async def test_server_timing_header(client: httpx.AsyncClient, headers: dict) -> None:
+    """Тест заголовка Server-Timing с временем обработки и количеством SQL запросов"""
+    response = await client.get("/category", headers=headers)
+    
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert re.match(r'app;dur=[\d.]+, db;dur=[\d.]+;desc="(\d+) statements", pool;dur=[\d.]+$', timing)
+    assert int(re.search(r'desc="(\d+) statements"', timing).group(1)) >= 1
+
+@pytest.mark.asyncio
+async def test_metrics(client: httpx.AsyncClient, headers: dict, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Тест вывода показателей по шаблонам маршрутов и доступа к /metrics только по токену"""
+    assert (await client.get("/metrics")).status_code == 404
+    
+    monkeypatch.setattr(settings, "metrics_token", "scrape-token")
+    assert (await client.get("/metrics", headers={"Authorization": "Bearer wrong"})).status_code == 401
+    
+    metrics_registry.clear()
+    category_id = (await client.post("/category", json={"name": "Еда", "color": "#FF33A8", "category_type": "expense"}, headers=headers)).json()["id"]
+    await client.get(f"/category/{category_id}", headers=headers)
+    await client.get("/category/999999", headers=headers)
+    await client.get("/no-such-path")
+    
+    response = await client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    
+    # Запросы к одному маршруту с разными ID учитываются в одной серии
+    assert 'http_request_duration_seconds_count{method="GET",route="/category/{id}"} 2' in text
+    assert 'http_requests_total{method="GET",route="/category/{id}",status="200"} 1' in text
+    assert 'http_requests_total{method="GET",route="/category/{id}",status="404"} 1' in text
+    assert 'http_requests_total{method="GET",route="<unmatched>",status="404"} 1' in text
+    assert 'http_request_db_statements_count{method="POST",route="/category"} 1' in text
+    assert re.search(r'http_request_db_rows_total\{method="GET",route="/category/\{id\}"\} [1-9]', text)
+    assert "# TYPE http_request_duration_seconds histogram" in text
@@ -3,7 +3,17 @@
 """
 import pytest
 import httpx
+import json
+import csv
+import gzip
+import io
+import asyncio
 from datetime import datetime, timezone, timedelta
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database.connection import get_session, session_maker
+from ..database.rollups import rebuild_totals
+from ..main import app
 
 @pytest.fixture
 async def access_token(client: httpx.AsyncClient) -> str:
@@ -300,4 +310,365 @@ async def test_get_operations_by_category(client: httpx.AsyncClient, access_toke
     data = response.json()
     assert len(data) == 2
     for operation in data:
-        assert "категории 1" in operation["name"]
\ No newline at end of file
+        assert "категории 1" in operation["name"]
+
+@pytest.mark.asyncio
+async def test_operations_summary(client: httpx.AsyncClient, access_token: str) -> None:
+    """Тест получения сводки по операциям: итоги, группировка по периодам и по категориям"""
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Accept": "application/json",
+        "Content-Type": "application/json"
+    }
+    
+    income_response = await client.post("/category", json={
+        "name": "Зарплата", "color": "#33FF57", "category_type": "income"
+    }, headers=headers)
+    income_id = income_response.json()["id"]
+    expense_response = await client.post("/category", json={
+        "name": "Продукты", "color": "#FF33A8", "category_type": "expense"
+    }, headers=headers)
+    expense_id = expense_response.json()["id"]
+    
+    operations = [
+        {"name": "Зарплата", "date": "2024-11-05T00:00:00Z", "amount": 50000.0, "categoryId": income_id},
+        {"name": "Продукты", "date": "2024-11-20T00:00:00Z", "amount": -2500.0, "categoryId": expense_id},
+        {"name": "Зарплата", "date": "2024-12-05T00:00:00Z", "amount": 50000.0, "categoryId": income_id},
+        {"name": "Продукты", "date": "2024-12-06T00:00:00Z", "amount": -1500.0, "categoryId": expense_id},
+    ]
+    for operation in operations:
+        await client.post("/operation", json=operation, headers=headers)
+    
+    # Итоговая сводка
+    response = await client.get("/operation/summary", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "totalIncome": 100000.0,
+        "totalExpense": 4000.0,
+        "incomeCount": 2,
+        "expenseCount": 2,
+        "balance": 96000.0
+    }
+    
+    # Итоговая сводка с фильтром по дате
+    response = await client.get("/operation/summary?start_date=2024-12-01T00:00:00Z", headers=headers)
+    assert response.json()["totalExpense"] == 1500.0
+    assert response.json()["balance"] == 48500.0
+    
+    # Сводка по месяцам
+    response = await client.get("/operation/summary/period?period=month", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["period"][:10] for item in data] == ["2024-11-01", "2024-12-01"]
+    assert data[0]["income"] == 50000.0
+    assert data[0]["expense"] == 2500.0
+    assert data[1]["balance"] == 48500.0
+    
+    # Сводка по категориям с фильтром по категории
+    response = await client.get(f"/operation/summary/category?categoryId={expense_id}", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 1
+    assert data[0]["categoryId"] == expense_id
+    assert data[0]["total"] == 4000.0
+    assert data[0]["count"] == 2
+    
+    # Неизвестный период
+    response = await client.get("/operation/summary/period?period=decade", headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_money_amounts_are_exact(client: httpx.AsyncClient, access_token: str, category_id: int) -> None:
+    """Тест точного хранения и сложения сумм в минимальных единицах валюты"""
+    headers = {"Authorization": f"Bearer {access_token}"}
+    for amount in [0.1] * 10 + [0.2] * 5:
+        response = await client.post("/operation", json={
+            "name": "Мелочь", "date": "2024-11-01T00:00:00Z", "amount": amount, "categoryId": category_id
+        }, headers=headers)
+        assert response.status_code == 201
+        assert response.json()["amount"] == amount
+    
+    # Сумма 0.1 * 10 + 0.2 * 5 в числах с плавающей точкой не равна 2.0, а в копейках точна
+    summary = (await client.get(f"/operation/summary/category?categoryId={category_id}", headers=headers)).json()
+    assert summary[0]["total"] == 2.0
+    assert summary[0]["count"] == 15
+    
+    # Сумма точнее копейки отклоняется, а не округляется
+    response = await client.post("/operation", json={
+        "name": "Дробь", "date": "2024-11-01T00:00:00Z", "amount": 10.005, "categoryId": category_id
+    }, headers=headers)
+    assert response.status_code == 422
+    response = await client.put("/operation/1", json={"amount": "0.001"}, headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_operations_timeseries(client: httpx.AsyncClient, access_token: str, test_session: AsyncSession) -> None:
+    """Тест временных рядов для графиков: периоды без операций, типы операций, итоги категорий и согласованность дневных итогов"""
+    headers = {"Authorization": f"Bearer {access_token}"}
+    income_id = (await client.post("/category", json={
+        "name": "Зарплата", "color": "#33FF57", "category_type": "income"
+    }, headers=headers)).json()["id"]
+    food_id = (await client.post("/category", json={
+        "name": "Продукты", "color": "#FF33A8", "category_type": "expense"
+    }, headers=headers)).json()["id"]
+    cafe_id = (await client.post("/category", json={
+        "name": "Кафе", "color": "#3357FF", "category_type": "expense"
+    }, headers=headers)).json()["id"]
+    
+    operations = [
+        {"name": "Зарплата", "date": "2024-11-01T10:00:00Z", "amount": 50000.0, "categoryId": income_id},
+        {"name": "Продукты", "date": "2024-11-01T18:00:00Z", "amount": -2500.0, "categoryId": food_id},
+        {"name": "Кофе", "date": "2024-11-03T08:00:00Z", "amount": -300.0, "categoryId": cafe_id},
+        {"name": "Продукты", "date": "2024-11-04T23:30:00+03:00", "amount": -1000.0, "categoryId": food_id},
+        {"name": "Ошибка", "date": "2024-11-02T12:00:00Z", "amount": -999.0, "categoryId": food_id},
+    ]
+    ids = [(await client.post("/operation", json=operation, headers=headers)).json()["id"] for operation in operations]
+    # Изменение и удаление операций переносят суммы в дневных итогах
+    await client.put(f"/operation/{ids[2]}", json={"date": "2024-11-05T08:00:00Z", "amount": -500.0}, headers=headers)
+    await client.delete(f"/operation/{ids[4]}", headers=headers)
+    
+    # Дни без операций заполняются нулями; дата операции относится к дню по UTC
+    response = await client.get("/operation/timeseries?bucket=day&from=2024-11-01&to=2024-11-06", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["periods"] == [f"2024-11-0{day}" for day in range(1, 7)]
+    assert data["series"] == [
+        {"category_type": "income", "values": [50000.0, 0.0, 0.0, 0.0, 0.0, 0.0]},
+        {"category_type": "expense", "values": [2500.0, 0.0, 0.0, 1000.0, 500.0, 0.0]},
+    ]
+    assert [(item["categoryId"], item["total"], item["count"]) for item in data["categories"]] == [
+        (income_id, 50000.0, 1), (food_id, 3500.0, 2), (cafe_id, 500.0, 1)
+    ]
+    
+    # Недели начинаются с понедельника (2024-10-28 и 2024-11-04), месяцы - с первого числа
+    response = await client.get("/operation/timeseries?bucket=week&from=2024-11-01&to=2024-11-10&type=expense", headers=headers)
+    data = response.json()
+    assert data["periods"] == ["2024-10-28", "2024-11-04"]
+    assert data["series"] == [{"category_type": "expense", "values": [2500.0, 1500.0]}]
+    assert [item["categoryId"] for item in data["categories"]] == [food_id, cafe_id]
+    
+    response = await client.get("/operation/timeseries?bucket=month&from=2024-10-15&to=2025-01-01&type=income", headers=headers)
+    data = response.json()
+    assert data["periods"] == ["2024-10-01", "2024-11-01", "2024-12-01", "2025-01-01"]
+    assert data["series"] == [{"category_type": "income", "values": [0.0, 50000.0, 0.0, 0.0]}]
+    
+    # Дневные итоги совпадают с полным пересчетом по операциям
+    query = text("SELECT category_id, day, total, operations_count FROM daily_totals WHERE operations_count <> 0 ORDER BY 1, 2")
+    totals = (await test_session.execute(query)).all()
+    await rebuild_totals(test_session)
+    await test_session.commit()
+    assert totals == (await test_session.execute(query)).all()
+    
+    # Некорректный диапазон и слишком много периодов
+    response = await client.get("/operation/timeseries?from=2024-11-06&to=2024-11-01", headers=headers)
+    assert response.status_code == 400
+    response = await client.get("/operation/timeseries?bucket=day&from=2000-01-01&to=2024-12-31", headers=headers)
+    assert response.status_code == 400
+    response = await client.get("/operation/timeseries?bucket=year&from=2024-01-01&to=2024-12-31", headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_get_operations_page(client: httpx.AsyncClient, access_token: str, category_id: int) -> None:
+    """Тест постраничного получения операций по курсору"""
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Accept": "application/json",
+        "Content-Type": "application/json"
+    }
+    
+    # Две операции с одинаковой датой проверяют упорядочивание по ID внутри одной даты
+    dates = ["2024-12-01T00:00:00Z", "2024-12-02T00:00:00Z", "2024-12-02T00:00:00Z", "2024-12-03T00:00:00Z", "2024-12-04T00:00:00Z"]
+    for index, date in enumerate(dates):
+        await client.post("/operation", json={
+            "name": f"Операция {index}", "date": date, "amount": 100.0, "categoryId": category_id
+        }, headers=headers)
+    
+    full_list = (await client.get("/operation", headers=headers)).json()
+    
+    collected = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/operation/page", params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 2
+        collected.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    
+    assert [operation["id"] for operation in collected] == [operation["id"] for operation in full_list]
+    
+    # Некорректный курсор
+    response = await client.get("/operation/page?cursor=broken", headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_stream_operations(client: httpx.AsyncClient, access_token: str, category_id: int) -> None:
+    """Тест потоковой выдачи операций в форматах NDJSON и JSON"""
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Accept": "application/json",
+        "Content-Type": "application/json"
+    }
+    
+    for day in range(1, 4):
+        await client.post("/operation", json={
+            "name": f"Операция {day}", "date": f"2024-12-0{day}T00:00:00Z", "amount": 100.0 * day, "categoryId": category_id
+        }, headers=headers)
+    
+    full_list = (await client.get("/operation", headers=headers)).json()
+    
+    response = await client.get("/operation/stream", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.splitlines()
+    assert [json.loads(line) for line in lines] == full_list
+    
+    response = await client.get("/operation/stream?format=json", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == full_list
+
+@pytest.mark.asyncio
+async def test_bulk_create_operations(client: httpx.AsyncClient, access_token: str, category_id: int) -> None:
+    """Тест массовой загрузки операций в форматах CSV, NDJSON и JSON"""
+    headers = {"Authorization": f"Bearer {access_token}"}
+    
+    # CSV в виде загруженного файла: вторая строка с некорректной суммой, третья с чужой категорией
+    csv_data = (
+        "name,date,amount,categoryId\n"
+        f"Зарплата,2024-12-01T00:00:00Z,50000,{category_id}\n"
+        f"Кафе,2024-12-02T00:00:00Z,много,{category_id}\n"
+        "Такси,2024-12-03T00:00:00Z,-300,99999\n"
+        f"\"Продукты, молоко\",2024-12-04T00:00:00Z,-250.5,{category_id}\n"
+    )
+    response = await client.post(
+        "/operation/bulk",
+        files={"file": ("operations.csv", csv_data.encode(), "text/csv")},
+        headers=headers
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert data["inserted"] == 2
+    assert data["failed"] == 2
+    assert [error["row"] for error in data["errors"]] == [2, 3]
+    assert "amount" in data["errors"][0]["detail"]
+    
+    # NDJSON в теле запроса
+    ndjson_data = "\n".join([
+        json.dumps({"name": "Стипендия", "date": "2024-12-05T00:00:00Z", "amount": 3000, "categoryId": category_id}),
+        "{broken",
+        "",
+        json.dumps({"name": "Премия", "date": "2024-12-06T00:00:00Z", "amount": 10000, "categoryId": category_id}),
+    ])
+    response = await client.post(
+        "/operation/bulk",
+        content=ndjson_data.encode(),
+        headers={**headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 201
+    assert response.json()["inserted"] == 2
+    assert response.json()["errors"][0]["row"] == 2
+    
+    # JSON-массив в теле запроса: вторая строка с названием длиннее столбца в БД
+    response = await client.post(
+        "/operation/bulk",
+        json=[
+            {"name": "Подарок", "date": "2024-12-07T00:00:00Z", "amount": 500, "categoryId": category_id},
+            {"name": "Очень длинное название " * 20, "date": "2024-12-08T00:00:00Z", "amount": 100, "categoryId": category_id},
+        ],
+        headers=headers
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert data["inserted"] == 1
+    assert data["failed"] == 1
+    assert data["errors"][0]["row"] == 2 and "name" in data["errors"][0]["detail"]
+    
+    operations = (await client.get("/operation", headers=headers)).json()
+    assert len(operations) == 5
+    assert "Продукты, молоко" in [operation["name"] for operation in operations]
+    
+    # Неизвестный формат
+    response = await client.post("/operation/bulk", content=b"data", headers={**headers, "Content-Type": "text/plain"})
+    assert response.status_code == 415
+
+@pytest.mark.asyncio
+async def test_export_operations(client: httpx.AsyncClient, access_token: str, category_id: int) -> None:
+    """Тест экспорта операций в CSV и NDJSON (в том числе со сжатием gzip)"""
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Accept": "application/json",
+        "Content-Type": "application/json"
+    }
+    
+    for day in range(1, 4):
+        await client.post("/operation", json={
+            "name": f"Операция, {day}", "date": f"2024-12-0{day}T00:00:00Z", "amount": 100.0 * day, "categoryId": category_id
+        }, headers=headers)
+    
+    response = await client.get("/operation/export?format=csv&start_date=2024-12-02T00:00:00Z", headers=headers)
+    assert response.status_code == 200
+    assert 'filename="operations.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["name"] for row in rows] == ["Операция, 3", "Операция, 2"]
+    assert float(rows[0]["amount"]) == 300.0
+    
+    response = await client.get("/operation/export?format=ndjson&gzip=true", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    lines = gzip.decompress(response.content).decode().splitlines()
+    full_list = (await client.get("/operation", headers=headers)).json()
+    assert [json.loads(line) for line in lines] == full_list
+
+@pytest.mark.asyncio
+async def test_list_matches_single_responses(client: httpx.AsyncClient, access_token: str, category_id: int) -> None:
+    """Тест совпадения полей списка операций и категорий с ответами на получение по ID"""
+    headers = {"Authorization": f"Bearer {access_token}"}
+    await client.post("/operation", json={
+        "name": "Кофе", "date": "2024-12-01T10:30:15.250000+03:00", "amount": -250.5, "categoryId": category_id
+    }, headers=headers)
+    
+    operations = (await client.get("/operation", headers=headers)).json()
+    assert len(operations) == 1
+    single = (await client.get(f"/operation/{operations[0]['id']}", headers=headers)).json()
+    assert operations == [single]
+    assert single["date"] == "2024-12-01T07:30:15.250000Z"
+    
+    categories = (await client.get("/category", headers=headers)).json()
+    assert categories == [(await client.get(f"/category/{category_id}", headers=headers)).json()]
+
+@pytest.mark.asyncio
+@pytest.mark.committed
+async def test_concurrent_updates_keep_monthly_totals(client: httpx.AsyncClient, access_token: str, category_id: int, test_session: AsyncSession) -> None:
+    """Тест согласованности помесячных и дневных итогов при параллельном изменении одной операции"""
+    headers = {"Authorization": f"Bearer {access_token}"}
+    operation_id = (await client.post("/operation", json={
+        "name": "Перенос", "date": "2024-11-15T00:00:00Z", "amount": -100.0, "categoryId": category_id
+    }, headers=headers)).json()["id"]
+    
+    # Каждый запрос получает собственную сессию, чтобы изменения выполнялись в параллельных транзакциях
+    async def separate_session():
+        async with session_maker() as session:
+            yield session
+    app.dependency_overrides[get_session] = separate_session
+    
+    await asyncio.gather(*(
+        client.put(f"/operation/{operation_id}", json={
+            "date": f"2024-{10 + index % 3}-15T00:00:00Z", "amount": -100.0 * (index + 1)
+        }, headers=headers)
+        for index in range(12)
+    ))
+    
+    queries = [
+        text("SELECT month, category_id, total, operations_count FROM monthly_totals WHERE operations_count <> 0 ORDER BY month"),
+        text("SELECT day, category_id, total, operations_count FROM daily_totals WHERE operations_count <> 0 ORDER BY day"),
+    ]
+    totals = [(await test_session.execute(query)).all() for query in queries]
+    await rebuild_totals(test_session)
+    await test_session.commit()
+    assert totals == [(await test_session.execute(query)).all() for query in queries]
+    assert [len(rows) for rows in totals] == [1, 1]
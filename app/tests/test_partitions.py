@@ -0,0 +1,137 @@
+"""
+Тесты для помесячного секционирования таблицы операций
+"""
+import pytest
+import httpx
+import asyncio
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database.connection import get_session, session_maker
+from ..database.partitions import ARCHIVE_SCHEMA, archive_partitions, ensure_partitions
+from ..database.rollups import rebuild_totals
+from ..main import app
+
+@pytest.fixture
+async def headers(client: httpx.AsyncClient) -> dict:
+    """Фикстура для регистрации пользователя и создания заголовков авторизации"""
+    response = await client.post("/user/register", json={
+        "name": "Test", "surname": "User", "email": "partitions@server.com", "password": "testpassword123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+async def category_id(client: httpx.AsyncClient, headers: dict) -> int:
+    """Фикстура для создания категории расходов"""
+    response = await client.post("/category", json={
+        "name": "Продукты", "color": "#33FF57", "category_type": "expense"
+    }, headers=headers)
+    return response.json()["id"]
+
+async def create_operations(client: httpx.AsyncClient, headers: dict, category_id: int, dates: list[str]) -> list[int]:
+    """Создает по операции на каждую дату и возвращает их ID"""
+    ids = []
+    for index, value in enumerate(dates):
+        response = await client.post("/operation", json={
+            "name": f"Операция {index}", "date": f"{value}T12:00:00Z", "amount": -100.0, "categoryId": category_id
+        }, headers=headers)
+        ids.append(response.json()["id"])
+    return ids
+
+async def partitions_of(session: AsyncSession) -> dict:
+    """Возвращает секции, в которых хранятся операции: ID операции -> имя секции"""
+    result = await session.execute(text("SELECT id, tableoid::regclass::text FROM operations"))
+    return dict(result.all())
+
+@pytest.mark.asyncio
+async def test_ensure_partitions(client: httpx.AsyncClient, headers: dict, category_id: int, test_session: AsyncSession) -> None:
+    """Тест создания секций: операции месяца переносятся из секции по умолчанию, запрос за месяц читает одну секцию"""
+    october, november, january = await create_operations(client, headers, category_id, ["2024-10-05", "2024-11-20", "2025-01-10"])
+    assert set((await partitions_of(test_session)).values()) == {"operations_default"}
+
+    connection = await test_session.connection()
+    created = await ensure_partitions(connection, months_ahead=1, today=date(2024, 11, 15))
+    assert created == ["operations_y2024m11", "operations_y2024m12"]
+    assert await ensure_partitions(connection, months_ahead=1, today=date(2024, 11, 15)) == []
+    assert await partitions_of(test_session) == {
+        october: "operations_default", november: "operations_y2024m11", january: "operations_default"
+    }
+
+    # Новая операция сразу попадает в секцию своего месяца
+    (december,) = await create_operations(client, headers, category_id, ["2024-12-31"])
+    assert (await partitions_of(test_session))[december] == "operations_y2024m12"
+
+    plan = "\n".join((await test_session.execute(text(
+        "EXPLAIN SELECT * FROM operations WHERE date >= '2024-11-01 00:00:00+00' AND date < '2024-12-01 00:00:00+00'"
+    ))).scalars())
+    assert "operations_y2024m11" in plan
+    assert "operations_y2024m12" not in plan and "operations_default" not in plan
+
+    response = await client.get("/operation", headers=headers)
+    assert sorted(operation["id"] for operation in response.json()) == sorted([october, november, december, january])
+
+@pytest.mark.asyncio
+async def test_archive_partitions(client: httpx.AsyncClient, headers: dict, category_id: int, test_session: AsyncSession) -> None:
+    """Тест архивирования секций: операции закончившихся месяцев переносятся в схему archive, итоги сохраняются"""
+    october, november = await create_operations(client, headers, category_id, ["2024-10-05", "2024-11-20"])
+    connection = await test_session.connection()
+    await ensure_partitions(connection, months_ahead=1, today=date(2024, 10, 1))
+
+    # Месяц, который заканчивается после указанной даты, не архивируется
+    assert await archive_partitions(connection, before=date(2024, 11, 15)) == ["operations_y2024m10"]
+    # Фиксация сессии, иначе ответ 404 ниже откатит отсоединение секции вместе с запросом
+    await test_session.commit()
+    assert await partitions_of(test_session) == {november: "operations_y2024m11"}
+    archived = (await test_session.execute(text(f"SELECT id FROM {ARCHIVE_SCHEMA}.operations_y2024m10"))).scalars().all()
+    assert archived == [october]
+    foreign_keys = await test_session.scalar(text(
+        f"SELECT count(*) FROM pg_constraint WHERE conrelid = '{ARCHIVE_SCHEMA}.operations_y2024m10'::regclass AND contype = 'f'"
+    ))
+    assert foreign_keys == 0
+
+    response = await client.get("/operation", headers=headers)
+    assert [operation["id"] for operation in response.json()] == [november]
+    response = await client.get(f"/operation/{october}", headers=headers)
+    assert response.status_code == 404
+
+    response = await client.get("/operation/timeseries?bucket=month&from=2024-10-01&to=2024-11-30&type=expense", headers=headers)
+    assert response.json()["series"] == [{"category_type": "expense", "values": [100.0, 100.0]}]
+
+    # Итоги архивного месяца заморожены: пересчет по таблице operations их не удаляет
+    assert (await test_session.execute(text("SELECT month FROM archived_months"))).scalars().all() == [date(2024, 10, 1)]
+    await rebuild_totals(test_session)
+    await test_session.commit()
+    response = await client.get("/operation/timeseries?bucket=month&from=2024-10-01&to=2024-11-30&type=expense", headers=headers)
+    assert response.json()["series"] == [{"category_type": "expense", "values": [100.0, 100.0]}]
+
+    assert await archive_partitions(connection, before=date(2024, 12, 1), drop=True) == ["operations_y2024m11"]
+    assert await partitions_of(test_session) == {}
+    assert await test_session.scalar(text("SELECT to_regclass('operations_y2024m11')")) is None
+
+@pytest.mark.asyncio
+@pytest.mark.committed
+async def test_concurrent_updates_across_partitions(client: httpx.AsyncClient, headers: dict, category_id: int, test_session: AsyncSession) -> None:
+    """Тест параллельного изменения даты операции, при котором строка переносится между секциями"""
+    (operation_id,) = await create_operations(client, headers, category_id, ["2024-11-15"])
+    async with session_maker() as session:
+        await ensure_partitions(await session.connection(), months_ahead=2, today=date(2024, 10, 1))
+        await session.commit()
+
+    # Каждый запрос получает собственную сессию, чтобы изменения выполнялись в параллельных транзакциях
+    async def separate_session():
+        async with session_maker() as session:
+            yield session
+    app.dependency_overrides[get_session] = separate_session
+    try:
+        responses = await asyncio.gather(*(
+            client.put(f"/operation/{operation_id}", json={"date": f"2024-{10 + index % 3}-15T00:00:00Z"}, headers=headers)
+            for index in range(12)
+        ))
+        assert [response.status_code for response in responses] == [200] * 12
+
+        result = await test_session.execute(text("SELECT month, operations_count FROM monthly_totals WHERE operations_count <> 0"))
+        assert len(result.all()) == 1
+    finally:
+        async with session_maker() as session:
+            await archive_partitions(await session.connection(), before=date(2025, 1, 1), drop=True)
+            await session.commit()
@@ -0,0 +1,106 @@
+"""
+Тесты для маршрутизации запросов чтения между основной базой данных и репликами
+"""
+import pytest
+import httpx
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from ..database.replicas import Replica, replica_router
+from .conftest import DATABASE_URL
+
+@pytest.fixture
+async def headers(client: httpx.AsyncClient) -> dict:
+    """Фикстура для регистрации пользователя и создания заголовков авторизации"""
+    response = await client.post("/user/register", json={
+        "name": "Test", "surname": "User", "email": "replicas@server.com", "password": "testpassword123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+async def replica(monkeypatch: pytest.MonkeyPatch):
+    """Реплика для маршрутизации: отдельный движок базы тестов, запросы которого записываются в список queries реплики"""
+    engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+    replica = Replica(engine)
+    replica.queries = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: replica.queries.append(args[2]))
+    monkeypatch.setattr(replica_router, "replicas", [replica])
+    monkeypatch.setattr(replica_router, "_sticky_until", {})
+    yield replica
+    await engine.dispose()
+
+@pytest.fixture
+async def unavailable_replica(monkeypatch: pytest.MonkeyPatch):
+    """Недоступная реплика (порт, на котором нет сервера)"""
+    engine = create_async_engine(make_url(DATABASE_URL).set(port=1), poolclass=NullPool)
+    replica = Replica(engine)
+    monkeypatch.setattr(replica_router, "replicas", [replica])
+    monkeypatch.setattr(replica_router, "_sticky_until", {})
+    yield replica
+    await engine.dispose()
+
+@pytest.mark.asyncio
+@pytest.mark.committed
+async def test_reads_use_replica_except_after_writes(client: httpx.AsyncClient, headers: dict, replica: Replica, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Тест маршрутизации: чтение выполняется на реплике, а сразу после изменения данных пользователя - на основной базе"""
+    monkeypatch.setattr(replica_router, "sticky_seconds", 0)
+    category = (await client.post("/category", json={
+        "name": "Продукты", "color": "#33FF57", "category_type": "expense"
+    }, headers=headers)).json()
+    assert replica.queries == []
+
+    response = await client.get("/category", headers=headers)
+    assert response.json() == [category]
+    assert any("FROM categories" in query for query in replica.queries)
+
+    # Версия данных для ETag читается на той же реплике, что и данные ответа
+    replica.queries.clear()
+    response = await client.get("/user/me", headers=headers)
+    assert response.status_code == 200
+    assert any("data_version" in query for query in replica.queries)
+
+    # Изменение данных закрепляет чтение пользователя за основной базой на sticky_seconds секунд
+    monkeypatch.setattr(replica_router, "sticky_seconds", 60)
+    await client.put(f"/category/{category['id']}", json={"name": "Еда"}, headers=headers)
+    replica.queries.clear()
+    response = await client.get("/category", headers=headers)
+    assert response.json()[0]["name"] == "Еда"
+    response = await client.get(f"/user/{response.json()[0]['author']}")
+    assert response.status_code == 200
+    assert replica.queries == []
+
+@pytest.mark.asyncio
+async def test_failover_to_primary(client: httpx.AsyncClient, headers: dict, unavailable_replica: Replica) -> None:
+    """Тест переключения на основную базу: недоступная реплика исключается до успешной проверки"""
+    response = await client.get("/category", headers=headers)
+    assert response.status_code == 200
+    assert unavailable_replica.healthy is False
+    assert unavailable_replica.failures == 1
+
+    # Пока реплика исключена, подключение к ней не выполняется
+    response = await client.get("/operation", headers=headers)
+    assert response.status_code == 200
+    assert unavailable_replica.failures == 1
+
+    await replica_router.check()
+    assert unavailable_replica.healthy is False
+    response = await client.get("/service/replicas", headers=headers)
+    assert response.json() == [{
+        "url": unavailable_replica.engine.url.render_as_string(hide_password=True),
+        "healthy": False,
+        "lag": None,
+        "failures": 2,
+    }]
+
+@pytest.mark.asyncio
+async def test_replica_health_check(replica: Replica, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Тест проверки реплики: исправная реплика возвращается в работу, отстающая больше max_lag исключается"""
+    replica.healthy = False
+    await replica_router.check()
+    assert replica.healthy is True
+    assert replica.lag == 0
+
+    monkeypatch.setattr(replica_router, "max_lag", -1)
+    await replica_router.check()
+    assert replica.healthy is False
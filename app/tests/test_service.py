@@ -0,0 +1,67 @@
+"""
+Тесты для служебных маршрутов
+"""
+import pytest
+import httpx
+from sqlalchemy import text
+from ..config import Settings
+from ..database.connection import engine
+
+@pytest.fixture
+async def headers(client: httpx.AsyncClient) -> dict:
+    """Фикстура для заголовков авторизации"""
+    response = await client.post("/user/register", json={
+        "name": "Test",
+        "surname": "User",
+        "email": "testuser@server.com",
+        "password": "testpassword123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.mark.asyncio
+async def test_service_requires_authentication(client: httpx.AsyncClient) -> None:
+    """Тест недоступности служебных маршрутов без аутентификации"""
+    for path in ("/service/pool", "/service/hashing"):
+        response = await client.get(path)
+        assert response.status_code in (401, 403)
+
+@pytest.mark.asyncio
+async def test_pool_stats(client: httpx.AsyncClient, headers: dict) -> None:
+    """Тест получения статистики пула соединений: выдача соединения из пула учитывается в статистике"""
+    before = (await client.get("/service/pool", headers=headers)).json()
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        response = await client.get("/service/pool", headers=headers)
+    finally:
+        # Соединения пула привязаны к циклу событий теста
+        await engine.dispose()
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["checkouts"] == before["checkouts"] + 1
+    assert data["wait_time_total"] >= before["wait_time_total"]
+    assert data["wait_time_max"] >= data["wait_time_avg"] >= 0
+
+@pytest.mark.asyncio
+async def test_hash_pool_stats(client: httpx.AsyncClient, headers: dict) -> None:
+    """Тест получения статистики пула хеширования паролей"""
+    response = await client.get("/service/hashing", headers=headers)
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["max_workers"] >= 1
+    assert data["in_flight"] == 0
+    assert data["queue_depth"] == 0
+
+def test_settings_from_environment(monkeypatch) -> None:
+    """Тест загрузки настроек пула соединений из переменных окружения"""
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_ECHO", "true")
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT", "5000")
+    
+    settings = Settings()
+    
+    assert settings.db_pool_size == 3
+    assert settings.db_echo is True
+    assert settings.db_statement_timeout == 5000
@@ -0,0 +1,112 @@
+"""
+Тесты количества SQL запросов, выполняемых изменяющими маршрутами (по заголовку Server-Timing)
+"""
+import re
+from typing import Optional
+import pytest
+import httpx
+from ..auth.user_cache import user_cache
+
+# Запросы выполняются в обычных транзакциях, как в рабочем приложении: точки сохранения (SAVEPOINT) транзакции теста
+# учитывались бы в количестве SQL запросов
+pytestmark = pytest.mark.committed
+
+@pytest.fixture
+async def user(client: httpx.AsyncClient) -> dict:
+    """Фикстура для регистрации пользователя: возвращает его ID и заголовки авторизации"""
+    response = await client.post("/user/register", json={
+        "name": "Test",
+        "surname": "User",
+        "email": "testuser@server.com",
+        "password": "testpassword123"
+    })
+    data = response.json()
+    return {"id": data["user_id"], "headers": {"Authorization": f"Bearer {data['access_token']}"}}
+
+def statements(response: httpx.Response) -> int:
+    """Количество SQL запросов, выполненных при обработке запроса"""
+    return int(re.search(r'desc="(\d+) statements"', response.headers["server-timing"]).group(1))
+
+@pytest.mark.asyncio
+async def test_mutations_take_one_statement(client: httpx.AsyncClient, user: dict) -> None:
+    """Тест выполнения каждого изменения одним SQL запросом (пользователь для авторизации уже в кэше)"""
+    headers = user["headers"]
+    user_id = user["id"]
+    
+    async def request(method: str, url: str, payload: Optional[dict]) -> httpx.Response:
+        # Запись пользователя в кэше сбрасывается изменением его данных, поэтому кэш заполняется перед каждым запросом
+        await client.get("/user/me", headers=headers)
+        assert user_cache.get("testuser@server.com") is not None
+        response = await client.request(method, url, json=payload, headers=headers)
+        assert response.status_code in (200, 201, 204), response.text
+        assert statements(response) == 1, f"{method} {url}"
+        return response
+    
+    category_id = (await request("POST", "/category", {"name": "Еда", "color": "#FF33A8", "category_type": "expense"})).json()["id"]
+    await request("PUT", f"/category/{category_id}", {"name": "Продукты"})
+    operation_id = (await request("POST", "/operation", {
+        "name": "Кофе", "date": "2024-12-01T10:00:00Z", "amount": -250.0, "categoryId": category_id
+    })).json()["id"]
+    response = await request("PUT", f"/operation/{operation_id}", {"amount": -300.0, "date": "2024-11-30T10:00:00Z"})
+    assert response.json()["amount"] == -300.0
+    await request("PUT", f"/user/{user_id}", {"name": "Renamed"})
+    await request("PATCH", f"/user/{user_id}/budget", {"budgetLimit": 5000.0})
+    response = await request("PATCH", f"/user/{user_id}/avatar", {"avatar": "https://example.com/avatar.png"})
+    assert response.json()["name"] == "Renamed"
+    assert response.json()["budgetLimit"] == 5000.0
+    
+    # Удаление операции, а затем категории вместе с оставшимися операциями (каскадно на уровне БД)
+    await request("POST", "/operation", {
+        "name": "Чай", "date": "2024-12-02T10:00:00Z", "amount": -100.0, "categoryId": category_id
+    })
+    assert (await request("DELETE", f"/operation/{operation_id}", None)).status_code == 204
+    assert (await request("DELETE", f"/category/{category_id}", None)).status_code == 204
+    assert (await client.get("/operation", headers=headers)).json() == []
+    deleted = (await client.get("/sync?since=1", headers=headers)).json()["deleted"]
+    assert deleted["operations"] == [operation_id]
+    assert deleted["categories"] == [category_id]
+    
+    response = await client.post("/user/register", json={
+        "name": "Second", "surname": "User", "email": "second@server.com", "password": "testpassword123"
+    })
+    assert response.status_code == 201
+    assert statements(response) == 1
+
+@pytest.mark.asyncio
+async def test_rejected_mutations(client: httpx.AsyncClient, user: dict) -> None:
+    """Тест ответов изменяющих маршрутов при отказе: причина определяется дополнительным запросом, изменения не сохраняются"""
+    headers = user["headers"]
+    other = await client.post("/user/register", json={
+        "name": "Other", "surname": "User", "email": "other@server.com", "password": "testpassword123"
+    })
+    other_headers = {"Authorization": f"Bearer {other.json()['access_token']}"}
+    other_category = (await client.post("/category", json={"name": "Чужая", "color": "#33FF57", "category_type": "expense"}, headers=other_headers)).json()["id"]
+    category_id = (await client.post("/category", json={"name": "Своя", "color": "#33FF57", "category_type": "expense"}, headers=headers)).json()["id"]
+    operation_id = (await client.post("/operation", json={
+        "name": "Кофе", "date": "2024-12-01T10:00:00Z", "amount": -250.0, "categoryId": category_id
+    }, headers=headers)).json()["id"]
+    version = (await client.get("/user/me", headers=headers)).headers["etag"]
+    
+    operation = {"name": "Кофе", "date": "2024-12-01T10:00:00Z", "amount": -1.0}
+    assert (await client.post("/operation", json={**operation, "categoryId": 999999}, headers=headers)).status_code == 404
+    assert (await client.post("/operation", json={**operation, "categoryId": other_category}, headers=headers)).status_code == 403
+    assert (await client.put("/operation/999999", json={"amount": -1.0}, headers=headers)).status_code == 404
+    assert (await client.put(f"/operation/{operation_id}", json={"amount": -1.0}, headers=other_headers)).status_code == 403
+    assert (await client.put(f"/operation/{operation_id}", json={"categoryId": other_category}, headers=headers)).status_code == 403
+    assert (await client.put(f"/operation/{operation_id}", json={"categoryId": 999999}, headers=headers)).status_code == 404
+    assert (await client.put("/category/999999", json={"name": "Нет"}, headers=headers)).status_code == 404
+    assert (await client.put(f"/category/{other_category}", json={"name": "Нет"}, headers=headers)).status_code == 403
+    assert (await client.delete(f"/operation/{operation_id}", headers=other_headers)).status_code == 403
+    assert (await client.delete("/operation/999999", headers=headers)).status_code == 404
+    assert (await client.delete(f"/category/{other_category}", headers=headers)).status_code == 403
+    assert (await client.delete("/category/999999", headers=headers)).status_code == 404
+    assert (await client.get(f"/operation/{operation_id}", headers=other_headers)).status_code == 403
+    assert (await client.get(f"/category/{category_id}", headers=other_headers)).status_code == 403
+    response = await client.put(f"/user/{user['id']}", json={"email": "other@server.com"}, headers=headers)
+    assert response.status_code == 409
+    
+    # Отклоненные изменения не увеличивают версию данных и не меняют операцию
+    assert (await client.get("/user/me", headers=headers)).headers["etag"] == version
+    response = await client.get(f"/operation/{operation_id}", headers=headers)
+    assert response.json()["amount"] == -250.0
+    assert response.json()["category_id"] == category_id
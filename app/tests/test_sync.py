@@ -0,0 +1,107 @@
+"""
+Тесты для маршрута синхронизации изменений операций и категорий
+"""
+import pytest
+import httpx
+
+@pytest.fixture
+async def headers(client: httpx.AsyncClient) -> dict:
+    """Фикстура для заголовков авторизации нового пользователя"""
+    response = await client.post("/user/register", json={
+        "name": "Test",
+        "surname": "User",
+        "email": "testuser@server.com",
+        "password": "testpassword123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def create_category(client: httpx.AsyncClient, headers: dict, name: str) -> int:
+    response = await client.post("/category", json={"name": name, "color": "#FF33A8", "category_type": "expense"}, headers=headers)
+    return response.json()["id"]
+
+async def create_operation(client: httpx.AsyncClient, headers: dict, category_id: int, name: str) -> int:
+    response = await client.post("/operation", json={
+        "name": name, "date": "2024-12-01T10:00:00Z", "amount": -100.0, "categoryId": category_id
+    }, headers=headers)
+    return response.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_initial_sync(client: httpx.AsyncClient, headers: dict) -> None:
+    """Тест первой синхронизации: возвращаются все данные пользователя"""
+    category_id = await create_category(client, headers, "Продукты")
+    operation_id = await create_operation(client, headers, category_id, "Хлеб")
+    
+    response = await client.get("/sync", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["reset"] is True
+    assert data["seq"] == 2
+    assert data["operations"] == (await client.get("/operation", headers=headers)).json()
+    assert [category["id"] for category in data["categories"]] == [category_id]
+    assert data["operations"][0]["id"] == operation_id
+    assert data["deleted"] == {"operations": [], "categories": []}
+
+@pytest.mark.asyncio
+async def test_delta_sync(client: httpx.AsyncClient, headers: dict) -> None:
+    """Тест синхронизации изменений: только созданные, измененные и удаленные после since объекты"""
+    food_id = await create_category(client, headers, "Продукты")
+    cafe_id = await create_category(client, headers, "Кафе")
+    bread_id = await create_operation(client, headers, food_id, "Хлеб")
+    milk_id = await create_operation(client, headers, food_id, "Молоко")
+    await create_operation(client, headers, cafe_id, "Кофе")
+    await create_operation(client, headers, food_id, "Сыр")
+    since = (await client.get("/sync", headers=headers)).json()["seq"]
+    
+    # Без изменений ответ пустой
+    data = (await client.get("/sync", params={"since": since}, headers=headers)).json()
+    assert data == {"seq": since, "reset": False, "operations": [], "categories": [], "deleted": {"operations": [], "categories": []}}
+    
+    await client.put(f"/operation/{bread_id}", json={"amount": -150.0}, headers=headers)
+    await client.delete(f"/operation/{milk_id}", headers=headers)
+    await client.delete(f"/category/{cafe_id}", headers=headers)
+    tea_id = await create_operation(client, headers, food_id, "Чай")
+    
+    data = (await client.get("/sync", params={"since": since}, headers=headers)).json()
+    assert data["reset"] is False
+    assert data["seq"] == since + 4
+    assert sorted(operation["id"] for operation in data["operations"]) == sorted([bread_id, tea_id])
+    assert next(operation for operation in data["operations"] if operation["id"] == bread_id)["amount"] == -150.0
+    assert data["categories"] == []
+    # Операции удаленной категории клиент удаляет вместе с ней, отдельные отметки для них не создаются
+    assert data["deleted"]["operations"] == [milk_id]
+    assert data["deleted"]["categories"] == [cafe_id]
+    
+    # Изменения после последней синхронизации
+    await client.put(f"/category/{food_id}", json={"color": "#000000"}, headers=headers)
+    data = (await client.get("/sync", params={"since": data["seq"]}, headers=headers)).json()
+    assert [category["id"] for category in data["categories"]] == [food_id]
+    assert data["operations"] == []
+    assert data["deleted"] == {"operations": [], "categories": []}
+
+@pytest.mark.asyncio
+async def test_sync_unknown_version(client: httpx.AsyncClient, headers: dict) -> None:
+    """Тест синхронизации с номером изменения больше текущего: возвращаются все данные пользователя"""
+    category_id = await create_category(client, headers, "Продукты")
+    
+    data = (await client.get("/sync", params={"since": 100}, headers=headers)).json()
+    assert data["reset"] is True
+    assert [category["id"] for category in data["categories"]] == [category_id]
+
+@pytest.mark.asyncio
+async def test_sync_is_per_user(client: httpx.AsyncClient, headers: dict) -> None:
+    """Тест синхронизации только данных текущего пользователя"""
+    since = (await client.get("/sync", headers=headers)).json()["seq"]
+    
+    response = await client.post("/user/register", json={
+        "name": "Other",
+        "surname": "User",
+        "email": "otheruser@server.com",
+        "password": "testpassword123"
+    })
+    other_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    category_id = await create_category(client, other_headers, "Кафе")
+    await client.delete(f"/category/{category_id}", headers=other_headers)
+    
+    data = (await client.get("/sync", params={"since": since}, headers=headers)).json()
+    assert data["categories"] == [] and data["deleted"]["categories"] == []
@@ -1,9 +1,21 @@
 """
 Тесты для маршрутов работы с пользователями
 """
+import base64
 import pytest
 import httpx
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..auth.jwt_handler import create_access_token
+from ..auth.user_cache import user_cache
+from ..database.rollups import rebuild_totals
+
+# Изображение PNG размером 1x1 пиксель
+PNG_1X1 = (
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000100e221bc330000000049454e44ae426082"
+)
 
 @pytest.fixture
 async def access_token(client: httpx.AsyncClient) -> str:
@@ -160,4 +172,196 @@ async def test_update_user_avatar(client: httpx.AsyncClient) -> None:
     
     assert response.status_code == 200
     data = response.json()
-    assert data["avatar"] == "https://new-avatar.com/avatar.png"
\ No newline at end of file
+    assert data["avatar"] == "https://new-avatar.com/avatar.png"
+    
+    # Внешний аватар отдается перенаправлением, но только для адресов http и https
+    response = await client.get(f"/user/{user_id}/avatar")
+    assert response.status_code == 307
+    assert response.headers["location"] == "https://new-avatar.com/avatar.png"
+    
+    response = await client.patch(f"/user/{user_id}/avatar", json={"avatar": "javascript:alert(1)"}, headers=headers)
+    assert response.status_code == 200
+    response = await client.get(f"/user/{user_id}/avatar")
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_current_user_cache_invalidation(client: httpx.AsyncClient, access_token: str) -> None:
+    """Тест кэширования текущего пользователя и сброса кэша при смене email"""
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Accept": "application/json"
+    }
+    
+    response = await client.get("/user/me", headers=headers)
+    assert response.status_code == 200
+    user_id = response.json()["id"]
+    assert user_cache.get("testuser@server.com").id == user_id
+    
+    # После смены email старый токен больше не должен находить пользователя
+    response = await client.put(f"/user/{user_id}", json={"email": "renamed@server.com"}, headers=headers)
+    assert response.status_code == 200
+    assert user_cache.get("testuser@server.com") is None
+    
+    response = await client.get("/user/me", headers=headers)
+    assert response.status_code == 404
+    
+    # Новый токен работает и снова кэширует пользователя
+    new_headers = {"Authorization": f"Bearer {create_access_token('renamed@server.com')}"}
+    response = await client.get("/user/me", headers=new_headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "renamed@server.com"
+    assert user_cache.get("renamed@server.com").id == user_id
+
+@pytest.mark.asyncio
+async def test_upload_and_get_avatar(client: httpx.AsyncClient) -> None:
+    """Тест загрузки аватара в хранилище и его получения с заголовками кэширования"""
+    register_payload = {
+        "name": "Анна",
+        "surname": "Аватарова",
+        "email": "image@server.com",
+        "password": "testpassword123",
+        "budgetLimit": 1000.0
+    }
+    register_response = await client.post("/user/register", json=register_payload)
+    user_id = register_response.json()["user_id"]
+    headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+    
+    image = bytes.fromhex(PNG_1X1)
+    avatar = "data:image/png;base64," + base64.b64encode(image).decode()
+    response = await client.patch(f"/user/{user_id}/avatar", json={"avatar": avatar}, headers=headers)
+    
+    assert response.status_code == 200
+    avatar_url = response.json()["avatar"]
+    assert avatar_url.startswith(f"/user/{user_id}/avatar?v=")
+    
+    # Изображение по адресу с версией кэшируется бессрочно
+    response = await client.get(avatar_url)
+    assert response.status_code == 200
+    assert response.content == image
+    assert response.headers["content-type"] == "image/png"
+    assert "immutable" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+    
+    # Префикс версии короче полного значения не считается актуальной версией
+    response = await client.get(avatar_url[:-1])
+    assert response.status_code == 200
+    assert "immutable" not in response.headers["cache-control"]
+    
+    # Повторный запрос с ETag не передает изображение
+    response = await client.get(f"/user/{user_id}/avatar", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    
+    # Миниатюра
+    response = await client.get(f"/user/{user_id}/avatar?size=64")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    
+    # Данные, не являющиеся изображением, отклоняются
+    not_image = "data:image/png;base64," + base64.b64encode(b"not an image").decode()
+    response = await client.patch(f"/user/{user_id}/avatar", json={"avatar": not_image}, headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_budget_status(client: httpx.AsyncClient, access_token: str) -> None:
+    """Тест состояния бюджета за текущий месяц при создании, изменении и удалении операций"""
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Accept": "application/json",
+        "Content-Type": "application/json"
+    }
+    now = datetime.now(timezone.utc)
+    this_month = now.replace(day=1, hour=12, minute=0, second=0, microsecond=0)
+    last_month = (this_month - timedelta(days=1)).replace(day=1)
+    
+    expense_id = (await client.post("/category", json={"name": "Продукты", "color": "#FF33A8", "category_type": "expense"}, headers=headers)).json()["id"]
+    income_id = (await client.post("/category", json={"name": "Зарплата", "color": "#33FF57", "category_type": "income"}, headers=headers)).json()["id"]
+    
+    async def create(amount: float, category_id: int, date: datetime) -> int:
+        response = await client.post("/operation", json={
+            "name": "Операция", "date": date.isoformat(), "amount": amount, "categoryId": category_id
+        }, headers=headers)
+        return response.json()["id"]
+    
+    await create(-3000.0, expense_id, this_month)
+    moved_id = await create(-4000.0, expense_id, last_month)
+    await create(50000.0, income_id, this_month)
+    deleted_id = await create(-1000.0, expense_id, this_month)
+    
+    response = await client.get("/user/me/budget-status", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["budgetLimit"] == 10000.0
+    assert data["expenses"] == 4000.0
+    assert data["status"] == "ok"
+    
+    # Перенос операции в текущий месяц и удаление другой операции
+    await client.put(f"/operation/{moved_id}", json={"date": this_month.isoformat(), "amount": -5000.0}, headers=headers)
+    await client.delete(f"/operation/{deleted_id}", headers=headers)
+    data = (await client.get("/user/me/budget-status", headers=headers)).json()
+    assert data["expenses"] == 8000.0
+    assert data["status"] == "warning"
+    
+    # Смена типа категории доходов на расходы
+    await client.put(f"/category/{income_id}", json={"category_type": "expense"}, headers=headers)
+    data = (await client.get("/user/me/budget-status", headers=headers)).json()
+    assert data["expenses"] == 58000.0
+    assert data["status"] == "exceeded"
+    assert data["remaining"] == -48000.0
+    
+    # Удаление категории вместе с ее операциями
+    await client.delete(f"/category/{income_id}", headers=headers)
+    data = (await client.get("/user/me/budget-status", headers=headers)).json()
+    assert data["expenses"] == 8000.0
+
+@pytest.mark.asyncio
+async def test_user_currency(client: httpx.AsyncClient) -> None:
+    """Тест кода валюты пользователя: значение по умолчанию, указание при регистрации и изменение"""
+    response = await client.post("/user/register", json={
+        "name": "Test", "surname": "User", "email": "currency@server.com", "password": "testpassword123", "currency": "usd"
+    })
+    assert response.status_code == 422
+    
+    # Валюты, минимальная единица которых не равна сотой доле, не поддерживаются
+    for currency in ("JPY", "KWD"):
+        response = await client.post("/user/register", json={
+            "name": "Test", "surname": "User", "email": "currency@server.com", "password": "testpassword123", "currency": currency
+        })
+        assert response.status_code == 422
+    
+    response = await client.post("/user/register", json={
+        "name": "Test", "surname": "User", "email": "currency@server.com", "password": "testpassword123", "budgetLimit": 1500.25, "currency": "USD"
+    })
+    data = response.json()
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+    
+    me = (await client.get("/user/me", headers=headers)).json()
+    assert me["currency"] == "USD"
+    assert me["budgetLimit"] == 1500.25
+    assert (await client.get("/user/me/budget-status", headers=headers)).json()["currency"] == "USD"
+    
+    response = await client.put(f"/user/{data['user_id']}", json={"currency": "EUR"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["currency"] == "EUR"
+    response = await client.put(f"/user/{data['user_id']}", json={"currency": "JPY"}, headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_rebuild_totals(client: httpx.AsyncClient, access_token: str, test_session: AsyncSession) -> None:
+    """Тест полного пересчета помесячных и дневных итогов"""
+    headers = {"Authorization": f"Bearer {access_token}"}
+    category_id = (await client.post("/category", json={"name": "Кафе", "color": "#FF33A8", "category_type": "expense"}, headers=headers)).json()["id"]
+    for amount in (-100.0, -250.0):
+        await client.post("/operation", json={
+            "name": "Кофе", "date": datetime.now(timezone.utc).isoformat(), "amount": amount, "categoryId": category_id
+        }, headers=headers)
+    expected = (await client.get("/user/me/budget-status", headers=headers)).json()
+    
+    # Итоги портятся и восстанавливаются пересчетом
+    await test_session.execute(text("UPDATE monthly_totals SET total = 0, operations_count = 0"))
+    await test_session.execute(text("UPDATE daily_totals SET total = 0, operations_count = 0"))
+    await rebuild_totals(test_session)
+    await test_session.commit()
+    
+    assert (await client.get("/user/me/budget-status", headers=headers)).json() == expected
+    assert expected["expenses"] == 350.0
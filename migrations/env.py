@@ -11,6 +11,10 @@ from app.database.connection import engine
 from app.models.users import User
 from app.models.categories import Category
 from app.models.operations import Operation
+from app.models.monthly_totals import MonthlyTotal
+from app.models.daily_totals import DailyTotal
+from app.models.tombstones import Tombstone
+from app.models.archived_months import ArchivedMonth
 
 import sys
 sys.path.append('./app')
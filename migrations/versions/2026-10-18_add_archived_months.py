@@ -0,0 +1,30 @@
+"""add archived months
+
+Revision ID: 6b3f0d1c9e27
+Revises: 419914960917
+Create Date: 2026-10-18 23:12:40.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b3f0d1c9e27'
+down_revision: Union[str, None] = '419914960917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('archived_months',
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('month')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('archived_months')
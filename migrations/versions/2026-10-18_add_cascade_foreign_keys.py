@@ -0,0 +1,39 @@
+"""add cascade foreign keys
+
+Revision ID: a2b7024c0bc2
+Revises: c0efccf1ee4a
+Create Date: 2026-10-18 17:24:36.418205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2b7024c0bc2'
+down_revision: Union[str, None] = 'c0efccf1ee4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Внешние ключи, удаление по которым выполняется на уровне БД: (имя ограничения, таблица, столбец, связанная таблица)
+FOREIGN_KEYS = [
+    ('categories_author_fkey', 'categories', 'author', 'users'),
+    ('operations_author_fkey', 'operations', 'author', 'users'),
+    ('operations_category_id_fkey', 'operations', 'category_id', 'categories'),
+]
+
+
+def upgrade() -> None:
+    # Индекс для каскадного удаления операций категории (проверка внешнего ключа ищет операции только по category_id)
+    op.create_index('ix_operations_category_id', 'operations', ['category_id'], unique=False)
+    for name, table, column, referred_table in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referred_table, [column], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    for name, table, column, referred_table in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referred_table, [column], ['id'])
+    op.drop_index('ix_operations_category_id', table_name='operations')
@@ -0,0 +1,44 @@
+"""add daily totals
+
+Revision ID: f70f9241b9d4
+Revises: a2b7024c0bc2
+Create Date: 2026-10-18 18:42:10.316482
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f70f9241b9d4'
+down_revision: Union[str, None] = 'a2b7024c0bc2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_totals',
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('author', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('operations_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['author'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('category_id', 'day')
+    )
+    op.create_index('ix_daily_totals_author_day', 'daily_totals', ['author', 'day'], unique=False)
+
+    # Начальное заполнение итогов по существующим операциям
+    op.execute(
+        "INSERT INTO daily_totals (category_id, day, author, total, operations_count) "
+        "SELECT category_id, CAST(timezone('UTC', date) AS DATE), author, sum(abs(amount)), count(*) "
+        "FROM operations GROUP BY 1, 2, 3"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_daily_totals_author_day', table_name='daily_totals')
+    op.drop_table('daily_totals')
@@ -0,0 +1,32 @@
+"""add indexes for hot queries
+
+Revision ID: 02fa355509ca
+Revises: e21ef8d9ab74
+Create Date: 2026-10-18 10:12:40.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '02fa355509ca'
+down_revision: Union[str, None] = 'e21ef8d9ab74'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_categories_author', 'categories', ['author'], unique=False)
+    op.create_index('ix_operations_author_date_id', 'operations', ['author', sa.text('date DESC'), 'id'], unique=False)
+    op.create_index('ix_operations_author_category_date', 'operations', ['author', 'category_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_operations_author_category_date', table_name='operations')
+    op.drop_index('ix_operations_author_date_id', table_name='operations')
+    op.drop_index('ix_categories_author', table_name='categories')
+    op.drop_index('ix_users_email', table_name='users')
@@ -0,0 +1,44 @@
+"""add monthly totals
+
+Revision ID: 9d47d0e66db2
+Revises: e80727d99d45
+Create Date: 2026-10-18 14:05:52.207714
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d47d0e66db2'
+down_revision: Union[str, None] = 'e80727d99d45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('monthly_totals',
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('author', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('operations_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['author'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('category_id', 'month')
+    )
+    op.create_index('ix_monthly_totals_author_month', 'monthly_totals', ['author', 'month'], unique=False)
+
+    # Начальное заполнение итогов по существующим операциям
+    op.execute(
+        "INSERT INTO monthly_totals (category_id, month, author, total, operations_count) "
+        "SELECT category_id, CAST(date_trunc('month', timezone('UTC', date)) AS DATE), author, sum(abs(amount)), count(*) "
+        "FROM operations GROUP BY 1, 2, 3"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_monthly_totals_author_month', table_name='monthly_totals')
+    op.drop_table('monthly_totals')
@@ -0,0 +1,47 @@
+"""add sync columns and tombstones
+
+Revision ID: c0efccf1ee4a
+Revises: 3628bcce577a
+Create Date: 2026-10-18 16:02:11.734925
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c0efccf1ee4a'
+down_revision: Union[str, None] = '3628bcce577a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('operations', 'categories'):
+        op.add_column(table, sa.Column('seq', sa.BigInteger(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+        op.create_index(f'ix_{table}_author_seq', table, ['author', 'seq'], unique=False)
+
+    op.create_table('tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('author', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['author'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstones_author_seq', 'tombstones', ['author', 'seq'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tombstones_author_seq', table_name='tombstones')
+    op.drop_table('tombstones')
+
+    for table in ('categories', 'operations'):
+        op.drop_index(f'ix_{table}_author_seq', table_name=table)
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'seq')
@@ -0,0 +1,28 @@
+"""add user data version
+
+Revision ID: 3628bcce577a
+Revises: 9d47d0e66db2
+Create Date: 2026-10-18 15:12:40.518206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3628bcce577a'
+down_revision: Union[str, None] = '9d47d0e66db2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('data_version', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('data_updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'data_updated_at')
+    op.drop_column('users', 'data_version')
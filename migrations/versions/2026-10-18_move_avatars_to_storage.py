@@ -0,0 +1,132 @@
+"""move avatars to storage
+
+Revision ID: e80727d99d45
+Revises: 02fa355509ca
+Create Date: 2026-10-18 12:41:07.512960
+
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e80727d99d45'
+down_revision: Union[str, None] = '02fa355509ca'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Количество пользователей, обрабатываемых за один запрос при переносе аватаров
+BATCH_SIZE = 100
+
+# Каталог хранилища аватаров на момент этой ревизии (логика хранилища повторена здесь, чтобы последующие изменения
+# кода приложения не меняли поведение миграции)
+STORAGE_ROOT = Path(os.environ.get("AVATAR_STORAGE_PATH", "media/avatars"))
+
+# Сигнатуры форматов изображений, которые отдает маршрут аватаров
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+# Регулярное выражение для разбора data URL вида data:image/png;base64,....
+DATA_URL_PATTERN = re.compile(r"^data:(?P<mime>[\w/+.-]*)(;[\w=.-]+)*;base64,(?P<data>.*)$", re.DOTALL)
+
+
+# Определение формата изображения по сигнатуре
+def detect_image_type(data: bytes) -> Optional[str]:
+    for signature, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+# Декодирование data URL; None, если значение не является изображением поддерживаемого формата
+def decode_image(value: str) -> Optional[bytes]:
+    match = DATA_URL_PATTERN.match(value)
+    if not match:
+        return None
+    try:
+        data = base64.b64decode(match.group("data"), validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return data if detect_image_type(data) else None
+
+
+# Путь к файлу аватара в хранилище
+def storage_path(avatar_hash: str) -> Path:
+    return STORAGE_ROOT / avatar_hash[:2] / avatar_hash[2:4] / avatar_hash
+
+
+# Атомарная запись изображения в хранилище, возвращает его хеш
+def save(data: bytes) -> str:
+    avatar_hash = hashlib.sha256(data).hexdigest()
+    path = storage_path(avatar_hash)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    return avatar_hash
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('avatar_hash', sa.String(length=64), nullable=True))
+
+    # Перенос изображений, хранящихся в виде data URL, в хранилище аватаров. Значения, которые не удается разобрать
+    # как изображение поддерживаемого формата, и ссылки на внешние ресурсы остаются в столбце avatar без изменений.
+    # Миниатюры не создаются: маршрут аватаров отдает исходное изображение, пока миниатюры нет.
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT id, avatar FROM users WHERE id > :last_id AND avatar LIKE 'data:%' "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        for user_id, avatar in rows:
+            last_id = user_id
+            data = decode_image(avatar)
+            if data is None:
+                continue
+            connection.execute(
+                sa.text("UPDATE users SET avatar = NULL, avatar_hash = :avatar_hash WHERE id = :id"),
+                {"avatar_hash": save(data), "id": user_id},
+            )
+
+
+def downgrade() -> None:
+    # Возврат изображений из хранилища в столбец avatar в виде data URL
+    connection = op.get_bind()
+    rows = connection.execute(sa.text("SELECT id, avatar_hash FROM users WHERE avatar_hash IS NOT NULL")).all()
+    for user_id, avatar_hash in rows:
+        data = storage_path(avatar_hash).read_bytes()
+        content_type = detect_image_type(data) or "application/octet-stream"
+        avatar = f"data:{content_type};base64,{base64.b64encode(data).decode()}"
+        connection.execute(
+            sa.text("UPDATE users SET avatar = :avatar WHERE id = :id"),
+            {"avatar": avatar, "id": user_id},
+        )
+
+    op.drop_column('users', 'avatar_hash')
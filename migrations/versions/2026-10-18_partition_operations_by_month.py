@@ -0,0 +1,94 @@
+"""partition operations by month
+
+Revision ID: 419914960917
+Revises: 18035e5a319a
+Create Date: 2026-10-18 21:05:12.204518
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '419914960917'
+down_revision: Union[str, None] = '18035e5a319a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Количество месяцев после текущего, для которых секции создаются заранее (та же настройка, по которой ensure_partitions
+# создает секции при запуске приложения)
+MONTHS_AHEAD = settings.operation_partitions_ahead
+
+# Индексы таблицы operations: (имя, столбцы)
+INDEXES = [
+    ('ix_operations_author_date_id', ['author', sa.text('date DESC'), 'id']),
+    ('ix_operations_author_category_date', ['author', 'category_id', 'date']),
+    ('ix_operations_category_id', ['category_id']),
+    ('ix_operations_author_seq', ['author', 'seq']),
+]
+
+# Внешние ключи таблицы operations: (имя ограничения, столбец, связанная таблица)
+FOREIGN_KEYS = [
+    ('operations_author_fkey', 'author', 'users'),
+    ('operations_category_id_fkey', 'category_id', 'categories'),
+]
+
+
+# Первый день месяца, отстоящего от month на months месяцев
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+# Пересоздание таблицы operations из таблицы source (переименованной исходной) с переносом строк; partition_by - выражение
+# секционирования новой таблицы или None для обычной таблицы. Последовательность идентификаторов отвязывается от исходной
+# таблицы, чтобы не быть удаленной вместе с ней.
+def recreate_operations(source: str, primary_key: list, partition_by: Union[str, None]) -> None:
+    op.execute('ALTER SEQUENCE operations_id_seq OWNED BY NONE')
+    op.execute(f'ALTER TABLE operations RENAME TO {source}')
+    op.execute(f'ALTER INDEX operations_pkey RENAME TO {source}_pkey')
+    partitioning = f' PARTITION BY {partition_by}' if partition_by else ''
+    op.execute(f'CREATE TABLE operations (LIKE {source} INCLUDING DEFAULTS){partitioning}')
+    if partition_by:
+        create_month_partitions(source)
+    op.execute(f'INSERT INTO operations SELECT * FROM {source}')
+    op.execute(f'DROP TABLE {source} CASCADE')
+    op.execute('ALTER SEQUENCE operations_id_seq OWNED BY operations.id')
+
+    op.create_primary_key('operations_pkey', 'operations', primary_key)
+    for name, column, referred_table in FOREIGN_KEYS:
+        op.create_foreign_key(name, 'operations', referred_table, [column], ['id'], ondelete='CASCADE')
+    for name, columns in INDEXES:
+        op.create_index(name, 'operations', columns, unique=False)
+
+
+# Создание помесячных секций (UTC) для месяцев, в которых есть операции, и для месяцев с текущего на MONTHS_AHEAD вперед,
+# а также секции по умолчанию для остальных дат
+def create_month_partitions(source: str) -> None:
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    months = set(
+        op.get_bind().execute(
+            sa.text(f"SELECT DISTINCT CAST(date_trunc('month', timezone('UTC', date)) AS DATE) FROM {source}")
+        ).scalars()
+    )
+    months.update(add_months(current, offset) for offset in range(MONTHS_AHEAD + 1))
+    for month in sorted(months):
+        op.execute(
+            f"CREATE TABLE operations_y{month.year:04d}m{month.month:02d} PARTITION OF operations "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+        )
+    op.execute('CREATE TABLE operations_default PARTITION OF operations DEFAULT')
+
+
+def upgrade() -> None:
+    recreate_operations('operations_unpartitioned', ['id', 'date'], 'RANGE (date)')
+
+
+def downgrade() -> None:
+    # Секции, перенесенные в схему archive, остаются в ней и в обычную таблицу не возвращаются
+    recreate_operations('operations_partitioned', ['id'], None)
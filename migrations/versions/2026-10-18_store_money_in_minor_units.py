@@ -0,0 +1,59 @@
+"""store money in minor units
+
+Revision ID: 18035e5a319a
+Revises: f70f9241b9d4
+Create Date: 2026-10-18 20:17:43.508921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '18035e5a319a'
+down_revision: Union[str, None] = 'f70f9241b9d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Столбцы денежных сумм, которые хранятся целым числом минимальных единиц валюты (копеек)
+MONEY_COLUMNS = [
+    ('operations', 'amount'),
+    ('users', 'budget_limit'),
+    ('monthly_totals', 'total'),
+    ('daily_totals', 'total'),
+]
+
+# Таблицы итогов: (таблица, столбец периода, SQL выражение периода по дате операции)
+ROLLUPS = [
+    ('monthly_totals', 'month', "CAST(date_trunc('month', timezone('UTC', date)) AS DATE)"),
+    ('daily_totals', 'day', "CAST(timezone('UTC', date) AS DATE)"),
+]
+
+
+def upgrade() -> None:
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(table, column,
+               existing_type=sa.Float(),
+               type_=sa.BigInteger(),
+               postgresql_using=f'round(CAST({column} AS NUMERIC) * 100)')
+    # Итоги - суммы чисел с плавающей точкой, и после округления могут отличаться от суммы округленных операций, поэтому они
+    # пересчитываются по уже преобразованным операциям (как в rebuild_totals)
+    for table, period, expression in ROLLUPS:
+        op.execute(f'DELETE FROM {table}')
+        op.execute(
+            f"INSERT INTO {table} (category_id, {period}, author, total, operations_count) "
+            f"SELECT category_id, {expression}, author, sum(abs(amount)), count(*) "
+            f"FROM operations GROUP BY 1, 2, 3"
+        )
+    op.add_column('users', sa.Column('currency', sa.String(length=3), server_default='RUB', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'currency')
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(table, column,
+               existing_type=sa.BigInteger(),
+               type_=sa.Float(),
+               postgresql_using=f'{column} / 100.0')
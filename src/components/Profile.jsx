@@ -425,7 +425,8 @@ function Profile() {
           <h1 className="profile__headers">Профиль пользователя</h1>
           <p>Фотография профиля:</p>
           {/* Отображение аватара пользователя с fallback на стандартную иконку */}
-          <img className="profile__icon" src={currentUser?.avatar || icon} alt="аватар" onError={(e) => { e.target.src = icon; }}/>
+          {/* Загруженные изображения отдаются сервером API по относительному адресу /user/{id}/avatar */}
+          <img className="profile__icon" src={currentUser?.avatar?.startsWith('/') ? `http://localhost:8000${currentUser.avatar}` : (currentUser?.avatar || icon)} alt="аватар" onError={(e) => { e.target.src = icon; }}/>
           <div className="profile__add-block">
             <p>Изменить фотографию профиля</p>
             <button className="profile__change-btn" type="button" aria-label="открыть" onClick={handleUpdateAvatarPopupClick}></button>